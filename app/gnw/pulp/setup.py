@@ -53,7 +53,7 @@ setup( name='gnw',
        zip_safe=True,
        install_requires=['fpconst>=0.7.2',
                          'numpy>=1.0.4',
-                         'PuLP>=1.21',
+                         'PuLP==1.6.10',
                          'SOAPpy>=0.12'] )
 
 # ==============================================================================
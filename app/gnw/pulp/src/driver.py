@@ -18,16 +18,30 @@ gnw: Driver for running GasNetWorks (gnw) linear optimisation
 import pulp
 import gnw.pulp_patches
 import sys
+import os
+import time
+import signal
+import multiprocessing
 
 from gnw.network_factory import NetworkFactory
+from gnw.sparse_solver import SparseSolver
+from gnw.highs_solver import HighsSolver
 
 from gnw.reader import read_coeffs
+from gnw.reader import read_coeffs_cached
+from gnw.reader import preload_coeffs
+from gnw.reader import get_unchanged_entity_names
+from gnw.reader import write_coeffs_bundle
 from gnw.writer import write_product_results 
 from gnw.writer import write_dispatch_results
+from gnw.writer import write_columnar_results
 from gnw.util import dbg_print
+from gnw.util import conditional
+from gnw.util import open_results_file
+from gnw.profiler import Profiler
 
 
-def main(data_dir, result_dir, verbose=False):
+def main(data_dir, result_dir, verbose=False, profile=False, read_jobs=1, cache_dir=None, binary_results=False, compresslevel=0, sparse=False, presolve=False, cbc=False, cbc_options=None, highs=False, lazy=False, preload=None, scenario_dir_list=None):
     """ Runs a test (case) from inputs located
     in folder L{data_dir} and outputs results to
     folder L{result_dir} (folder must exist). The
@@ -50,32 +64,163 @@ def main(data_dir, result_dir, verbose=False):
     @param verbose: flags whether additional progress
         information is written to the console
     @type verbose: L{bool} [default=False] 
+    
+    @param profile: flags whether wall clock time, cpu time
+        and peak memory usage are recorded for each phase
+        and each entity and written to file
+        <result_dir>/gnw-ntwrk-profile.txt
+    @type profile: L{bool} [default=False] 
+    
+    @param read_jobs: maximal number of threads reading
+        input files concurrently (see L{gnw.reader.read_coeffs})
+    @type read_jobs: L{int} [default=1] 
+    
+    @param cache_dir: folder holding cache files of input data
+        read previously (see L{gnw.reader.read_coeffs_cached}),
+        None for reading input files without cache
+    @type cache_dir: L{str} or None [default=None] 
+    
+    @param binary_results: flags whether the results are additionally
+        written in binary columnar form to file
+        <result_dir>/gnw-ntwrk-rslts.bnd
+        (see L{gnw.writer.write_columnar_results})
+    @type binary_results: L{bool} [default=False] 
+    
+    @param compresslevel: gzip compression level, if positive all
+        text result files are written compressed to files with the
+        same names with '.gz' appended (see
+        L{gnw.util.open_results_file})
+    @type compresslevel: L{int} in [0, 9] [default=0] 
+    
+    @param sparse: flags whether the model is assembled as sparse
+        matrix and solved by L{gnw.sparse_solver.SparseSolver} or
+        L{gnw.highs_solver.HighsSolver} (see L{solve_sparse} and
+        highs) rather than through a pulp problem
+    @type sparse: L{bool} [default=False] 
+    
+    @param presolve: flags whether constraints over a single
+        lp variable are substituted by bounds and fixed lp
+        variables folded into constants before solving (see
+        L{gnw.network.Network.presolve_constraints} and
+        L{gnw.sparse_model.SparseModel.presolve})
+    @type presolve: L{bool} [default=False] 
+    
+    @param cbc: flags whether the pulp problem is solved with the
+        local CBC solver (see
+        L{gnw.sparse_solver.SparseSolver.create_pulp_solver}) rather
+        than by the Xpress service. Ignored if sparse is True, as
+        sparse models are always solved locally.
+    @type cbc: L{bool} [default=False] 
+    
+    @param cbc_options: additional CBC command line options passed
+        after L{gnw.sparse_solver.SparseSolver.default_options}
+        whenever the local CBC solver is used, e.g. ['cuts', 'on'],
+        None for none
+    @type cbc_options: L{list} of L{str} or None [default=None] 
+    
+    @param highs: flags whether sparse models are solved in-process
+        by the HiGHS library (see L{gnw.highs_solver.HighsSolver})
+        rather than by the local CBC solver. Ignored if sparse is
+        False.
+    @type highs: L{bool} [default=False] 
+    
+    @param lazy: flags whether the input files of individual
+        entities are read only when the entities are created
+        (see L{gnw.reader.read_coeffs}). Ignored if cache_dir
+        is given.
+    @type lazy: L{bool} [default=False] 
+    
+    @param preload: data dictionary keys of the entity groups
+        whose input files are read up front in up to read_jobs
+        threads when reading lazily (see
+        L{gnw.reader.preload_coeffs}), e.g. ['TRN_DICT_LIST'],
+        None for none
+    @type preload: L{list} of L{str} or None [default=None] 
+    
+    @param scenario_dir_list: input folders of scenarios run
+        one after another once the run on data_dir is done.
+        Results are written to sub-folders of result_dir named
+        as the scenario folders (created if not existing).
+        Storages, suppliers and firm profiles whose input files
+        did not change since the previous run are taken from
+        its network rather than created anew, and their input
+        files are not read (see
+        L{gnw.network_factory.NetworkFactory.RebuildFromDataDict}).
+        Scenario folders are read lazily unless cache_dir is given.
+    @type scenario_dir_list: L{list} of L{str} or None [default=None] 
+    
+    @return: problem status and objective value of the run on
+        data_dir, the latter being None if the problem has not
+        been solved to optimality
+    @rtype: L{tuple} of (L{str}, L{float} or None)
     """
+    profiler = Profiler( profile )
+    try:
+        status, objective, ntwrk = run( data_dir, result_dir, verbose, profiler, read_jobs, cache_dir, binary_results, compresslevel,
+                                        sparse = sparse, presolve = presolve, cbc = cbc, cbc_options = cbc_options, highs = highs,
+                                        lazy = lazy, preload = preload )
+        ref_data_dir = data_dir
+        for scenario_dir in scenario_dir_list or []:
+            rslt_dir = "%s/%s" % (result_dir, os.path.basename( os.path.normpath( scenario_dir ) ))
+            if not os.path.isdir( rslt_dir ):
+                os.makedirs( rslt_dir )
+            dbg_print( "running scenario '%s' ..." % scenario_dir, verbose )
+            # entity wrappers are installed anew for the rebuilt network
+            profiler.restore()
+            scenario_status, scenario_objective, ntwrk = \
+                profiler.call( "scenario", run, scenario_dir, rslt_dir, verbose, profiler, read_jobs, cache_dir, binary_results, compresslevel,
+                               sparse = sparse, presolve = presolve, cbc = cbc, cbc_options = cbc_options, highs = highs,
+                               lazy = True, preload = preload, ntwrk = ntwrk, ref_data_dir = ref_data_dir )
+            ref_data_dir = scenario_dir
+        return status, objective
+    finally:
+        profiler.restore()
+        if profile and os.path.isdir( result_dir ):
+            fname = "%s/%s-%s-%s.%s" % (result_dir, "gnw", "ntwrk", "profile", "txt")
+            dbg_print( "writing profile to '%s' ..." % fname, verbose )
+            file = open( fname, "w" )
+            profiler.write( file )
+            file.flush()
+            file.close()
 
-    dbg_print( "reading coefficient files ...", verbose )
-    data_dict = read_coeffs( data_dir )
+
+def solve(ntwrk, verbose, profiler, presolve=False, cbc=False, cbc_options=None):
+    """ Creates the pulp model of network ntwrk, populates
+    a L{pulp.LpProblem} with it and solves the problem.
     
-    dbg_print( "initialising networks ...", verbose )
-    ntwrk = NetworkFactory.CreateFromDataDict( {'NAME' : "ntwrk"}, data_dict, verbose )
+    @param ntwrk: network with lp variables created
+    @type ntwrk: L{gnw.network.Network}
     
-    dbg_print( "creating LP variables ...", verbose )
-    ntwrk.create_lp_vars()
+    @param profiler: profiler recording phases (if enabled)
+    @type profiler: L{gnw.profiler.Profiler}
+    
+    @param presolve: see L{main}
+    @type presolve: L{bool}
+    
+    @param cbc: see L{main}
+    @type cbc: L{bool}
+    
+    @param cbc_options: see L{main}
+    @type cbc_options: L{list} of L{str} or None
+    
+    @return: solved problem
+    @rtype: L{pulp.LpProblem}
+    """
     dbg_print( "creating LP model ...", verbose )
     ntwrk.create_model()
 
     # Create problem and add (objective) constraints
     dbg_print( "initialising LP problem ...", verbose )
+    profiler.start( "create_problem" )
     prblm_name = "gnw"
     prblm = pulp.LpProblem( prblm_name, pulp.LpMaximize )
     
-    # Get (objective) constraints
-    dbg_print( "creating LP objective ...", verbose )
-    prblm += ntwrk.get_objective()
-    
-    dbg_print( "creating LP constraints ...", verbose )
-    constraint_list = ntwrk.get_constraints()
-    for constraint in constraint_list:
-        prblm += constraint 
+    # Add objective and constraints in a single pass
+    dbg_print( "creating LP objective and constraints ...", verbose )
+    row_count_list = ntwrk.populate( prblm, presolve )
+    for entity, row_count in row_count_list:
+        dbg_print( "    %s: %d rows" % (entity.name, row_count), verbose )
+    profiler.stop()
 
     pulp.LpSolverDefault.keepFiles = True
 #    pulp.pulpTestAll()
@@ -115,52 +260,191 @@ def main(data_dir, result_dir, verbose=False):
     mode = 'DEVELOPMENT'    # one of ['TESTING', 'DEVELOPMENT', ...?]
     solver = pulp.XPRESS_SERVICE_CLIENT( optcontrol=params, optimisationMode=mode )
     
-    prblm.solve( solver )
+    # local CBC solver run with the same options as on the sparse path
+    if cbc:
+        solver = SparseSolver( options = cbc_options or [] ).create_pulp_solver()
+    
+    profiler.call( "solve", prblm.solve, solver )
+    ntwrk.restore_lp_var_bounds()
+    
+    return prblm
+
+
+def solve_sparse(ntwrk, verbose, profiler, presolve=False, cbc_options=None, highs=False):
+    """ Assembles the sparse model of network ntwrk (see
+    L{gnw.network.Network.get_sparse_model}) and solves it with
+    L{gnw.sparse_solver.SparseSolver} or, in-process,
+    L{gnw.highs_solver.HighsSolver}, i.e., without populating
+    a L{pulp.LpProblem} or writing LP text. Solution values are
+    written back to the lp variables of the network's entities.
+    
+    @param ntwrk: network with lp variables created
+    @type ntwrk: L{gnw.network.Network}
+    
+    @param profiler: profiler recording phases (if enabled)
+    @type profiler: L{gnw.profiler.Profiler}
+    
+    @param presolve: see L{main}
+    @type presolve: L{bool}
+    
+    @param cbc_options: see L{main}
+    @type cbc_options: L{list} of L{str} or None
+    
+    @param highs: see L{main}
+    @type highs: L{bool}
+    
+    @return: problem holding status and (constant) objective
+        value of the solution only, as required by the
+        result writers (see L{gnw.writer})
+    @rtype: L{pulp.LpProblem}
+    """
+    dbg_print( "creating sparse LP model ...", verbose )
+    model = profiler.call( "create_sparse_model", ntwrk.get_sparse_model, "", presolve )
+    dbg_print( "    %d rows, %d columns, %d nonzeros" % (model.nRows, len( model.registry ), len( model.val )), verbose )
+    
+    dbg_print( "solving ...", verbose )
+    prblm = pulp.LpProblem( "gnw", pulp.LpMaximize )
+    solver = conditional( highs, HighsSolver(), SparseSolver( options = cbc_options or [] ) )
+    prblm.status = profiler.call( "solve", solver.solve, model, pulp.LpMaximize )
+    prblm.objective = pulp.LpAffineExpression( constant = model.get_objective_value() )
+    
+    return prblm
+
+
+def run(data_dir, rslt_dir, verbose, profiler, read_jobs=1, cache_dir=None, binary_results=False, compresslevel=0, sparse=False, presolve=False, cbc=False, cbc_options=None, highs=False, lazy=False, preload=None, ntwrk=None, ref_data_dir=None):
+    """ Implements a single run of L{main}, recording
+    all phases with given profiler.
+    
+    @param profiler: profiler recording phases (if enabled)
+    @type profiler: L{gnw.profiler.Profiler}
+    
+    @param ntwrk: network of the previous run on folder
+        ref_data_dir, whose unchanged entities are reused
+        (see L{main}), None for creating all entities
+    @type ntwrk: L{gnw.network.Network} or None
+    
+    @param ref_data_dir: input folder of the previous run
+    @type ref_data_dir: L{str} or None
+    
+    @return: problem status and objective value (see
+        L{main}), and network of this run
+    @rtype: L{tuple} of (L{str}, L{float} or None,
+        L{gnw.network.Network})
+    """
+    dbg_print( "reading coefficient files ...", verbose )
+    if cache_dir is not None:
+        data_dict = profiler.call( "read_coeffs", read_coeffs_cached, data_dir, cache_dir, jobs = read_jobs )
+    elif lazy:
+        data_dict = profiler.call( "read_coeffs", read_coeffs, data_dir, lazy = True )
+        if preload:
+            profiler.call( "preload_coeffs", preload_coeffs, data_dict, preload, jobs = read_jobs )
+    else:
+        data_dict = profiler.call( "read_coeffs", read_coeffs, data_dir, jobs = read_jobs )
+    
+    dbg_print( "initialising networks ...", verbose )
+    if ntwrk is None:
+        ntwrk = profiler.call( "create_network",
+                               NetworkFactory.CreateFromDataDict, {'NAME' : "ntwrk"}, data_dict, verbose )
+    else:
+        name_set_dict = get_unchanged_entity_names( data_dir, ref_data_dir, data_dict )
+        ntwrk = profiler.call( "create_network",
+                               NetworkFactory.RebuildFromDataDict, ntwrk, data_dict, name_set_dict, verbose )
+    # the sparse path creates pulp models of entities without native
+    # sparse rows only, from within their create_sparse_model calls
+    profiler.instrument( ntwrk, conditional( sparse,
+                                             ("create_lp_vars", "create_sparse_model"),
+                                             ("create_lp_vars", "create_model") ) )
+    
+    dbg_print( "creating LP variables ...", verbose )
+    ntwrk.create_lp_vars()
+    if sparse:
+        prblm = solve_sparse( ntwrk, verbose, profiler, presolve = presolve, cbc_options = cbc_options, highs = highs )
+    else:
+        prblm = solve( ntwrk, verbose, profiler, presolve = presolve, cbc = cbc, cbc_options = cbc_options )
 
     problem_status = pulp.LpStatus[prblm.status]
     dbg_print( "status = %s" % problem_status, verbose )
 
     if prblm.status != pulp.LpStatusOptimal:
-        return
+        return problem_status, None, ntwrk
     obj_value_1 = pulp.value( prblm.objective )
-    obj_value_2 = ntwrk.get_objective_value().value()
-    mtm_value_1 = ntwrk.get_mark_to_market_value().value()
     
     dbg_print( "objective = %.8f" % obj_value_1, verbose ) 
 
+    write_results( ntwrk, prblm, rslt_dir, verbose, profiler, binary_results, compresslevel )
+    
+    dbg_print( "... done.", verbose )
+    
+    return problem_status, obj_value_1, ntwrk
+    
+    
+def write_results(ntwrk, prblm, rslt_dir, verbose, profiler, binary_results=False, compresslevel=0):
+    """ Writes the results of network ntwrk solved to optimality
+    to folder rslt_dir: status, objective and mark-to-market
+    value, product and dispatch results and the results of
+    all entities. Called by L{run}.
+    
+    @param prblm: solved problem, see L{solve} and L{solve_sparse}
+    @type prblm: L{pulp.LpProblem}
+    
+    @param profiler: profiler recording phases (if enabled)
+    @type profiler: L{gnw.profiler.Profiler}
+    
+    @param binary_results: see L{main}
+    @type binary_results: L{bool}
+    
+    @param compresslevel: see L{main}
+    @type compresslevel: L{int} in [0, 9]
+    """
+    problem_status = pulp.LpStatus[prblm.status]
+    obj_value_1 = pulp.value( prblm.objective )
+    mtm_value_1 = ntwrk.get_mark_to_market_solution()
+    
     dbg_print( "writing results ...", verbose )
+    profiler.start( "write_results" )
     use_std_out = False
     file = sys.stdout
     
     if not use_std_out:
         fname = "%s/%s-%s-%s.%s" % (rslt_dir, prblm.name, ntwrk.name, "rslts", "txt")
-        file = open( fname, "w" )
+        file = open_results_file( fname, compresslevel )
     print >> file, ("%-s%s%-s%s") % ("status", ";", problem_status, ";")
     print >> file, ("%-s%s%.8f%s") % ("objval[1]", ";", obj_value_1, ";")
-#    print >> file, ("%-s%s%.8f%s") % ("objval[2]", ";", obj_value_2, ";")
     print >> file, ("%-s%s%.8f%s") % ("mtmval[1]", ";", mtm_value_1, ";")
     
     if not use_std_out:
         file.flush()
         file.close()
     
+    profiler.stop()
+    
     dbg_print( "... aggregated standard product and trade tranche results", verbose ) 
+    profiler.start( "write_product_results" )
     if not use_std_out:
         fname = "%s/%s-%s-%s.%s" % (rslt_dir, prblm.name, ntwrk.name, "product-rslts", "txt")
-        file = open( fname, "w" )
+        file = open_results_file( fname, compresslevel )
     write_product_results( ntwrk, prblm, file )
     if not use_std_out:
         file.flush()
         file.close()
+    profiler.stop()
 
     dbg_print( "... aggregated storage and standard product results", verbose )
+    profiler.start( "write_dispatch_results" )
     if not use_std_out:
         fname = "%s/%s-%s-%s.%s" % (rslt_dir, prblm.name, ntwrk.name, "dispatch-rslts", "txt")
-        file = open( fname, "w"  ) 
+        file = open_results_file( fname, compresslevel )
     write_dispatch_results( ntwrk, prblm, file )
     if not use_std_out:
         file.flush()
         file.close()
+    profiler.stop()
+
+    if binary_results:
+        fname = "%s/%s-%s-%s.%s" % (rslt_dir, prblm.name, ntwrk.name, "rslts", "bnd")
+        dbg_print( "... binary columnar results to '%s'" % fname, verbose )
+        profiler.call( "write_columnar_results",
+                       write_columnar_results, ntwrk, prblm, fname, mtm_value_1 )
 
 #===============================================================================
 #    dbg_print( "... all LP variable values", verbose )
@@ -173,17 +457,248 @@ def main(data_dir, result_dir, verbose=False):
 #===============================================================================
 
     dbg_print( "... write network results ...", verbose )
-    ntwrk.write_results( rslt_dir,
-                         basename = "%s-%s" % (prblm.name, ntwrk.name),
-                         extension = "txt",
-                         canonical = False,
-                         verbose = verbose,
-                         indent = 4 )
+    profiler.call( "write_network_results",
+                   ntwrk.write_results, rslt_dir,
+                   basename = "%s-%s" % (prblm.name, ntwrk.name),
+                   extension = "txt",
+                   canonical = False,
+                   verbose = verbose,
+                   indent = 4,
+                   compresslevel = compresslevel )
+
+
+def run_test(test, base_dir, options, conn):
+    """ Runs pre-configured test case test by calling L{main}
+    and sends the tuple (status, objective value, runtime,
+    error message) through connection conn. Executed in a
+    worker process by L{run_tests}. The worker becomes the
+    leader of a new process group, such that L{run_tests}
+    can terminate it together with the solver processes it
+    started.
     
-    dbg_print( "... done.", verbose )
+    @param test: name of test case, i.e., sub-folder of
+        <base_dir>/data/test
+    @type test: L{str}
+    
+    @param base_dir: existing absolute or relative path to
+        folder containing the 'data/test' folder
+    @type base_dir: L{str}
+    
+    @param options: keyword arguments of L{main}
+    @type options: L{dict}
+    
+    @param conn: sending end of a pipe
+    @type conn: L{multiprocessing.Connection}
+    """
+    if hasattr( os, "setsid" ):
+        os.setsid()
+    start = time.time()
+    try:
+        test_dir = "%s/data/test/%s/pulp" % (base_dir, test)
+        
+        data_dir = "%s/%s" % (test_dir, "data")
+        rslt_dir = "%s/%s" % (test_dir, "results")
+        
+        status, objective = main( data_dir, rslt_dir, **options )
+        conn.send( (status, objective, time.time() - start, None) )
+    except:
+        conn.send( ("Failed", None, time.time() - start,
+                    "error type: %s, error value: %s" % (sys.exc_info()[0], sys.exc_info()[1])) )
+    conn.close()
+    
+    
+def read_test_summary(fname):
+    """ Reads runtimes of a previous run from test
+    summary file fname as written by L{write_test_summary}.
+    
+    @param fname: summary file name
+    @type fname: L{str}
+    
+    @return: dictionary with test case names as keys
+        and runtimes in seconds as values. Empty if
+        file fname does not exist.
+    @rtype: L{dict}
+    """
+    durations = {}
+    if not os.path.isfile( fname ):
+        return durations
+    file = open( fname )
+    for line in file.readlines()[1:]:
+        row = line.strip().split( ";" )
+        if len( row ) > 3:
+            try:
+                durations[row[0]] = float( row[3] )
+            except ValueError:
+                pass
+    file.close()
+    return durations
+
+
+def write_test_summary(summary_list, file=sys.stdout, sep=";"):
+    """ Writes one header line and one line of test case name,
+    status, objective value and runtime for each element of
+    summary_list to file.
+    
+    @param summary_list: list of tuples (test, status, objective, runtime)
+    @type summary_list: L{list} of L{tuple}
+    """
+    print >> file, sep.join( ["test", "status", "objval", "runtime [s]"] ) + sep
+    for test, status, objective, runtime in summary_list:
+        print >> file, sep.join( ["%-s" % test,
+                                  "%-s" % status,
+                                  conditional( objective is None, "N/A", "%.8f" % (objective or 0.0) ),
+                                  "%.3f" % runtime] ) + sep
+        
+
+def run_tests(tests, base_dir, jobs=1, timeout=None, summary_fname=None, verbose=False, profile=False, read_jobs=1, cache_dir=None, binary_results=False, compresslevel=0, sparse=False, presolve=False, cbc=False, cbc_options=None, highs=False, lazy=False, preload=None):
+    """ Runs pre-configured test cases in up to jobs worker
+    processes. Test cases are started in order of decreasing
+    runtimes as recorded in summary file summary_fname by a
+    previous run (test cases without previous runtime first), so
+    that long running test cases do not end up being started last.
+    
+    @param tests: names of test cases, see L{run_test}
+    @type tests: L{list} of L{str}
+    
+    @param base_dir: see L{run_test}
+    @type base_dir: L{str}
+    
+    @param jobs: maximum number of worker processes running concurrently
+    @type jobs: L{int} > 0
+    
+    @param timeout: maximum runtime per test case in seconds, after which
+        the worker process, including the solver processes it started,
+        is terminated and the test case counted as failed. None for no
+        limit.
+    @type timeout: L{float} or None
+    
+    @param summary_fname: name of file that previous runtimes are read
+        from and the summary of this run is written to. None for
+        neither reading nor writing a summary file.
+    @type summary_fname: L{str} or None
     
-    del ntwrk
+    @param read_jobs: see L{main}
+    @type read_jobs: L{int} > 0
     
+    @param cache_dir: see L{main}
+    @type cache_dir: L{str} or None
+    
+    @param binary_results: see L{main}
+    @type binary_results: L{bool}
+    
+    @param compresslevel: see L{main}
+    @type compresslevel: L{int} in [0, 9]
+    
+    @param sparse: see L{main}
+    @type sparse: L{bool}
+    
+    @param presolve: see L{main}
+    @type presolve: L{bool}
+    
+    @param cbc: see L{main}
+    @type cbc: L{bool}
+    
+    @param cbc_options: see L{main}
+    @type cbc_options: L{list} of L{str} or None
+    
+    @param highs: see L{main}
+    @type highs: L{bool}
+    
+    @param lazy: see L{main}
+    @type lazy: L{bool}
+    
+    @param preload: see L{main}
+    @type preload: L{list} of L{str} or None
+    
+    @return: number of test cases that failed or timed out
+    @rtype: L{int}
+    """
+    durations = {}
+    if summary_fname is not None:
+        durations = read_test_summary( summary_fname )
+    
+    pending = list( tests )
+    pending.sort( key = lambda test : -durations.get( test, float( "inf" ) ) )
+    
+    options = dict( verbose = verbose,
+                    profile = profile,
+                    read_jobs = read_jobs,
+                    cache_dir = cache_dir,
+                    binary_results = binary_results,
+                    compresslevel = compresslevel,
+                    sparse = sparse,
+                    presolve = presolve,
+                    cbc = cbc,
+                    cbc_options = cbc_options,
+                    highs = highs,
+                    lazy = lazy,
+                    preload = preload )
+    
+    num_tests = len( tests )
+    cur_test = 0
+    tests_failed = 0
+    
+    running = {}    # test name -> (process, receiving connection, start time)
+    results = {}    # test name -> (status, objective, runtime)
+    while pending or running:
+        while pending and len( running ) < jobs:
+            test = pending.pop( 0 )
+            cur_test += 1
+            dbg_print( "running test '%s' (%d of %d) ..." % (test, cur_test, num_tests), True )
+            recv_conn, send_conn = multiprocessing.Pipe( False )
+            process = multiprocessing.Process( target = run_test,
+                                               args = (test, base_dir, options, send_conn) )
+            process.start()
+            send_conn.close()
+            running[test] = (process, recv_conn, time.time())
+        
+        time.sleep( 0.1 )
+        for test, (process, recv_conn, start) in running.items():
+            error = None
+            message = None
+            if recv_conn.poll():
+                try:
+                    message = recv_conn.recv()
+                except EOFError:
+                    # poll() is True at end of file as well, i.e., if the
+                    # worker died without sending (e.g., killed or crashed)
+                    process.join()
+            if message is not None:
+                status, objective, runtime, error = message
+            elif not process.is_alive():
+                status, objective, runtime, error = "Failed", None, time.time() - start, "worker process exited with code %s" % process.exitcode
+            elif timeout is not None and time.time() - start > timeout:
+                # the worker leads its own process group (see run_test),
+                # terminate solver processes it started as well
+                try:
+                    os.killpg( process.pid, signal.SIGTERM )
+                except (AttributeError, OSError):
+                    process.terminate()
+                status, objective, runtime, error = "Timeout", None, time.time() - start, "terminated after %.0f seconds" % timeout
+            else:
+                continue
+            
+            process.join()
+            recv_conn.close()
+            del running[test]
+            results[test] = (status, objective, runtime)
+            
+            if error is not None:
+                tests_failed += 1
+                dbg_print( "test '%s' failed!" % test, True )
+                dbg_print( error, True )
+            else:
+                dbg_print( "test '%s' finished (status = %s, %.1f seconds)" % (test, status, runtime), True )
+    
+    summary_list = [(test,) + results[test] for test in tests]
+    write_test_summary( summary_list )
+    if summary_fname is not None:
+        file = open( summary_fname, "w" )
+        write_test_summary( summary_list, file )
+        file.flush()
+        file.close()
+    
+    return tests_failed
     
     
 if __name__ == "__main__":
@@ -208,12 +723,115 @@ if __name__ == "__main__":
                        "'-i'/'--input' and  '-o'/'--output', respectively) "
                        "and runs internally pre-configured test cases instead "
                        "[default=%default]" )
+    parser.add_option( "-p", "--profile",
+                       dest="profile", action="store_true", default=False,
+                       help="record wall clock time, cpu time and peak memory "
+                       "usage of each phase and entity and write them to "
+                       "file 'gnw-ntwrk-profile.txt' in the output folder "
+                       "[default=%default]" )
+    parser.add_option( "-j", "--jobs",
+                       dest="jobs", type="int", default=1,
+                       help="run internally pre-configured test cases (see "
+                       "option '-x'/'--exclude-dirs') in up to JOBS worker "
+                       "processes [default=%default]",
+                       metavar="JOBS" )
+    parser.add_option( "--timeout",
+                       dest="timeout", type="float", default=None,
+                       help="terminate internally pre-configured test cases "
+                       "running longer than SECS seconds [default=no limit]",
+                       metavar="SECS" )
+    parser.add_option( "-r", "--read-jobs",
+                       dest="read_jobs", type="int", default=1,
+                       help="read input files of individual entities in up "
+                       "to JOBS threads concurrently [default=%default]",
+                       metavar="JOBS" )
+    parser.add_option( "--cache-dir",
+                       dest="cache_dir", default=None,
+                       help="keep parsed input data in folder CACHE and "
+                       "skip reading input files that have not changed "
+                       "since the previous run [default=no cache]",
+                       metavar="CACHE" )
+    parser.add_option( "-b", "--bundle",
+                       dest="bundle", default=None,
+                       help="convert input read from folder DATA (see "
+                       "option '-i'/'--input') into bundle file BUNDLE and "
+                       "exit. Bundle files can be given instead of folder "
+                       "DATA [default=%default]",
+                       metavar="BUNDLE" )
+    parser.add_option( "--binary-results",
+                       dest="binary_results", action="store_true", default=False,
+                       help="additionally write results in binary columnar "
+                       "form to file 'gnw-ntwrk-rslts.bnd' in the output "
+                       "folder [default=%default]" )
+    parser.add_option( "-z", "--compress",
+                       dest="compresslevel", type="int", default=0,
+                       help="write text result files compressed using gzip "
+                       "with compression level LEVEL in [1, 9] to files "
+                       "with the same names with '.gz' appended, 0 for "
+                       "uncompressed text files [default=%default]",
+                       metavar="LEVEL" )
+    parser.add_option( "-s", "--sparse",
+                       dest="sparse", action="store_true", default=False,
+                       help="assemble the model as sparse matrix and solve "
+                       "it with the local CBC solver (or HiGHS, see option "
+                       "'--highs') rather than through a pulp problem "
+                       "[default=%default]" )
+    parser.add_option( "--presolve",
+                       dest="presolve", action="store_true", default=False,
+                       help="substitute constraints over a single variable "
+                       "by bounds and fold fixed variables into constants "
+                       "before solving [default=%default]" )
+    parser.add_option( "--cbc",
+                       dest="cbc", action="store_true", default=False,
+                       help="solve the pulp problem with the local CBC solver "
+                       "rather than by the Xpress service, using the same "
+                       "options as for sparse models (see option "
+                       "'--cbc-options') [default=%default]" )
+    parser.add_option( "--cbc-options",
+                       dest="cbc_options", default="",
+                       help="pass the blank separated command line options "
+                       "OPTS to CBC whenever it is used (see options "
+                       "'-s'/'--sparse' and '--cbc'). CBC is always run "
+                       "with options 'cuts off', which OPTS may override "
+                       "[default=none]",
+                       metavar="OPTS" )
+    parser.add_option( "--highs",
+                       dest="highs", action="store_true", default=False,
+                       help="solve sparse models (see option '-s'/'--sparse') "
+                       "in-process by the HiGHS library rather than by the "
+                       "local CBC solver [default=%default]" )
+    parser.add_option( "-l", "--lazy",
+                       dest="lazy", action="store_true", default=False,
+                       help="read the input files of individual entities "
+                       "only when the entities are created, ignored if "
+                       "option '--cache-dir' is given [default=%default]" )
+    parser.add_option( "--preload",
+                       dest="preload", default="",
+                       help="read the input files of the entity groups "
+                       "given by the comma separated data dictionary keys "
+                       "GROUPS (e.g. 'TRN_DICT_LIST,PRD_DICT_LIST') up front "
+                       "in up to JOBS threads (see option '-r'/'--read-jobs'), "
+                       "implies option '-l'/'--lazy' [default=none]",
+                       metavar="GROUPS" )
+    parser.add_option( "--scenario",
+                       dest="scenario_dirs", action="append", default=[],
+                       help="once done with folder DATA, run the scenario "
+                       "with inputs read from folder SCEN and write output "
+                       "to sub-folder RSLT/<name of SCEN>. Storages, "
+                       "suppliers and firm profiles whose input files did "
+                       "not change since the previous run are reused "
+                       "rather than read and created again. May be given "
+                       "more than once to run scenarios one after another "
+                       "[default=none]",
+                       metavar="SCEN" )
     parser.add_option( "-t", "--test-list",
                        dest="testlist", action="store_true", default=False,
                        help="list names of internally pre-configured test cases "
                        "[default=%default]" )
     
     (options, args) = parser.parse_args()
+    if options.compresslevel not in range( 10 ):
+        parser.error( "option -z/--compress: LEVEL needs to be in [0, 9]" )
     
     tests = []
 
@@ -308,27 +926,31 @@ if __name__ == "__main__":
         file.close()
         sys.exit( 0 )
     
+    if options.bundle is not None:
+        write_coeffs_bundle( options.data_dir, options.bundle, jobs = max( options.read_jobs, 1 ) )
+        sys.exit( 0 )
+    
     if options.exclude:
-        num_tests = len( tests )
-        cur_test = 0
-        tests_failed = 0
-        
         base_dir = ".."
-        for test in tests:
-            try:
-                cur_test += 1
-                
-                dbg_print( "running test '%s' (%d of %d) ..." % (test, cur_test, num_tests), True )
-                test_dir = "%s/data/test/%s/pulp" % (base_dir, test)
-                
-                data_dir = "%s/%s" % (test_dir, "data")
-                rslt_dir = "%s/%s" % (test_dir, "results")
-                
-                main( data_dir, rslt_dir, options.verbose )
-            except:
-                tests_failed += 1
-                dbg_print( "test '%s' failed!" % test, True )
-                dbg_print( "error type: %s, error value: %s" % (sys.exc_info()[1], sys.exc_info()[2]), True )
+        summary_fname = "%s/data/test/%s-%s.%s" % (base_dir, "gnw", "test-summary", "txt")
+        tests_failed = run_tests( tests,
+                                  base_dir,
+                                  jobs = max( options.jobs, 1 ),
+                                  timeout = options.timeout,
+                                  summary_fname = summary_fname,
+                                  verbose = options.verbose,
+                                  profile = options.profile,
+                                  read_jobs = max( options.read_jobs, 1 ),
+                                  cache_dir = options.cache_dir,
+                                  binary_results = options.binary_results,
+                                  compresslevel = options.compresslevel,
+                                  sparse = options.sparse,
+                                  presolve = options.presolve,
+                                  cbc = options.cbc,
+                                  cbc_options = options.cbc_options.split() or None,
+                                  highs = options.highs,
+                                  lazy = options.lazy or bool( options.preload ),
+                                  preload = conditional( options.preload, options.preload.split( "," ), None ) )
         dbg_print( "... done", True )
         
         sys.exit( -tests_failed )
@@ -337,7 +959,22 @@ if __name__ == "__main__":
         data_dir = options.data_dir
         rslt_dir = options.rslt_dir
     
-        main( data_dir, rslt_dir, options.verbose )
+        main( data_dir,
+              rslt_dir,
+              verbose = options.verbose,
+              profile = options.profile,
+              read_jobs = max( options.read_jobs, 1 ),
+              cache_dir = options.cache_dir,
+              binary_results = options.binary_results,
+              compresslevel = options.compresslevel,
+              sparse = options.sparse,
+              presolve = options.presolve,
+              cbc = options.cbc,
+              cbc_options = options.cbc_options.split() or None,
+              highs = options.highs,
+              lazy = options.lazy or bool( options.preload ),
+              preload = conditional( options.preload, options.preload.split( "," ), None ),
+              scenario_dir_list = options.scenario_dirs )
         sys.exit( 0 )
     except:
         sys.exit( -1 )
@@ -24,13 +24,15 @@ __very_large_positive_number__ = 1.0e6 # 1 Mio MW capacity
 #__debugging__ = 1   # set this to 0 for production deployments
 __debugging__ = 0   # set this to 0 for production deployments
 
-__all__ = ["constraint",
+__all__ = ["bundle",
+           "constraint",
            "container_entity",
            "dispatch_product_factory",
            "dispatch_product",
            "entity",
            "firm_profile_factory",
            "firm_profile",
+           "lp_var_registry",
            "market_factory",
            "market",
            "mosel",
@@ -40,14 +42,18 @@ __all__ = ["constraint",
            "network",
            "product_factory",
            "product",
+           "profiler",
            "pulp_patches",
            "reader",
            "solver_check",
            "solver_factory",
+           "sparse_model",
+           "sparse_solver",
            "storage_factory",
            "storage",
            "supplier_factory",
            "supplier",
+           "time_grid",
            "tranche_factory",
            "tranche",
            "util",
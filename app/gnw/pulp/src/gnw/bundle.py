@@ -0,0 +1,253 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: Facilitates writing and reading of problem data to and from
+a single bundle file, as an alternative to the folder of
+initialisation text files read by L{gnw.reader.read_coeffs}.
+
+A bundle file consists of
+    - a fixed size preamble holding the magic string L{bundle_magic},
+      the format version and the length of the header,
+    - the header, i.e., the data dictionary written as JSON text, in
+      which all numeric arrays are replaced by section entries
+      {L{section_key} : [offset, dtype, shape]} indexing their data,
+      and any other arrays by entries {L{array_key} : [dtype, values]},
+    - the array sections holding the raw little-endian data of
+      the numeric arrays, each aligned to L{section_alignment} bytes.
+On loading, the file is memory-mapped once and the arrays are
+created as (read-only) views into the mapped array sections.
+Strings are read back as L{str}, tuples as lists. Other than
+pickled data, the header cannot create objects of arbitrary types.
+"""
+import mmap
+import struct
+import json
+import numpy
+
+bundle_magic = "GNWBNDL\0"
+bundle_version = 2
+section_alignment = 64
+
+# magic string, format version, header length
+preamble_fmt = "<8sIQ"
+
+# keys of the header entries replacing arrays, where offset is the
+# offset of the array section in bytes relative to the first array
+# section and dtype is the little-endian numpy dtype as given by
+# numpy.dtype.str, or numpy.dtype.descr for structured arrays
+section_key = "__bundle_section__"
+array_key = "__bundle_array__"
+
+# encoding of the strings of the header, mapping each byte of a
+# L{str} to a single character and back
+header_encoding = "latin-1"
+
+
+def get_little_endian_dtype(dtype):
+    """
+    @return: dtype with all (field) byte orders set to little-endian
+    @rtype: L{numpy.dtype}
+    """
+    return dtype.newbyteorder( "<" )
+
+
+def is_section_array(value):
+    """
+    @return: whether value is stored in an array section, i.e., is
+        a non-empty numpy array without object (fields)
+    @rtype: L{bool}
+    """
+    return isinstance( value, numpy.ndarray ) \
+        and value.size > 0 \
+        and not value.dtype.hasobject
+
+
+def write_bundle(fname, data_dict):
+    """
+    Writes data dictionary to bundle file fname.
+
+    @param fname: bundle file name
+    @type fname: L{str}
+
+    @param data_dict: data dictionary as returned by L{gnw.reader.read_coeffs}
+    @type data_dict: L{dict}
+    """
+    section_list = []
+    def create_index(value, offset):
+        if isinstance( value, dict ):
+            index = {}
+            for k, v in value.iteritems():
+                index[k], offset = create_index( v, offset )
+            return index, offset
+        if isinstance( value, (list, tuple) ):
+            index = []
+            for v in value:
+                v, offset = create_index( v, offset )
+                index.append( v )
+            return index, offset
+        if is_section_array( value ):
+            array = numpy.ascontiguousarray( value, dtype=get_little_endian_dtype( value.dtype ) )
+            section_list.append( (offset, array) )
+            section = {section_key : [offset, get_dtype_index( array.dtype ), array.shape]}
+            return section, offset + array.nbytes + get_padding( array.nbytes )
+        if isinstance( value, numpy.ndarray ):
+            return {array_key : [get_dtype_index( value.dtype ), value.tolist()]}, offset
+        return value, offset
+
+    index = create_index( data_dict, 0 )[0]
+    header = json.dumps( index, encoding=header_encoding, separators=(",", ":") )
+
+    file = open( fname, "wb" )
+    try:
+        file.write( struct.pack( preamble_fmt, bundle_magic, bundle_version, len( header ) ) )
+        file.write( header )
+        file.write( "\0"*get_padding( file.tell() ) )
+        start = file.tell()
+        for offset, array in section_list:
+            file.write( "\0"*(start + offset - file.tell()) )
+            file.write( array.tostring() )
+    finally:
+        file.close()
+
+
+def read_bundle(fname):
+    """
+    Reads data dictionary from bundle file fname. Numeric
+    arrays are read-only views into the memory-mapped file.
+
+    @param fname: bundle file name
+    @type fname: L{str}
+
+    @return: data dictionary as returned by L{gnw.reader.read_coeffs}
+    @rtype: L{dict}
+
+    @raise ValueError: fname is not a bundle file of supported version
+    """
+    file = open( fname, "rb" )
+    try:
+        preamble = file.read( struct.calcsize( preamble_fmt ) )
+        if len( preamble ) != struct.calcsize( preamble_fmt ):
+            raise ValueError, "read_bundle: '%s' is not a bundle file" % fname
+        magic, version, header_len = struct.unpack( preamble_fmt, preamble )
+        if magic != bundle_magic:
+            raise ValueError, "read_bundle: '%s' is not a bundle file" % fname
+        if version != bundle_version:
+            raise ValueError, "read_bundle: '%s' has unsupported version %d" % (fname, version)
+        index = json.loads( file.read( header_len ), encoding=header_encoding )
+        start = len( preamble ) + header_len
+        start += get_padding( start )
+        if start < get_file_size( file ):
+            data = mmap.mmap( file.fileno(), 0, access=mmap.ACCESS_READ )
+        else:
+            data = None
+    finally:
+        file.close()
+
+    def create_value(value):
+        if isinstance( value, unicode ):
+            return value.encode( header_encoding )
+        if isinstance( value, list ):
+            return [create_value( v ) for v in value]
+        if not isinstance( value, dict ):
+            return value
+        value = dict( [(create_value( k ), create_value( v )) for k, v in value.iteritems()] )
+        if section_key in value:
+            offset, dtype, shape = value[section_key]
+            dtype = create_dtype( dtype )
+            count = int( numpy.prod( shape ) )
+            return numpy.frombuffer( data, dtype=dtype, count=count, offset=start + offset ).reshape( shape )
+        if array_key in value:
+            dtype, values = value[array_key]
+            dtype = create_dtype( dtype )
+            if dtype.names is not None:
+                # records are given as lists
+                values = [tuple( v ) for v in values]
+            return numpy.array( values, dtype=dtype )
+        return value
+
+    return create_value( index )
+
+
+def get_dtype_index(dtype):
+    """
+    @return: dtype as written to the header, i.e., numpy.dtype.str,
+        or numpy.dtype.descr for structured arrays
+    @rtype: L{str} or L{list} of L{tuple}
+    """
+    if dtype.names is None:
+        return dtype.str
+    return dtype.descr
+
+
+def create_dtype(dtype):
+    """
+    @param dtype: dtype as read from the header, see L{get_dtype_index}
+    @type dtype: L{str} or L{list} of L{list}
+
+    @return: numpy dtype
+    @rtype: L{numpy.dtype}
+    """
+    if isinstance( dtype, str ):
+        return numpy.dtype( dtype )
+    # numpy expects the fields of a descr as tuples (name, dtype[, shape])
+    field_list = []
+    for field in dtype:
+        field = [field[0], create_dtype( field[1] )] + [tuple( shape ) for shape in field[2:]]
+        field_list.append( tuple( field ) )
+    return numpy.dtype( field_list )
+
+
+def is_bundle(fname):
+    """
+    @return: whether fname is a bundle file
+    @rtype: L{bool}
+    """
+    try:
+        file = open( fname, "rb" )
+    except IOError:
+        return False
+    try:
+        return file.read( len( bundle_magic ) ) == bundle_magic
+    finally:
+        file.close()
+
+
+def get_padding(offset):
+    """
+    @return: number of bytes required to align offset to L{section_alignment}
+    @rtype: L{int}
+    """
+    return -offset % section_alignment
+
+
+def get_file_size(file):
+    """
+    @return: size of open file in bytes
+    @rtype: L{int}
+    """
+    file.seek( 0, 2 )
+    return file.tell()
+
+
+
+if __name__ == "__main__":
+    print "gnw.bundle.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -792,7 +792,8 @@ class COM_Network( COM_Entity ):
         all LP variables, by setting up LP model,
         creating a L{pulp.LpProblem} and initialising
         it with the combined objective function and
-        all constraints of all entities. And
+        all constraints of all entities (see
+        L{gnw.network.Network.populate}). And
         solves the problem using the solver 
         setup with in L{gnw.com.network.COM_Network.set_solver}
         or using pulp's default solver.
@@ -809,11 +810,7 @@ class COM_Network( COM_Entity ):
 
             prblm_name = "gnw"
             self.problem = pulp.LpProblem( prblm_name, pulp.LpMaximize )
-            self.problem += self.gnw.get_objective()
-
-            constraint_list = self.gnw.get_constraints()
-            for constraint in constraint_list:
-                self.problem += constraint 
+            self.gnw.populate( self.problem )
 
             if __debugging__:
                 fname = "%s/%s-%s-%d.%s" % ("c:/temp", self.problem.name, "network", len( self.gnw.DISPATCH_PERIOD ), "lp")
@@ -887,7 +884,7 @@ class COM_Network( COM_Entity ):
         """
         try:
             if self.get_solver_status() == pulp.LpStatusOptimal:
-                return self.gnw.get_mark_to_market_value().value()
+                return self.gnw.get_mark_to_market_solution()
             else:
                 return 0.0
 
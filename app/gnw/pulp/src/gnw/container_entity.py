@@ -39,6 +39,17 @@ class ContainerEntity( Entity ):
         of sub-classes of L{gnw.entity.Entity} and lists
         of corresponding object instance references as
         values.
+    
+    @ivar entity_list_cache: dictionary holding the lists
+        returned by L{get_entity_list} with the classinfo
+        used as filter as key. Emptied by L{add_entity}.
+    @type entity_list_cache: L{dict}
+    
+    @ivar entity_name_dict: dictionary holding lists of
+        (classinfo, object instance reference) tuples
+        with the entity names as keys, None if it has to be
+        rebuilt by L{get_entity} after a call to L{add_entity}.
+    @type entity_name_dict: None or L{dict}
     """
     def __init__(self, name,
                  entityTypeList=[],
@@ -105,6 +116,8 @@ class ContainerEntity( Entity ):
             lead to undesired results/side effects. 
         """
         self.entity_list_dict = {}
+        self.entity_list_cache = {}
+        self.entity_name_dict = None
         for entity_type in entityTypeList:
             if not issubclass( entity_type, Entity ):
                 raise TypeError, "Entity type '%s' is not a sub-class of of gnw.entity.Entity" % entity_type
@@ -139,7 +152,16 @@ class ContainerEntity( Entity ):
             classinfo.
         @type classinfo: classinfo or tuple of
             classinfo elements
+        
+        @note: the list is computed once per classinfo
+            and shared between callers until the next call
+            to L{add_entity}, i.e., callers must not modify it.
         """
+        try:
+            return self.entity_list_cache[classinfo]
+        except KeyError:
+            pass
+
         if not issubclass(classinfo, Entity):
             raise TypeError, "parameter 'classinfo' not  a (sub-class of) 'Entity' class"
 
@@ -147,13 +169,15 @@ class ContainerEntity( Entity ):
         for k,v in self.entity_list_dict.iteritems():
             if issubclass( k, classinfo ):
                 entity_list += v
+        self.entity_list_cache[classinfo] = entity_list
         return entity_list
 
 
     def add_entity(self, item):
         """
         Adds item to entity list corresponding to
-        item's instance type.
+        item's instance type and invalidates
+        entity_list_cache and entity_name_dict.
         
         @param item: class instance reference 
         @type item: (direct or indirect)
@@ -166,6 +190,8 @@ class ContainerEntity( Entity ):
         for k,v in self.entity_list_dict.iteritems():
             if isinstance( item, k ):
                 v.append( item )
+                self.entity_list_cache = {}
+                self.entity_name_dict = None
                 return
 
         raise TypeError, "Given item (%s) is not one of the admissible instance types" % item 
@@ -192,11 +218,15 @@ class ContainerEntity( Entity ):
         if not issubclass( classinfo, Entity ):
             raise TypeError, "parameter 'classinfo' not  a (sub-class of) 'Entity' class"
         
-        for k,v in self.entity_list_dict.iteritems():
-            if issubclass( k, classinfo ):
+        if self.entity_name_dict is None:
+            self.entity_name_dict = {}
+            for k,v in self.entity_list_dict.iteritems():
                 for e in v:
-                    if name == e.name:
-                        return e
+                    self.entity_name_dict.setdefault( e.name, [] ).append( (k, e) )
+        
+        for k,e in self.entity_name_dict.get( name, [] ):
+            if issubclass( k, classinfo ):
+                return e
         return None   
 
 
@@ -216,6 +246,36 @@ class ContainerEntity( Entity ):
             item.set_DISPATCH_PERIOD( value )
 
 
+    def set_TIME_GRID(self, value):
+        """
+        Sets time grid in super class and
+        calls L{set_TIME_GRID} on
+        all L{gnw.entity.Entity} sub-class
+        instances contained in entity_list_dict.
+        
+        @param value: time grid
+        @type value: L{gnw.time_grid.TimeGrid}
+        """
+        super( ContainerEntity, self ).set_TIME_GRID( value )
+        for item in self.get_entity_list():
+            item.set_TIME_GRID( value )
+
+
+    def set_LP_VAR_REGISTRY(self, value):
+        """
+        Sets lp variable registry in super class and
+        calls L{set_LP_VAR_REGISTRY} on
+        all L{gnw.entity.Entity} sub-class
+        instances contained in entity_list_dict.
+        
+        @param value: lp variable registry
+        @type value: L{gnw.lp_var_registry.LpVarRegistry}
+        """
+        super( ContainerEntity, self ).set_LP_VAR_REGISTRY( value )
+        for item in self.get_entity_list():
+            item.set_LP_VAR_REGISTRY( value )
+
+
     def create_lp_vars(self, prefix=""):
         """
         Creates lp variables in super class and
@@ -281,15 +341,46 @@ class ContainerEntity( Entity ):
         """
         Returns list of constraints of 
         self including constraints of all entities
-        it contains.
+        it contains. The list is newly created
+        by each call, see L{iter_constraints}.
         
         @return: list of constraints
         @rtype: L{list} of L{pulp.LpConstraint}
         """
-        constraints = super( ContainerEntity, self ).get_constraints()
+        return list( self.iter_constraints() )
+
+
+    def iter_constraints(self):
+        """
+        Generator yielding the constraints of self
+        followed by the constraints of all entities
+        it contains, walking the entity tree
+        (see L{iter_entities}) without copying or
+        modifying any constraint list.
+        
+        @return: iterator over constraints
+        @rtype: iterator of L{pulp.LpConstraint}
+        """
+        for entity in self.iter_entities():
+            for constraint in entity.constraint_list:
+                yield constraint
+
+
+    def iter_entities(self):
+        """
+        Generator yielding self and, recursively, all
+        entities it contains in depth-first pre-order.
+        
+        @return: iterator over entities
+        @rtype: iterator of L{gnw.entity.Entity}
+        """
+        yield self
         for item in self.get_entity_list():
-            constraints += item.get_constraints()
-        return constraints
+            if isinstance( item, ContainerEntity ):
+                for entity in item.iter_entities():
+                    yield entity
+            else:
+                yield item
 
     
     def get_objective_value(self):
@@ -322,7 +413,27 @@ class ContainerEntity( Entity ):
         return mtm
 
 
-    def write_results(self, rslt_dir, basename, extension="txt", canonical=False, sep=";", verbose=False, indent=0):
+    def get_mark_to_market_terms(self):
+        """
+        Returns the constant and the terms of the mark
+        to market value of entity and all entities it
+        contains (see L{gnw.entity.Entity.get_mark_to_market_terms}).
+        
+        @return: constant, solution value arrays and
+            coefficient arrays
+        @rtype: L{tuple} of (L{float}, L{list} of L{numpy.array},
+            L{list} of L{numpy.array})
+        """
+        constant, value_list, coeff_list = super( ContainerEntity, self ).get_mark_to_market_terms()
+        for item in self.get_entity_list():
+            item_constant, item_value_list, item_coeff_list = item.get_mark_to_market_terms()
+            constant += item_constant
+            value_list += item_value_list
+            coeff_list += item_coeff_list
+        return constant, value_list, coeff_list
+
+
+    def write_results(self, rslt_dir, basename, extension="txt", canonical=False, sep=";", verbose=False, indent=0, compresslevel=0):
         """
         Writes results of self to file with filename
         derived from parameters rslt_dir, basename, and extension
@@ -362,6 +473,10 @@ class ContainerEntity( Entity ):
         
         @param indent: indentation of progress messages in number of characters.
         @type indent: L{int}     
+        
+        @param compresslevel: gzip compression level, see
+            L{gnw.entity.Entity.write_results}
+        @type compresslevel: L{int} in [0, 9]
         """
         super( ContainerEntity, self).write_results( rslt_dir,
                                                      basename = basename,
@@ -369,7 +484,8 @@ class ContainerEntity( Entity ):
                                                      canonical = canonical,
                                                      sep = sep,
                                                      verbose = verbose,
-                                                     indent = indent )
+                                                     indent = indent,
+                                                     compresslevel = compresslevel )
         
         indent += 4
         dbg_print( "%s... entities of '%s'" % (" "*indent, self.name) , verbose )
@@ -383,7 +499,8 @@ class ContainerEntity( Entity ):
                                   canonical = canonical,
                                   sep = sep,
                                   verbose = verbose,
-                                  indent = indent + 4 )
+                                  indent = indent + 4,
+                                  compresslevel = compresslevel )
 
 
 if __name__ == "__main__" :
@@ -264,8 +264,8 @@ class DispatchProduct( Entity ):
 
         nSteps = len( self.DISPATCH_PERIOD )
 
-        self.pos = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_pos", range( nSteps ), lowBound = 0.0 ) )
-        self.vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_vol", range( nSteps ) ) )
+        self.create_lp_var_block( "pos", prefix + self.name + "_pos", nSteps, lowBound = 0.0 )
+        self.create_lp_var_block( "vol", prefix + self.name + "_vol", nSteps )
 
 
     def create_model(self, prefix=""):
@@ -292,6 +292,36 @@ class DispatchProduct( Entity ):
         self.objective_list.append( self.get_objective_value() )
 
 
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the rows and
+        objective terms of the dispatch product model (see
+        L{create_model}) to model as blocks of column indices.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        super( DispatchProduct, self ).create_model( prefix )
+        
+        vol = self.get_lp_var_indices( "vol" )
+        pos = self.get_lp_var_indices( "pos" )
+        
+        DP = numpy.asarray( self.DISPATCH_PERIOD, dtype='double' )
+        CUR = numpy.asarray( self.CURRENT_POSITION, dtype='double' )
+        DF = numpy.asarray( self.DISCOUNT_FACTOR, dtype='double' )
+        
+        # vol[t] == (pos[t] + CURRENT_POSITION[t])*DISPATCH_PERIOD[t]
+        model.add_rows( self, numpy.column_stack( (vol, pos) ), numpy.column_stack( (numpy.ones_like( DP ), -DP) ), model.EQ, CUR*DP )
+        
+        model.add_objective( pos, self.SB*numpy.asarray( self.PRICE, dtype='double' )*DP*DF,
+                             self.SB*(CUR*numpy.asarray( self.MID_PRICE, dtype='double' )*DP*DF).sum() )
+
+
     def get_lp_vars(self):
         """
         This method returns a list containing all
@@ -343,11 +373,11 @@ class DispatchProduct( Entity ):
                          'pos' :                FmtDictEntry( [ self.ffmt ],
                                                               'pos[t] [MW]',
                                                               1, (nSteps,), True,
-                                                              self.pos ),
+                                                              self.get_lp_var_solution( "pos" ) ),
                          'vol' :                FmtDictEntry( [ self.ffmt ],
                                                               'vol[t] [MWh]',
                                                               1, (nSteps,), True,
-                                                              self.vol )})
+                                                              self.get_lp_var_solution( "vol" ) )})
 
         super( DispatchProduct, self ).update_fmt_dict( fmt_dict )
 
@@ -359,7 +389,7 @@ class DispatchProduct( Entity ):
         """
         nSteps = len( self.DISPATCH_PERIOD )
 
-        volume = [-self.SB*self.vol[t].varValue for t in xrange( nSteps )]
+        volume = (-self.SB*self.get_lp_var_solution( "vol" )).tolist()
         cashflow = [-self.PRICE[t]*volume[t] for t in xrange( nSteps )]
 
         return (volume, cashflow)
@@ -402,6 +432,28 @@ class DispatchProduct( Entity ):
         return mtm
 
 
+    def get_mark_to_market_terms(self):
+        """
+        Returns the constant and the terms of the mark to
+        market value (see
+        L{gnw.entity.Entity.get_mark_to_market_terms}).
+        
+        @return: constant, solution value arrays and
+            coefficient arrays
+        @rtype: L{tuple} of (L{float}, L{list} of L{numpy.array},
+            L{list} of L{numpy.array})
+        """
+        constant, value_list, coeff_list = super( DispatchProduct, self ).get_mark_to_market_terms()
+
+        nSteps = len( self.DISPATCH_PERIOD )
+        value_list.append( self.get_lp_var_solution( "pos" ) )
+        coeff_list.append( self.MID_PRICE[:nSteps]*self.DISPATCH_PERIOD[:nSteps]*self.DISCOUNT_FACTOR[:nSteps]*self.SB )
+        # summed one period after the other, like pulp.lpSum
+        constant += self.SB*sum( self.CURRENT_POSITION[:nSteps]*self.MID_PRICE[:nSteps]*self.DISPATCH_PERIOD[:nSteps]*self.DISCOUNT_FACTOR[:nSteps], 0.0 )
+
+        return constant, value_list, coeff_list
+
+
 
 if __name__ == "__main__":
     print "gnw.dispatch_product.py"
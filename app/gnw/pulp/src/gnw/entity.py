@@ -19,12 +19,17 @@ import numpy
 import pulp
 
 from gnw.constraint import ConstraintCoeff
+from gnw.time_grid import TimeGrid
+from gnw.lp_var_registry import LpVarRegistry
 
 from gnw.util import conditional
 from gnw.util import isint
 from gnw.util import isnumeric
 from gnw.util import issequence
+from gnw.util import isrecord
 from gnw.util import dbg_print
+from gnw.util import format_print_lines
+from gnw.util import open_results_file
 
 from gnw.named_item import NamedItem, NamedItemAttr, NamedItemData
 from gnw.named_item import ni_type_float
@@ -76,6 +81,24 @@ class Entity( object ):
         term. This array defines the optimisation horizon.
     @type DISPATCH_PERIOD: L{numpy.array} of positive L{float}
         elements (using dtype='double').
+    
+    @ivar TIME_GRID: time grid shared with the network the
+        entity belongs to, or created from the entity's
+        own dispatch periods and discount factors, see
+        L{get_TIME_GRID}
+    @type TIME_GRID: L{gnw.time_grid.TimeGrid} or None
+    
+    @ivar LP_VAR_REGISTRY: lp variable registry shared with the
+        network the entity belongs to, or the entity's own
+        registry, see L{get_LP_VAR_REGISTRY}
+    @type LP_VAR_REGISTRY: L{gnw.lp_var_registry.LpVarRegistry}
+        or None
+    
+    @ivar lp_var_block_dict: dictionary holding the registry
+        block identifiers of the entity's lp variable (arrays)
+        with the attribute names as keys, see
+        L{create_lp_var_block}
+    @type lp_var_block_dict: L{dict}
     """
     sfmt="%-s"
     ffmt="%.8f"
@@ -98,6 +121,10 @@ class Entity( object ):
 
         self.CONSTRAINT_COEFF = numpy.empty( 0, dtype='object' )
         self.DISPATCH_PERIOD = numpy.empty( 0, dtype='double' )
+        self.TIME_GRID = None
+
+        self.LP_VAR_REGISTRY = None
+        self.lp_var_block_dict = {}
 
         self.fmt_dict = dict()
 
@@ -113,7 +140,13 @@ class Entity( object ):
             the type of the referenced member_array variable
             will be L{numpy.array} of type dtype. If
             a list or a array is passed the expected length
-            must match the length of L{size}.
+            must match the length of L{size}. Arrays are
+            copied, as they may be views of input data shared
+            with other entities (see L{gnw.reader}), except
+            read-only arrays of dtype='double', i.e., the
+            arrays of a L{gnw.time_grid.TimeGrid}, which are
+            shared by reference (see
+            L{gnw.time_grid.TimeGrid.share_array}).
             If member_array is only a atomic variable (i.e.,
             issequence(member_array) = False)
             then member_array is initialised to an array of
@@ -138,6 +171,10 @@ class Entity( object ):
         if isinstance( member_array, numpy.ndarray ):
             if len( member_array ) != size:
                 raise TypeError, message
+            elif numpy.dtype( dtype ) == numpy.double:
+                member_array = TimeGrid.share_array( member_array )
+            else:
+                member_array = numpy.array( member_array, dtype=dtype )
         elif isinstance( member_array, list ):
             if len( member_array ) != size:
                 raise TypeError, message
@@ -178,15 +215,23 @@ class Entity( object ):
             list of lists of types [L{int},L{int},L{float},L{int},L{int}],
             representing dispatch period start index,
             dispatch period end index, bound, bound type
-            and constraint type mask, respectively.
+            and constraint type mask, respectively, or
+            a structured L{numpy.array} with records of
+            these types (see L{gnw.reader.convert_to}).
         
         @raise TypeError:
         @raise IndexError:  
         @raise ValueError: 
         """
         value = conditional( value is None, [], value )
-        if not isinstance( value, list ):
+        if not isinstance( value, (list, numpy.ndarray) ):
             raise TypeError, "set_CONSTRAINT: list expected"
+        # records hold numpy scalars, which must not end up on the
+        # left hand side of comparisons with pulp expressions
+        value = list( value )
+        for i in xrange( len( value ) ):
+            if isrecord( value[i] ):
+                value[i] = value[i].item()
         m = len( value )
         for i in xrange( m ):
             if not issequence( value[i] ):
@@ -223,13 +268,252 @@ class Entity( object ):
                 
         @param value: array or list holding the lengths of the individual
             dispatch periods in hours [h]. The time grid need not be uniform. 
+            The read-only arrays of a L{gnw.time_grid.TimeGrid} are
+            shared by reference, see L{gnw.time_grid.TimeGrid.share_array}.
         @type value: L{list} of L{float} or
             L{numpy.array} of dtype='double'
         """
         self.DISPATCH_PERIOD = conditional( value is None,
                                             numpy.empty( 0, dtype='double' ),
-                                            numpy.array( value, dtype='double' ) )
+                                            TimeGrid.share_array( value ) )
+
+
+    def set_TIME_GRID(self, value):
+        """
+        Shares time grid value, if it matches the entity's
+        dispatch periods and discount factors (if any). In
+        this case the entity's L{DISPATCH_PERIOD} and
+        DISCOUNT_FACTOR arrays are replaced by references
+        to the (read-only) arrays of value, dropping the
+        entity's copies. Otherwise, the entity creates its
+        own time grid on demand, see L{get_TIME_GRID}, still
+        sharing the dispatch periods of value if they match.
+        
+        @param value: time grid, typically the one owned by
+            the L{gnw.network.Network} the entity belongs to
+        @type value: L{gnw.time_grid.TimeGrid}
+        """
+        discount_factor = getattr( self, "DISCOUNT_FACTOR", None )
+        if value.matches( self.DISPATCH_PERIOD ):
+            self.DISPATCH_PERIOD = value.DISPATCH_PERIOD
+        if not value.matches( self.DISPATCH_PERIOD, discount_factor ):
+            self.TIME_GRID = None
+            return
+        if discount_factor is not None:
+            self.DISCOUNT_FACTOR = value.DISCOUNT_FACTOR
+        self.TIME_GRID = value
+
+
+    def get_TIME_GRID(self):
+        """
+        Returns time grid of the entity. If no time grid has
+        been set via L{set_TIME_GRID}, or dispatch periods or
+        discount factors have been set since, a time grid is
+        created from the entity's current L{DISPATCH_PERIOD}
+        and DISCOUNT_FACTOR arrays.
+        
+        @return: time grid
+        @rtype: L{gnw.time_grid.TimeGrid}
+        """
+        discount_factor = getattr( self, "DISCOUNT_FACTOR", None )
+        if self.TIME_GRID is None \
+        or self.TIME_GRID.DISPATCH_PERIOD is not self.DISPATCH_PERIOD \
+        or (discount_factor is not None and self.TIME_GRID.DISCOUNT_FACTOR is not discount_factor):
+            self.set_TIME_GRID( TimeGrid( self.DISPATCH_PERIOD, discount_factor ) )
+        return self.TIME_GRID
+        
+
+    def set_LP_VAR_REGISTRY(self, value):
+        """
+        Sets the registry lp variables are created in by
+        L{create_lp_var_block}.
         
+        @param value: lp variable registry, typically the one
+            owned by the L{gnw.network.Network} the entity
+            belongs to
+        @type value: L{gnw.lp_var_registry.LpVarRegistry}
+        """
+        self.LP_VAR_REGISTRY = value
+
+
+    def get_LP_VAR_REGISTRY(self):
+        """
+        Returns lp variable registry of the entity. If no
+        registry has been set via L{set_LP_VAR_REGISTRY}
+        an own registry is created.
+        
+        @return: lp variable registry
+        @rtype: L{gnw.lp_var_registry.LpVarRegistry}
+        """
+        if self.LP_VAR_REGISTRY is None:
+            self.set_LP_VAR_REGISTRY( LpVarRegistry() )
+        return self.LP_VAR_REGISTRY
+
+
+    def create_lp_var_block(self, attr, name, shape=(), lowBound=None, upBound=None, cat=pulp.LpContinuous):
+        """
+        Registers a block of lp variables with the entity's
+        registry (see L{gnw.lp_var_registry.LpVarRegistry.add_block})
+        that is accessible as attribute attr of self. The
+        L{pulp.LpVariable} instances of the block are created
+        on first access of attr only.
+        
+        @param attr: attribute name, e.g., 'vol'
+        @type attr: L{str}
+        
+        @param name: symbolic name of the lp variables
+        @type name: L{str}
+        
+        @param shape: shape of the block, () for a single
+            lp variable
+        @type shape: L{tuple} of L{int}, or L{int}
+        
+        @param lowBound: lower bound, None if unbounded
+        @type lowBound: None or L{float}
+        
+        @param upBound: upper bound, None if unbounded
+        @type upBound: None or L{float}
+        
+        @param cat: L{pulp.LpContinuous} or L{pulp.LpInteger}
+        @type cat: L{str}
+        """
+        # drop lp variables created for a previous block
+        self.__dict__.pop( attr, None )
+        self.lp_var_block_dict[attr] = \
+            self.get_LP_VAR_REGISTRY().add_block( self, name, shape, lowBound, upBound, cat )
+
+
+    def get_lp_var_indices(self, attr):
+        """
+        @param attr: attribute name of an lp variable block,
+            see L{create_lp_var_block}
+        @type attr: L{str}
+        
+        @return: registry (column) indices of the lp variables
+            of block attr, of the block's shape
+        @rtype: L{numpy.array} of dtype='int'
+        """
+        return self.get_LP_VAR_REGISTRY().get_indices( self.lp_var_block_dict[attr] )
+
+
+    def tighten_lp_var_bounds(self, attr, index, lowBound=None, upBound=None):
+        """
+        Tightens the bounds of an lp variable of block attr
+        in the lp variable registry (see
+        L{gnw.lp_var_registry.LpVarRegistry.tighten_bounds})
+        and, if already created, of the lp variable itself.
+        
+        @param attr: attribute name of an lp variable block,
+            see L{create_lp_var_block}
+        @type attr: L{str}
+        
+        @param index: index of the lp variable within the block
+        @type index: L{int} or L{tuple} of L{int}
+        
+        @param lowBound: lower bound, None to keep the lower bound
+        @type lowBound: None or L{float}
+        
+        @param upBound: upper bound, None to keep the upper bound
+        @type upBound: None or L{float}
+        """
+        registry = self.get_LP_VAR_REGISTRY()
+        i = int( self.get_lp_var_indices( attr )[index] )
+        registry.tighten_bounds( i, lowBound, upBound )
+        
+        lp_var = self.__dict__.get( attr )
+        if isinstance( lp_var, numpy.ndarray ):
+            lp_var = lp_var[index]
+        if lp_var is not None:
+            lp_var.lowBound = conditional( registry.lower[i] == -numpy.inf, None, float( registry.lower[i] ) )
+            lp_var.upBound = conditional( registry.upper[i] == numpy.inf, None, float( registry.upper[i] ) )
+
+
+    def update_lp_var_column_dict(self, column_dict):
+        """
+        Adds the registry (column) index of each lp variable
+        of self created so far to column_dict, using the id
+        of the lp variable as key.
+        
+        @param column_dict: dictionary to be updated
+        @type column_dict: L{dict}
+        """
+        for attr, block in self.lp_var_block_dict.iteritems():
+            lp_vars = self.__dict__.get( attr )
+            if lp_vars is None:
+                continue
+            indices = self.get_LP_VAR_REGISTRY().get_indices( block )
+            if isinstance( lp_vars, numpy.ndarray ):
+                column_dict.update( zip( [id( lp_var ) for lp_var in lp_vars.flat], indices.flat ) )
+            else:
+                column_dict[id( lp_vars )] = int( indices )
+
+
+    def update_lp_var_values(self):
+        """
+        Assigns the solution values held by the lp variable
+        registry to the lp variables of self created so far,
+        None for NaN values. Lp variables created later on take
+        their value from the registry on creation.
+        """
+        registry = self.get_LP_VAR_REGISTRY()
+        for attr, block in self.lp_var_block_dict.iteritems():
+            lp_vars = self.__dict__.get( attr )
+            if lp_vars is None:
+                continue
+            values = registry.value[registry.get_indices( block )]
+            if isinstance( lp_vars, numpy.ndarray ):
+                for lp_var, value in zip( lp_vars.flat, values.ravel().tolist() ):
+                    lp_var.varValue = conditional( value == value, value, None )
+            else:
+                value = float( values )
+                lp_vars.varValue = conditional( value == value, value, None )
+
+
+    def get_lp_var_solution(self, attr):
+        """
+        Returns the solution values of the lp variables of
+        block attr (see L{create_lp_var_block}) without
+        creating them, i.e., the values of the lp variables
+        of self created so far, the values held by the
+        lp variable registry otherwise.
+        
+        @param attr: attribute name of an lp variable block,
+            see L{create_lp_var_block}
+        @type attr: L{str}
+        
+        @return: solution values of the block's shape,
+            NaN for lp variables without value
+        @rtype: L{numpy.array} of dtype='double', or L{float}
+            for a single lp variable
+        """
+        lp_vars = self.__dict__.get( attr )
+        if lp_vars is None:
+            values = self.get_LP_VAR_REGISTRY().value[self.get_lp_var_indices( attr )]
+        elif isinstance( lp_vars, numpy.ndarray ):
+            values = numpy.array( [lp_var.varValue for lp_var in lp_vars.flat], dtype='double' ).reshape( lp_vars.shape )
+        else:
+            values = numpy.array( lp_vars.varValue, dtype='double' )
+        
+        if values.ndim == 0:
+            return float( values )
+        return values
+
+
+    def __getattr__(self, attr):
+        """
+        Creates the lp variables of block attr (see
+        L{create_lp_var_block}) on first access. Only
+        called if attr is not found otherwise.
+        
+        @raise AttributeError: attr is not an lp variable block
+        """
+        lp_var_block_dict = self.__dict__.get( "lp_var_block_dict", {} )
+        if attr not in lp_var_block_dict:
+            raise AttributeError, "'%s' object has no attribute '%s'" % (self.__class__.__name__, attr)
+        value = self.get_LP_VAR_REGISTRY().create_lp_vars( lp_var_block_dict[attr] )
+        setattr( self, attr, value )
+        return value
+
 
     def create_lp_vars(self, prefix=""):
         """
@@ -242,7 +526,9 @@ class Entity( object ):
             created lp variables.
         @type prefix: L{str} 
         """
-        pass
+        for attr in self.lp_var_block_dict:
+            self.__dict__.pop( attr, None )
+        self.lp_var_block_dict = {}
         
     
     def create_model(self, prefix=""):
@@ -262,6 +548,28 @@ class Entity( object ):
         self.objective_list = []
                 
 
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Adds the rows and objective terms of self to model.
+        This base class implementation creates the pulp
+        model of self (see L{create_model}) and adds its
+        constraints and objective to model for conversion.
+        Child classes of L{gnw.entity.Entity} may overwrite
+        it to add their rows as blocks of column indices
+        directly, without creating L{pulp} objects.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: string used to additionally prefix the names of
+            created lp variables.
+        @type prefix: L{str} 
+        """
+        self.create_model( prefix )
+        model.add_lp_constraints( self, list( self.iter_constraints() ) )
+        model.add_lp_objective( self.get_objective() )
+
+
     def get_lp_vars(self):
         """
         This method is used to return a list containing all
@@ -300,6 +608,17 @@ class Entity( object ):
         return self.constraint_list
         
         
+    def iter_constraints(self):
+        """
+        Returns an iterator over the constraints
+        of self, see L{get_constraints}.
+        
+        @return: iterator over constraints
+        @rtype: iterator of L{pulp.LpConstraint}
+        """
+        return iter( self.constraint_list )
+        
+        
     def get_objective_value(self):
         """
         Returns affine expression representing
@@ -321,8 +640,50 @@ class Entity( object ):
         """
         return pulp.LpAffineExpression( constant = 0 )
 
+
+    def get_mark_to_market_terms(self):
+        """
+        Returns the constant and the terms of the mark to
+        market value (see L{get_mark_to_market_value}), i.e.,
+        the solution values of the lp variables (see
+        L{get_lp_var_solution}) and their coefficients, in
+        the order of the terms of the affine expression.
+        
+        @return: constant, solution value arrays and
+            coefficient arrays
+        @rtype: L{tuple} of (L{float}, L{list} of L{numpy.array},
+            L{list} of L{numpy.array})
+        """
+        return 0.0, [], []
+
+
+    def get_mark_to_market_solution(self):
+        """
+        Returns the mark to market value (see
+        L{get_mark_to_market_value}) of the solution
+        values of the lp variables, without creating
+        them (see L{get_mark_to_market_terms}).
+        
+        The terms are summed one after the other, starting
+        from the constant, as done by
+        L{pulp.LpAffineExpression.value}, such that both give
+        the same value to the last digit.
+        
+        @return: mark to market value
+        @rtype: L{float}
+        """
+        constant, value_list, coeff_list = self.get_mark_to_market_terms()
+        term_list = [numpy.array( [constant], dtype='double' )]
+        for values, coeffs in zip( value_list, coeff_list ):
+            values = numpy.asarray( values, dtype='double' ).ravel()
+            coeffs = numpy.asarray( coeffs, dtype='double' ).ravel()
+            # pulp drops terms of zero coefficient
+            nonzero = coeffs != 0.0
+            term_list.append( values[nonzero]*coeffs[nonzero] )
+        return float( numpy.cumsum( numpy.concatenate( term_list ) )[-1] )
+
  
-    def write_results(self, rslt_dir, basename, extension="txt", canonical=False, sep=";", verbose=False, indent=0):
+    def write_results(self, rslt_dir, basename, extension="txt", canonical=False, sep=";", verbose=False, indent=0, compresslevel=0):
         """
         This method writes the class instance's information
         to file with path name
@@ -364,10 +725,15 @@ class Entity( object ):
         @param indent: indentation of progress messages in number of characters.
         @type indent: L{int}     
         
+        @param compresslevel: gzip compression level, if positive
+            the results are written compressed to the file
+            with path name as above with ".gz" appended
+        @type compresslevel: L{int} in [0, 9]
+        
         @raise ValueError: 
         """
         fname = "%s/%s-%s.%s" % (rslt_dir, basename, self.name, extension)
-        file = open( fname, "w" )
+        file = open_results_file( fname, compresslevel )
         if file.closed:
             raise ValueError, "write_results: closed file handle"
 
@@ -387,98 +753,130 @@ class Entity( object ):
         fmt_dict_item_list.sort( cmp = key_cmp )
         
         for dim in xrange( 3 ):
-            if dim == 0 and sum( [1 for k,v in fmt_dict_item_list if v.dim == dim] ) > 0:
-                for k,v in fmt_dict_item_list:
-                    if v.dim == dim:
-                        print >> file, (self.sfmt + sep) % v.label,
-                        if v.ref is not None:
-                            if v.is_lp_var:
-                                if v.ref.varValue is not None:
-                                    print >> file, (v.fmt[0] + sep) % pulp.value(v.ref),
-                                else:
-                                    print >> file, (self.sfmt + sep) % "None",
-                            else:
-                                print >> file, (v.fmt[0] + sep) % v.ref,
-                        else:
-                            print >> file, (self.sfmt + sep) % "None",
-                        print >> file
-                         
-            elif dim == 1 and sum( [1 for k,v in fmt_dict_item_list if v.dim == dim] ) > 0:
-                # header line
-                print >> file, (self.sfmt + sep) % "t",
-                for k,v in fmt_dict_item_list:
-                    if v.dim == dim:
-                        print >> file, (self.sfmt + sep) % v.label,
-                print >> file
-                # values line
-                done = False
-                t = 0
-                while (not done):
-                    done = True
-                    print >> file, (self.ifmt + sep) % t,
-                    for k,v in fmt_dict_item_list:
-                       if v.dim == dim:
-                            num_rows = v.dim_sizes[0]
-                            if t < num_rows:
-                                done = False
-                                if v.ref[t] is not None: 
-                                    if v.is_lp_var:
-                                        if v.ref[t].varValue is not None:
-                                            print >> file, (v.fmt[0] + sep) % pulp.value(v.ref[t]),
-                                        else:
-                                            print >> file, (self.sfmt + sep) % "None",
-                                    else:
-                                        print >> file, (v.fmt[0] + sep) % v.ref[t],
-                                else:
-                                    print >> file, (self.sfmt + sep) % "None",
-                            else:
-                                print >> file, (self.sfmt + sep) % "N/A",
-                    print >> file
-                    t += 1
-                    
-            elif dim == 2 and sum( [1 for k,v in fmt_dict_item_list if v.dim == dim] ) > 0:
-                # header line
-                print >> file, (self.sfmt + sep) % "i",
-                for k,v in fmt_dict_item_list:
-                    if v.dim == dim:
-                        num_cols = v.dim_sizes[1]
-                        # repeat label num_cols time
-                        for j in xrange( num_cols ):
-                            print >> file, (self.sfmt + sep) % (v.label % j),
-                print >> file
-                #values line
-                done = False
-                i = 0
-                while (not done):
-                    done = True
-                    print >> file, (self.ifmt + sep) % i,
-                    for k,v in fmt_dict_item_list:
-                        if v.dim == dim:
-                            num_rows = v.dim_sizes[0]
-                            num_cols = v.dim_sizes[1]
-                            if i < num_rows:
-                                done = False
-                                for j in xrange( num_cols ):
-                                    if v.ref[i,j] is not None:
-                                        if v.is_lp_var:
-                                            if v.ref[i,j].varValue is not None:
-                                                print >> file, (v.fmt[j] + sep) % pulp.value(v.ref[i,j]),
-                                            else:
-                                                print >> file, (self.sfmt + sep) % "None",
-                                        else:
-                                            print >> file, (v.fmt[j] + sep) % v.ref[i,j],
-                                    else:
-                                        print >> file, (self.sfmt + sep) % "None",
-                            else:
-                                for j in xrange( num_cols ):
-                                    print >> file, (self.sfmt + sep) % "N/A",
-                    print >> file
-                    i += 1
+            entry_list = [v for k,v in fmt_dict_item_list if v.dim == dim]
+            if len( entry_list ) > 0:
+                fmt_table, value_table = self.get_results_table( dim, entry_list )
+                file.write( format_print_lines( fmt_table, value_table, sep ) )
                     
         file.flush()
         file.close()
 
 
+    def get_results_table(self, dim, entry_list):
+        """
+        Collects the values of all entries of entry_list
+        column by column into a table of format strings
+        and a table of values, such that formatting the
+        values row by row reproduces the block of lines
+        written by L{write_results} for dimension dim.
+        Missing references and lp variables without
+        value are given as 'None', cells beyond the
+        number of rows of an entry as 'N/A'. As for each
+        dimension > 0 the block ends with a line of 'N/A'
+        cells, the tables have one row more than the
+        entry with the most rows.
+        
+        @param dim: dimension of all entries of entry_list
+        @type dim: L{int} in {0, 1, 2}
+        
+        @param entry_list: entries of L{fmt_dict} with dimension dim
+        @type entry_list: L{list} of L{gnw.entity.FmtDictEntry}
+        
+        @return: format string table and value table
+        @rtype: L{tuple} of two 2-dimensional L{numpy.array}
+            of dtype='object' having the same shape
+        """
+        if dim == 0:
+            fmt_table = numpy.empty( (len( entry_list ), 2), dtype='object' )
+            value_table = numpy.empty( (len( entry_list ), 2), dtype='object' )
+            fmt_table[:,0] = self.sfmt
+            value_table[:,0] = [v.label for v in entry_list]
+            self.set_results_column( fmt_table[:,1], value_table[:,1],
+                                     [v.fmt[0] for v in entry_list],
+                                     [self.get_results_values( [v.ref], v.is_lp_var )[0] for v in entry_list] )
+            return fmt_table, value_table
+        
+        num_rows = max( [v.dim_sizes[0] for v in entry_list] ) + 1
+        num_cols = 1 + sum( [conditional( dim == 1, 1, v.dim_sizes[-1] ) for v in entry_list] )
+        
+        fmt_table = numpy.empty( (num_rows + 1, num_cols), dtype='object' )
+        value_table = numpy.empty( (num_rows + 1, num_cols), dtype='object' )
+        
+        # header line and index column
+        fmt_table[0,:] = self.sfmt
+        value_table[0,0] = conditional( dim == 1, "t", "i" )
+        fmt_table[1:,0] = self.ifmt
+        value_table[1:,0] = range( num_rows )
+        fmt_table[1:,1:] = self.sfmt
+        value_table[1:,1:] = "N/A"
+        
+        c = 1
+        for v in entry_list:
+            n = v.dim_sizes[0]
+            if dim == 1:
+                value_table[0,c] = v.label
+                self.set_results_column( fmt_table[1:n+1,c], value_table[1:n+1,c],
+                                         [v.fmt[0]]*n,
+                                         self.get_results_values( v.ref[:n], v.is_lp_var ) )
+                c += 1
+            else:
+                for j in xrange( v.dim_sizes[1] ):
+                    value_table[0,c] = v.label % j
+                    self.set_results_column( fmt_table[1:n+1,c], value_table[1:n+1,c],
+                                             [v.fmt[j]]*n,
+                                             self.get_results_values( v.ref[:n,j], v.is_lp_var ) )
+                    c += 1
+        
+        return fmt_table, value_table
+    
+    
+    def get_results_values(ref_list, is_lp_var):
+        """
+        Returns the values of references as a list, None
+        for missing solution values of lp variables.
+        
+        @param ref_list: references, i.e., values or solution
+            values of lp variables (see L{get_lp_var_solution})
+        @type ref_list: sequence
+        
+        @param is_lp_var: whether references are solution
+            values of lp variables
+        @type is_lp_var: L{bool}
+        
+        @return: values, None for missing references and
+            lp variables without value
+        @rtype: L{list}
+        """
+        if is_lp_var:
+            return [conditional( value == value, value, None ) for value in numpy.array( ref_list, dtype='double' ).tolist()]
+        return list( ref_list )
+    
+    get_results_values = staticmethod( get_results_values )
+    
+    
+    def set_results_column(self, fmt_column, value_column, fmt_list, values):
+        """
+        Sets format strings and values of a column of the
+        tables returned by L{get_results_table}.
+        
+        @param fmt_column: column of format string table to be set
+        @type fmt_column: L{numpy.array} of dtype='object'
+        
+        @param value_column: column of value table to be set
+        @type value_column: L{numpy.array} of dtype='object'
+        
+        @param fmt_list: format strings of non-missing values
+        @type fmt_list: L{list} of L{str}
+        
+        @param values: values as returned by L{get_results_values}
+        @type values: L{list}
+        """
+        missing = numpy.array( [value is None for value in values], dtype='bool' )
+        fmt_column[:] = numpy.where( missing, self.sfmt, numpy.array( fmt_list, dtype='object' ) )
+        value_column[:] = values
+        value_column[missing] = "None"
+
+
     def get_keys(self):
         """
         Returns a list of L{gnw.entity.Entity.fmt_dict}'s keys.
@@ -523,17 +921,17 @@ class Entity( object ):
                 if v.dim == 0:
                     
                     attr = NamedItemAttr( v.dim, v.dim_sizes, ni_type_float )
-                    data = NamedItemData( v.ref.varValue )
+                    data = NamedItemData( self.get_results_values( [v.ref], True )[0] )
 
                 elif v.dim == 1:
 
                     attr = NamedItemAttr( v.dim, v.dim_sizes, [ni_type_float] )
-                    data = NamedItemData( [v.ref[t].varValue for t in xrange( v.dim_sizes[0] )] )
+                    data = NamedItemData( self.get_results_values( v.ref[:v.dim_sizes[0]], True ) )
 
                 elif v.dim == 2:
 
                     attr = NamedItemAttr( v.dim, v.dim_sizes, [[ni_type_float]] )
-                    data = NamedItemData( [[v.ref[i,j].varValue for j in xrange( v.dim_sizes[1] )] for i in xrange( v.dim_sizes[0] )] )
+                    data = NamedItemData( [self.get_results_values( v.ref[i,:v.dim_sizes[1]], True ) for i in xrange( v.dim_sizes[0] )] )
 
                 named_item_list.append( NamedItem( k, attr, data ) )
 
@@ -569,6 +967,46 @@ class Entity( object ):
         self.fmt_dict.update( fmt_dict )
 
 
+    def get_results_columns(self):
+        """
+        Returns the labels and the values of all entries of
+        L{gnw.entity.Entity.fmt_dict}, the latter as typed arrays,
+        as written in binary form by
+        L{gnw.writer.write_columnar_results}. The values of
+        lp variables are given as arrays of dtype='double',
+        holding NaN for lp variables without value.
+        
+        @return: labels and values, both keyed by the keys of
+            L{gnw.entity.Entity.fmt_dict}. Values are None for
+            entries without reference.
+        @rtype: L{tuple} of two L{dict}
+        """
+        self.update_fmt_dict()
+        label_dict = {}
+        column_dict = {}
+        for k,v in self.fmt_dict.iteritems():
+            label_dict[k] = v.label
+            column_dict[k] = None
+            if v.ref is None:
+                continue
+            
+            if v.dim == 0:
+                column = self.get_results_values( [v.ref], v.is_lp_var )[0]
+            elif v.dim == 1:
+                column = self.get_results_values( v.ref[:v.dim_sizes[0]], v.is_lp_var )
+            elif v.dim == 2:
+                column = [self.get_results_values( v.ref[i,:v.dim_sizes[1]], v.is_lp_var ) for i in xrange( v.dim_sizes[0] )]
+            else:
+                continue
+            
+            if v.is_lp_var:
+                column_dict[k] = numpy.array( column, dtype='double' )
+            else:
+                column_dict[k] = numpy.array( column )
+        
+        return label_dict, column_dict
+
+
     def get_results(self):
         """
         This method is used to return a list containing all
@@ -616,11 +1054,12 @@ class FmtDictEntry( object ):
             - L{gnw.entity.FmtDictEntry.dim}=2: L{gnw.entity.FmtDictEntry.dim_sizes}=(numRows,numCols)
     @type dim_sizes: L{tuple} of size L{dim} holding number of rows and columns.
     @ivar is_lp_var: flag indicating whether data structure given in
-        L{gnw.entity.FmtDictEntry.ref} holds elements of type L{pulp.LpVariable}
-        or just basic problem coefficients.
+        L{gnw.entity.FmtDictEntry.ref} holds solution values of lp variables
+        (see L{gnw.entity.Entity.get_lp_var_solution}) or just basic
+        problem coefficients.
     @type is_lp_var: L{bool}
     @ivar ref: reference to class member variable.
-    @type ref: L{pulp.LpVariable} or basic problem coefficent (array)  
+    @type ref: solution value (array) or basic problem coefficent (array)  
     """
     def __init__(self, fmt="", label="", dim=0, dim_sizes=None, is_lp_var=False, ref=None):
         """
@@ -651,11 +1090,12 @@ class FmtDictEntry( object ):
                 - L{gnw.entity.FmtDictEntry.dim}=2: L{gnw.entity.FmtDictEntry.dim_sizes}=(numRows,numCols)
         @type dim_sizes: L{tuple} of size L{dim} holding number of rows and columns.
         @param is_lp_var: flag indicating whether data structure given in
-            L{gnw.entity.FmtDictEntry.ref} holds elements of type L{pulp.LpVariable}
-            or just basic problem coefficients.
+            L{gnw.entity.FmtDictEntry.ref} holds solution values of lp variables
+            (see L{gnw.entity.Entity.get_lp_var_solution}) or just basic
+            problem coefficients.
         @type is_lp_var: L{bool}
         @param ref: reference to class member variable.
-        @type ref: L{pulp.LpVariable} or basic problem coefficent (array)  
+        @type ref: solution value (array) or basic problem coefficent (array)  
         """
         self.fmt = fmt
         self.label = label
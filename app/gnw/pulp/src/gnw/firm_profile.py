@@ -16,7 +16,6 @@
 gnw: provides firm delivery/supply profile abstraction 
 """
 import numpy
-import pulp
 
 from gnw.entity import Entity, FmtDictEntry 
 
@@ -202,7 +201,7 @@ class FirmProfile( Entity ):
         
         nSteps = len( self.DISPATCH_PERIOD )
 
-        self.vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_vol", range( nSteps ) ) )
+        self.create_lp_var_block( "vol", prefix + self.name + "_vol", nSteps )
 
 
     def create_model(self, prefix=""):
@@ -227,6 +226,26 @@ class FirmProfile( Entity ):
             self.constraint_list.append( self.vol[t] == self.CURRENT_POSITION[t]*self.DISPATCH_PERIOD[t] )
 
     
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the rows
+        of the firm profile model (see L{create_model})
+        to model as a block of column indices.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        super( FirmProfile, self ).create_model( prefix )
+        
+        model.add_rows( self, self.get_lp_var_indices( "vol" ), 1.0, model.EQ,
+                        numpy.asarray( self.CURRENT_POSITION, dtype='double' )*numpy.asarray( self.DISPATCH_PERIOD, dtype='double' ) )
+
+    
     def get_lp_vars(self):
         """
         This method returns a list containing all
@@ -268,7 +287,7 @@ class FirmProfile( Entity ):
                          'vol' :                FmtDictEntry( [ self.ffmt ],
                                                               'vol[t] [MWh]',
                                                               1, (nSteps,), True,
-                                                              self.vol )})
+                                                              self.get_lp_var_solution( "vol" ) )})
         
         super( FirmProfile, self ).update_fmt_dict( fmt_dict )
 
@@ -280,7 +299,7 @@ class FirmProfile( Entity ):
         """
         nSteps = len( self.DISPATCH_PERIOD )
 
-        vol = [-self.SB*self.vol[t].varValue for t in xrange( nSteps )]
+        vol = (-self.SB*self.get_lp_var_solution( "vol" )).tolist()
         cashflow = [0.0]*nSteps
         
         return (vol, cashflow)
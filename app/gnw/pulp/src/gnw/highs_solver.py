@@ -0,0 +1,212 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: in-process HiGHS solver backend for sparse models,
+see L{gnw.sparse_model}
+"""
+import ctypes
+import ctypes.util
+
+import numpy
+import pulp
+
+from gnw.util import conditional
+
+
+class HighsSolver( object ):
+    """
+    Solves a L{gnw.sparse_model.SparseModel} in-process with the
+    HiGHS solver library, called through its C API. The constraint
+    matrix (in CSR format, see
+    L{gnw.sparse_model.SparseModel.get_csr}), bounds and
+    integrality flags are passed to HiGHS as arrays, i.e., no
+    files are written and no LP text is generated, and the
+    solution values are passed back to the model's
+    L{gnw.lp_var_registry.LpVarRegistry} by column index.
+
+    Usage:
+        - status = HighsSolver().solve( ntwrk.get_sparse_model() )
+
+    @cvar status_by_code: L{pulp.LpStatus} code per HiGHS model
+        status (kHighsModelStatus* of the C API), model statuses
+        not listed map to L{pulp.LpStatusUndefined}
+    @type status_by_code: L{dict}
+
+    @cvar default_options: HiGHS options set for every model
+        before L{options} (such that the latter may override
+        them). The relative MIP gap is set to 0, i.e., MIP
+        solutions are solved to optimality as by CBC (see
+        L{gnw.sparse_solver.SparseSolver}) rather than to
+        HiGHS' default gap of 1e-4.
+    @type default_options: L{dict}
+
+    @ivar path: path (or name) of the HiGHS shared library
+    @type path: L{str}
+
+    @ivar mip: flag whether integer variables are respected
+    @type mip: L{bool}
+
+    @ivar msg: flag whether solver output is shown
+    @type msg: L{bool}
+
+    @ivar options: additional HiGHS options, option values
+        by option name
+    @type options: L{dict}
+    """
+    status_by_code = {6  : pulp.LpStatusOptimal,     # model empty
+                      7  : pulp.LpStatusOptimal,
+                      8  : pulp.LpStatusInfeasible,
+                      9  : pulp.LpStatusInfeasible,  # unbounded or infeasible
+                      10 : pulp.LpStatusUnbounded,
+                      13 : pulp.LpStatusNotSolved,   # time limit
+                      14 : pulp.LpStatusNotSolved,   # iteration limit
+                      16 : pulp.LpStatusNotSolved,   # solution limit
+                      17 : pulp.LpStatusNotSolved}   # interrupt
+
+    default_options = {"mip_rel_gap" : 0.0}
+
+    # HiGHS sense and solution status codes of the C API
+    sense_by_sense = {pulp.LpMinimize : 1,
+                      pulp.LpMaximize : -1}
+    solution_status_feasible = 2
+
+
+    def __init__(self, path=None, mip=1, msg=0, options={}):
+        """
+        @param path: path of the HiGHS shared library, if None
+            the library 'highs' is looked up on the library
+            search path
+        @type path: L{str} or None
+        """
+        if path is None:
+            path = ctypes.util.find_library( "highs" ) or "libhighs.so"
+        self.path = path
+        self.mip = mip
+        self.msg = msg
+        self.options = options
+
+
+    def load(self):
+        """
+        @return: HiGHS shared library, None if it cannot be loaded
+        @rtype: L{ctypes.CDLL} or None
+        """
+        try:
+            lib = ctypes.CDLL( self.path )
+        except OSError:
+            return None
+        lib.Highs_create.restype = ctypes.c_void_p
+        return lib
+
+
+    def available(self):
+        """
+        @return: whether the HiGHS shared library can be loaded
+        @rtype: L{bool}
+        """
+        return self.load() is not None
+
+
+    def get_options(self):
+        """
+        @return: HiGHS options, i.e., L{default_options} and
+            'output_flag' (see L{msg}) updated by L{options}
+        @rtype: L{dict}
+        """
+        options = dict( self.default_options )
+        options["output_flag"] = bool( self.msg )
+        options.update( self.options )
+        return options
+
+
+    def solve(self, model, sense=pulp.LpMaximize):
+        """
+        Solves model and, if a feasible solution was found, sets
+        the solution values of the lp variable registry of model
+        (see L{gnw.lp_var_registry.LpVarRegistry.set_values}).
+        Columns used by no row and no objective block (see
+        L{gnw.sparse_model.SparseModel.is_used}) are left
+        without value, as on the pulp path.
+
+        @param model: compiled sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+
+        @param sense: L{pulp.LpMinimize} or L{pulp.LpMaximize}
+        @type sense: L{int}
+
+        @return: problem status, see L{pulp.LpStatus}
+        @rtype: L{int}
+
+        @raise pulp.PulpSolverError: the HiGHS library could not
+            be loaded or rejected an option or the model
+        """
+        lib = self.load()
+        if lib is None:
+            raise pulp.PulpSolverError, "cannot load '%s' (gnw.highs_solver.HighsSolver.solve)" % self.path
+
+        nVars = len( model.registry )
+        indptr, col, val = model.get_csr()
+
+        # array arguments of the C API, integers of HiGHS' int type
+        int_type = conditional( lib.Highs_getSizeofHighsInt( None ) == 8, ctypes.c_int64, ctypes.c_int32 )
+        int_dtype = numpy.dtype( int_type )
+        row_lower = numpy.where( model.sense == pulp.LpConstraintLE, -numpy.inf, model.rhs )
+        row_upper = numpy.where( model.sense == pulp.LpConstraintGE, numpy.inf, model.rhs )
+        double_args = [numpy.ascontiguousarray( a, dtype='double' )
+                       for a in (model.obj, model.lower, model.upper, row_lower, row_upper, val)]
+        int_args = [numpy.ascontiguousarray( a, dtype=int_dtype )
+                    for a in (indptr, col, model.registry.is_integer[:nVars] & bool( self.mip ))]
+        obj, lower, upper, row_lower, row_upper, val = [a.ctypes.data_as( ctypes.POINTER( ctypes.c_double ) ) for a in double_args]
+        indptr, col, integrality = [a.ctypes.data_as( ctypes.POINTER( int_type ) ) for a in int_args]
+
+        highs = ctypes.c_void_p( lib.Highs_create() )
+        try:
+            for name, value in sorted( self.get_options().items() ):
+                if lib.Highs_setOptionValue( highs, str( name ), str( value ).lower() ) != 0:
+                    raise pulp.PulpSolverError, "invalid option '%s=%s' (gnw.highs_solver.HighsSolver.solve)" % (name, value)
+
+            # a_format 2: row-wise matrix, objective offset 0 (see
+            # gnw.sparse_model.SparseModel.get_objective_value)
+            if lib.Highs_passMip( highs, int_type( nVars ), int_type( model.nRows ), int_type( len( double_args[-1] ) ),
+                                  int_type( 2 ), int_type( self.sense_by_sense[sense] ), ctypes.c_double( 0.0 ),
+                                  obj, lower, upper, row_lower, row_upper,
+                                  indptr, col, val, integrality ) < 0:
+                raise pulp.PulpSolverError, "model rejected by '%s' (gnw.highs_solver.HighsSolver.solve)" % self.path
+
+            lib.Highs_run( highs )
+            status = self.status_by_code.get( lib.Highs_getModelStatus( highs ), pulp.LpStatusUndefined )
+
+            solution_status = int_type( 0 )
+            lib.Highs_getIntInfoValue( highs, "primal_solution_status", ctypes.byref( solution_status ) )
+            if solution_status.value == self.solution_status_feasible:
+                values, col_dual, row_value, row_dual = [numpy.zeros( n, dtype='double' ) for n in (nVars, nVars, model.nRows, model.nRows)]
+                lib.Highs_getSolution( highs, *[a.ctypes.data_as( ctypes.POINTER( ctypes.c_double ) ) for a in (values, col_dual, row_value, row_dual)] )
+                values[~model.is_used] = numpy.nan
+                model.registry.set_values( values )
+        finally:
+            lib.Highs_destroy( highs )
+        return status
+
+
+
+if __name__ == "__main__":
+    print "gnw.highs_solver.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
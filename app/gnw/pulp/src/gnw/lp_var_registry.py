@@ -0,0 +1,275 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: model-wide registry of lp variables, holding bounds, category,
+owner and solution value of all variables as contiguous arrays.
+"""
+import itertools
+import numpy
+import pulp
+
+from gnw.util import conditional
+
+
+class LpVarRegistry( object ):
+    """
+    Columnar store of all lp variables of a model. Variables are
+    registered in blocks (see L{add_block}), i.e., as arrays of
+    given shape sharing a symbolic name, bounds and category,
+    and are identified by their (column) index into the registry's
+    arrays. L{pulp.LpVariable} instances are only created on
+    request by L{create_lp_vars}, e.g., when a model is
+    built for a pulp solver.
+
+    @ivar lower: lower bound per variable, -inf if unbounded
+    @type lower: L{numpy.array} of dtype='double'
+
+    @ivar upper: upper bound per variable, +inf if unbounded
+    @type upper: L{numpy.array} of dtype='double'
+
+    @ivar is_integer: whether variable is of category
+        L{pulp.LpInteger}
+    @type is_integer: L{numpy.array} of dtype='bool'
+
+    @ivar owner: index into owner_list of the entity
+        that registered the variable
+    @type owner: L{numpy.array} of dtype='int32'
+
+    @ivar value: solution value per variable, NaN if not set
+    @type value: L{numpy.array} of dtype='double'
+
+    @ivar owner_list: entities that registered variables
+    @type owner_list: L{list} of L{gnw.entity.Entity}
+
+    @ivar block_list: (name, start, shape) tuple per block
+    @type block_list: L{list} of L{tuple}
+
+    @note: the arrays above are allocated with spare capacity,
+        only their first len( self ) elements are valid.
+    """
+    def __init__(self):
+        self.nVars = 0
+        self.lower = numpy.empty( 0, dtype='double' )
+        self.upper = numpy.empty( 0, dtype='double' )
+        self.is_integer = numpy.empty( 0, dtype='bool' )
+        self.owner = numpy.empty( 0, dtype='int32' )
+        self.value = numpy.empty( 0, dtype='double' )
+
+        self.owner_list = []
+        self.owner_index_dict = {}
+        self.block_list = []
+
+
+    def __len__(self):
+        """
+        @return: number of registered variables
+        @rtype: L{int}
+        """
+        return self.nVars
+
+
+    def reserve(self, size):
+        """
+        Grows the variable arrays to hold at least size
+        variables, doubling their capacity as required.
+
+        @param size: required number of variables
+        @type size: L{int}
+        """
+        capacity = len( self.lower )
+        if size <= capacity:
+            return
+        capacity = max( size, 2*capacity, 1024 )
+        for name, fill_value in (("lower", -numpy.inf),
+                                 ("upper", numpy.inf),
+                                 ("is_integer", False),
+                                 ("owner", -1),
+                                 ("value", numpy.nan)):
+            array = getattr( self, name )
+            grown = numpy.empty( capacity, dtype=array.dtype )
+            grown[:self.nVars] = array[:self.nVars]
+            grown[self.nVars:] = fill_value
+            setattr( self, name, grown )
+
+
+    def add_block(self, owner, name, shape=(), lowBound=None, upBound=None, cat=pulp.LpContinuous):
+        """
+        Registers a block of variables.
+
+        @param owner: entity registering the block
+        @type owner: L{gnw.entity.Entity}
+
+        @param name: symbolic name of the block. Variables
+            of a block of shape (n,m) are named
+            name_i_j, a block of shape () holds a single
+            variable named name.
+        @type name: L{str}
+
+        @param shape: shape of the block
+        @type shape: L{tuple} of L{int}, or L{int}
+
+        @param lowBound: lower bound, None if unbounded
+        @type lowBound: None or L{float}
+
+        @param upBound: upper bound, None if unbounded
+        @type upBound: None or L{float}
+
+        @param cat: L{pulp.LpContinuous} or L{pulp.LpInteger}
+        @type cat: L{str}
+
+        @return: block identifier
+        @rtype: L{int}
+
+        @raise ValueError: cat is not a supported category
+        """
+        if cat not in (pulp.LpContinuous, pulp.LpInteger):
+            raise ValueError, "Unsupported lp variable category '%s' (gnw.lp_var_registry.LpVarRegistry.add_block)" % cat
+
+        if not isinstance( shape, tuple ):
+            shape = (shape,)
+        size = int( numpy.prod( shape ) )
+
+        if id( owner ) not in self.owner_index_dict:
+            self.owner_index_dict[id( owner )] = len( self.owner_list )
+            self.owner_list.append( owner )
+
+        start = self.nVars
+        final = start + size
+        self.reserve( final )
+        if lowBound is not None:
+            self.lower[start:final] = lowBound
+        if upBound is not None:
+            self.upper[start:final] = upBound
+        self.is_integer[start:final] = cat == pulp.LpInteger
+        self.owner[start:final] = self.owner_index_dict[id( owner )]
+        self.nVars = final
+
+        self.block_list.append( (name, start, shape) )
+        return len( self.block_list ) - 1
+
+
+    def get_indices(self, block):
+        """
+        @param block: block identifier, see L{add_block}
+        @type block: L{int}
+
+        @return: variable (column) indices of block,
+            of the block's shape
+        @rtype: L{numpy.array} of dtype='int'
+        """
+        name, start, shape = self.block_list[block]
+        return numpy.arange( start, start + int( numpy.prod( shape ) ) ).reshape( shape )
+
+
+    def tighten_bounds(self, index, lowBound=None, upBound=None):
+        """
+        Tightens the bounds of a variable, i.e., bounds are only
+        changed if the given bound is more restrictive.
+
+        @param index: variable (column) index
+        @type index: L{int}
+
+        @param lowBound: lower bound, None to keep the lower bound
+        @type lowBound: None or L{float}
+
+        @param upBound: upper bound, None to keep the upper bound
+        @type upBound: None or L{float}
+        """
+        if lowBound is not None:
+            self.lower[index] = max( self.lower[index], lowBound )
+        if upBound is not None:
+            self.upper[index] = min( self.upper[index], upBound )
+
+
+    def create_lp_var(name, lower, upper, is_integer, value):
+        """
+        @return: lp variable with given bounds (infinite
+            bounds are mapped to None), category and
+            solution value (if not NaN)
+        @rtype: L{pulp.LpVariable}
+        """
+        lp_var = pulp.LpVariable( name,
+                                  lowBound = conditional( lower == -numpy.inf, None, lower ),
+                                  upBound = conditional( upper == numpy.inf, None, upper ),
+                                  cat = conditional( is_integer, pulp.LpInteger, pulp.LpContinuous ) )
+        if value == value: # i.e., not NaN
+            lp_var.varValue = value
+        return lp_var
+
+    create_lp_var = staticmethod( create_lp_var )
+
+
+    def create_lp_vars(self, block):
+        """
+        Creates the lp variables of a block.
+
+        @param block: block identifier, see L{add_block}
+        @type block: L{int}
+
+        @return: lp variable for blocks of shape (),
+            array of lp variables otherwise
+        @rtype: L{pulp.LpVariable} or
+            L{numpy.array} of L{pulp.LpVariable}
+        """
+        name, start, shape = self.block_list[block]
+        final = start + int( numpy.prod( shape ) )
+
+        lower = self.lower[start:final].tolist()
+        upper = self.upper[start:final].tolist()
+        is_integer = self.is_integer[start:final].tolist()
+        value = self.value[start:final].tolist()
+
+        if shape == ():
+            return self.create_lp_var( name, lower[0], upper[0], is_integer[0], value[0] )
+
+        fmt = name + "_%d"*len( shape )
+        index_list = itertools.product( *[xrange( n ) for n in shape] )
+        lp_vars = numpy.empty( shape, dtype='object' )
+        lp_vars.flat[:] = [self.create_lp_var( fmt % index, lower[i], upper[i], is_integer[i], value[i] )
+                           for i, index in enumerate( index_list )]
+        return lp_vars
+
+
+    def set_values(self, values):
+        """
+        Sets solution values of all variables and
+        assigns them to the lp variables created so far
+        (see L{gnw.entity.Entity.update_lp_var_values}).
+
+        @param values: solution value per variable, NaN
+            for variables without value (lp variables
+            keep varValue None)
+        @type values: L{numpy.array} of dtype='double'
+            of size len( self )
+
+        @raise ValueError: size of values does not match
+        """
+        if len( values ) != self.nVars:
+            raise ValueError, "Number of values must match number of lp variables (gnw.lp_var_registry.LpVarRegistry.set_values)"
+        self.value[:self.nVars] = values
+        for owner in self.owner_list:
+            owner.update_lp_var_values()
+
+
+
+if __name__ == "__main__":
+    print "gnw.lp_var_registry.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -18,7 +18,7 @@ gnw: provides market abstraction
 import numpy
 import pulp
 
-from gnw.entity import FmtDictEntry
+from gnw.entity import Entity, FmtDictEntry
 from gnw.container_entity import ContainerEntity
 
 from gnw.product import Product
@@ -153,7 +153,7 @@ class Market( ContainerEntity ):
         
         nSteps = len( self.DISPATCH_PERIOD )
         
-        self.vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_vol", range( nSteps ) ) )
+        self.create_lp_var_block( "vol", prefix + self.name + "_vol", nSteps )
         
         
     def create_model(self, prefix=""):
@@ -172,10 +172,77 @@ class Market( ContainerEntity ):
         """
         super( Market, self ).create_model( prefix )
         
+        for t, term_list in enumerate( self.get_vol_index() ):
+            self.constraint_list.append( self.vol[t] == pulp.lpSum( [item.SB*item.vol[i] for item, i in term_list] ) )
+
+
+    def get_vol_index(self):
+        """
+        Interval index of the volumes of the entities the
+        market contains over dispatch periods, i.e., only
+        products delivering during a dispatch period are
+        listed for it (see L{gnw.product.Product.vol}).
+        
+        @return: list of (entity, index into entity's vol) per
+            dispatch period
+        @rtype: L{list} of L{list} of L{tuple}
+        """
         nSteps = len( self.DISPATCH_PERIOD )
         
-        for t in xrange( nSteps ):
-            self.constraint_list.append( self.vol[t] == pulp.lpSum( [item.SB*item.vol[t] for item in self.get_entity_list()] ) )
+        vol_index = [[] for t in xrange( nSteps )]
+        for item in self.get_entity_list():
+            start, final = self.get_vol_window( item )
+            for t in xrange( start, final + 1 ):
+                vol_index[t].append( (item, t - start) )
+        return vol_index
+
+
+    def get_vol_window(self, item):
+        """
+        @return: first and last dispatch period of the
+            volumes of entity item
+        @rtype: L{tuple} of L{int}
+        """
+        if isinstance( item, Product ):
+            return item.DELIVERY_PERIOD[0], item.DELIVERY_PERIOD[1]
+        return 0, len( self.DISPATCH_PERIOD ) - 1
+
+
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the market
+        balance rows (see L{create_model}) to model as a
+        block of column indices and calls
+        L{gnw.entity.Entity.create_sparse_model} on all
+        entities the market contains.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        Entity.create_model( self, prefix )
+        
+        item_list = self.get_entity_list()
+        
+        # vol[t] == sum of SB*vol[t] over all items delivering at t
+        vol = self.get_lp_var_indices( "vol" )
+        row_list = [numpy.arange( len( vol ) )]
+        col_list = [vol]
+        val_list = [numpy.ones( len( vol ) )]
+        for item in item_list:
+            start, final = self.get_vol_window( item )
+            row_list.append( numpy.arange( start, final + 1 ) )
+            col_list.append( item.get_lp_var_indices( "vol" ) )
+            val_list.append( numpy.repeat( -float( item.SB ), final + 1 - start ) )
+        model.add_triplets( self, len( vol ), numpy.concatenate( row_list ), numpy.concatenate( col_list ),
+                            numpy.concatenate( val_list ), model.EQ, 0.0 )
+        
+        for item in item_list:
+            item.create_sparse_model( model, prefix )
 
     
     def get_lp_vars(self):
@@ -206,7 +273,7 @@ class Market( ContainerEntity ):
         """
         nSteps = len( self.DISPATCH_PERIOD )
 
-        fmt_dict.update({'vol': FmtDictEntry( [ self.ffmt ], 'vol[t] [MWh]', 1, (nSteps,), True,  self.vol ),
+        fmt_dict.update({'vol': FmtDictEntry( [ self.ffmt ], 'vol[t] [MWh]', 1, (nSteps,), True,  self.get_lp_var_solution( "vol" ) ),
                          'DF' : FmtDictEntry( [ self.ffmt ], 'DF[t]',        1, (nSteps,), False, self.DISCOUNT_FACTOR )})
         
         super( Market, self ).update_fmt_dict( fmt_dict )
@@ -219,7 +286,7 @@ class Market( ContainerEntity ):
         """
         nSteps = len( self.DISPATCH_PERIOD )
         
-        vol = [self.vol[t].varValue for t in xrange( nSteps )]
+        vol = self.get_lp_var_solution( "vol" ).tolist()
         cashflow = [0.0]*nSteps
             
         return (vol, cashflow)
@@ -175,7 +175,8 @@ class MarketFactory( object ):
         # For performance reasons the trade tranche objects
         # are extracted from the data_dict/trn_dict_list
         # respectively here and added to the prd_entity_list,
-        # which is passed to the ProductFactory.Create(...)
+        # which is indexed once by product and the product's
+        # tranches passed to the ProductFactory.Create(...)
         # function rather than just calling the
         # ProductFactory.CreateFromDataDict(...) function and
         # extracting and instantiating all the trade tranches
@@ -201,9 +202,10 @@ class MarketFactory( object ):
                 raise ValueError, "value for 'nStdPrds' does not match length of list 'PRD_DICT_LIST'"
             
             dbg_print( "initialising standard products ...", verbose )
+            trn_index = ProductFactory.CreateTrancheIndex( prd_entity_list )
             for prd_dict in prd_dict_list.itervalues():
                 dbg_print( "... standard product '%s'" % prd_dict['NAME'], verbose )
-                prd = ProductFactory.Create( prd_dict, prd_entity_list, DISCOUNT_FACTOR, DISPATCH_PERIOD ) 
+                prd = ProductFactory.Create( prd_dict, ProductFactory.GetTrancheList( prd_dict, trn_index ), DISCOUNT_FACTOR, DISPATCH_PERIOD ) 
                 mrkt_entity_list.append( prd )
     
     
@@ -15,7 +15,6 @@
 """
 gnw: Facilitates parsing of Mosel initialisation file formated data files  
 """
-import csv
 
 
 class MoselInitFileReader:
@@ -25,6 +24,12 @@ class MoselInitFileReader:
     """    
     def read_mosel_init_file(fname, aDict = {}):
         """
+        Reads file fname in a single pass. Lines of an
+        entry are collected as lists of their parts and
+        the parts are converted by
+        L{gnw.mosel.MoselInitFileTokenizer.tokenize_value_parts}
+        (see L{gnw.mosel.MoselInitFileTokenizer.tokenize_array}).
+        
         @param fname: filename of Mosel initialisation file.
         @type fname: L{str}
         
@@ -36,38 +41,170 @@ class MoselInitFileReader:
             which have been read from file fname
         @rtype: L{dict}
         """
-        csvfile = open( fname )
-#        dialect = csv.Sniffer().sniff( csvfile.read( 1024 ), delimiters = [':'] )
-#        csvfile.seek( 0 )
-#        reader = csv.reader( csvfile, dialect, delimiter=':' )
-        reader = csv.reader( csvfile, delimiter=':' )
-    
-        needsListProcessing = False
-        currentKey = ""
-        for row in reader:
-            if len(row) == 2:
+        initfile = open( fname )
+        text = initfile.read()
+        initfile.close()
+        
+        currentKey = None
+        parts = []
+        for line in text.splitlines():
+            if not line:
+                continue
+            row = line.split( ':' )
+            if len( row ) == 2:
                 # found an entry of the form "<identifier> : <value>"
-                if needsListProcessing:
-                    needsListProcessing = False
-                    aDict[currentKey] = MoselInitFileParser.parse_array_string( aDict[currentKey] )
-    
+                if currentKey is not None:
+                    aDict[currentKey] = MoselInitFileTokenizer.tokenize_value_parts( parts )
                 currentKey = row[0].strip()
-                aDict[currentKey] = row[1].strip( " '," )
-                
-                needsListProcessing = False
-                if aDict[currentKey].startswith( '[' ):
-                    needsListProcessing = True
+                parts = [ row[1].strip( " '," ) ]
             else:
-                aDict[currentKey] += " " + row[0].strip( " '," )
-                
-        if needsListProcessing:
-            needsListProcessing = False
-            aDict[currentKey] = MoselInitFileParser.parse_array_string( aDict[currentKey] )
+                parts.append( row[0].strip( " '," ) )
+        
+        if currentKey is not None:
+            aDict[currentKey] = MoselInitFileTokenizer.tokenize_value_parts( parts )
             
         return aDict
 
     read_mosel_init_file = staticmethod( read_mosel_init_file )
 
+
+class MoselInitFileTokenizer:
+    """
+    Single pass conversion of the 'right-hand-side' of a
+    Mosel initialisation file entry into a (list of) list(s)
+    of strings. The entry is given as list of its parts, i.e.,
+    the stripped value of the line holding the identifier
+    followed by the stripped continuation lines.
+    
+    Array strings are split into tokens at L{split_char} once,
+    and the tokens are scanned once. Array delimiter characters
+    are expected to be tokens of their own (as written by the
+    gnw Excel workbooks) and nesting must not exceed two levels.
+    For any other array string the tokenizer falls back to
+    L{gnw.mosel.MoselInitFileParser.parse_array_string}, such
+    that results are always identical to the ones of the parser.
+    """
+    strip_chars = " ,;"
+    split_char = " "
+    array_start_delim_char = '['
+    array_end_delim_char = ']'
+    
+    def tokenize_value_parts(parts):
+        """
+        @param parts: value parts of an entry
+        @type parts: L{list} of L{str}
+        
+        @return: parts joined by L{split_char} if first part
+            does not start with L{array_start_delim_char}, list
+            representation of array string otherwise (see
+            L{gnw.mosel.MoselInitFileParser.parse_array_string})
+        @rtype: L{str} or L{list} [of L{list}] of L{str}
+        
+        @raise ValueError: if array string cannot be parsed
+        """
+        cls = MoselInitFileTokenizer
+        if not parts[0].startswith( cls.array_start_delim_char ):
+            return cls.split_char.join( parts )
+        
+        tokens = []
+        for part in parts:
+            tokens.extend( part.split( cls.split_char ) )
+            
+        theList = cls.tokenize_array( tokens )
+        if theList is None:
+            theList = MoselInitFileParser.parse_array_string( cls.split_char.join( parts ),
+                                                              cls.strip_chars,
+                                                              cls.split_char,
+                                                              cls.array_start_delim_char,
+                                                              cls.array_end_delim_char )
+        return theList
+
+    tokenize_value_parts = staticmethod( tokenize_value_parts )
+
+
+    def tokenize_array(tokens):
+        """
+        @param tokens: array string split at L{split_char}
+        @type tokens: L{list} of L{str}
+        
+        @return: list representation of array string with
+            its innermost values being strings, or None if tokens
+            do not meet the requirements of the tokenizer
+        @rtype: L{list} [of L{list}] of L{str}, or None
+        """
+        cls = MoselInitFileTokenizer
+        start = cls.array_start_delim_char
+        end = cls.array_end_delim_char
+        
+        # trim tokens that the parser would strip off
+        # the ends of the array string
+        s = 0
+        e = len( tokens )
+        while s < e and not tokens[s].strip( cls.strip_chars ):
+            s += 1
+        while e > s and not tokens[e-1].strip( cls.strip_chars ):
+            e -= 1
+        if e - s < 2 or tokens[s] != start or tokens[e-1] != end:
+            return None
+        s += 1
+        e -= 1
+        
+        while s < e and not tokens[s].strip( cls.strip_chars ):
+            s += 1
+        while e > s and not tokens[e-1].strip( cls.strip_chars ):
+            e -= 1
+
+        if s < e and tokens[s] == start and tokens[e-1] == end:
+            # list of lists, tokens outside of sub-lists are ignored
+            theList = []
+            row = None
+            for i in xrange( s, e ):
+                token = tokens[i]
+                if token == start:
+                    if row is not None:
+                        return None
+                    row = []
+                elif token == end:
+                    if row is not None:
+                        theList.append( cls.trim_terminal_tokens( row ) )
+                        row = None
+                elif start in token or end in token:
+                    return None
+                elif row is not None:
+                    row.append( token.strip( cls.strip_chars ) )
+            return theList
+        
+        # list of terminal symbols
+        for i in xrange( s, e ):
+            if ( start in tokens[i] or end in tokens[i] ) \
+            and tokens[i] != start and tokens[i] != end:
+                return None
+        return cls.trim_terminal_tokens( [tokens[i].strip( cls.strip_chars ) for i in xrange( s, e )] )
+
+    tokenize_array = staticmethod( tokenize_array )
+
+
+    def trim_terminal_tokens(theList):
+        """
+        @param theList: stripped terminal tokens of an array
+        @type theList: L{list} of L{str}
+        
+        @return: theList without leading and trailing empty tokens,
+            [''] if all tokens are empty
+        @rtype: L{list} of L{str}
+        """
+        s = 0
+        e = len( theList )
+        while s < e and not theList[s]:
+            s += 1
+        while e > s and not theList[e-1]:
+            e -= 1
+        if s == e:
+            return ['']
+        return theList[s:e]
+
+    trim_terminal_tokens = staticmethod( trim_terminal_tokens )
+
     
 class MoselInitFileParser:
     """
@@ -20,8 +20,11 @@ using appropriate constraints
 import numpy
 import pulp
 
-from gnw.entity import FmtDictEntry 
+from gnw.entity import Entity, FmtDictEntry 
 from gnw.container_entity import ContainerEntity
+from gnw.time_grid import TimeGrid
+from gnw.lp_var_registry import LpVarRegistry
+from gnw.sparse_model import SparseModel
 from gnw.storage import Storage
 from gnw.supplier import Supplier
 from gnw.firm_profile import FirmProfile
@@ -52,6 +55,10 @@ class Network( ContainerEntity ):
         factor.
     @type DISCOUNT_FACTOR: L{numpy.array} of dtype='double'
         of length len(L{DISPATCH_PERIOD})
+
+    @ivar lp_var_bound_dict: original (lower, upper) bounds of
+        the lp variables tightened by L{presolve_constraints}
+    @type lp_var_bound_dict: L{dict} with L{pulp.LpVariable} keys
     """
     entity_type_list = (Storage,
                         Supplier,
@@ -83,6 +90,7 @@ class Network( ContainerEntity ):
         """
         super( Network, self ).__init__( name, Network.entity_type_list, entityList )
         
+        self.lp_var_bound_dict = {}
         self.set_DISCOUNT_FACTOR( discountFactor )
         self.set_DISPATCH_PERIOD( dispatchPeriod )
         
@@ -125,24 +133,49 @@ class Network( ContainerEntity ):
 
     def set_DISPATCH_PERIOD(self, value):
         """
-        Sets dispatch period in super class and
-        sets coefficient arrays to appropriate
-        size.
+        Creates the network's time grid, sets its
+        dispatch periods in super class, i.e., in
+        all entities the network contains, and shares
+        it with these entities (see
+        L{gnw.entity.Entity.set_TIME_GRID}), such that
+        network and entities hold references to the
+        arrays of the time grid instead of copies.
         
         @param value: dispatch periods
         @type value: L{list} of L{float} or
             L{numpy.array} of dtype='double'
         """
-        super( Network, self ).set_DISPATCH_PERIOD( value )
+        value = conditional( value is None, [], value )
         
-        nSteps = len( self.DISPATCH_PERIOD )
+        nSteps = len( value )
         
         # DISCOUNT_FACTOR
-        self.DISCOUNT_FACTOR = \
+        DISCOUNT_FACTOR = \
             self.create_coefficient_array( self.DISCOUNT_FACTOR,
                                            nSteps,
                                            "Length of 'discountFactor' must match length of 'DISPATCH_PERIOD' (gnw.network.Network.set_DISPATCH_PERIOD)" )
         
+        time_grid = TimeGrid( value, DISCOUNT_FACTOR )
+        self.DISCOUNT_FACTOR = time_grid.DISCOUNT_FACTOR
+        super( Network, self ).set_DISPATCH_PERIOD( time_grid.DISPATCH_PERIOD )
+        self.set_TIME_GRID( time_grid )
+        
+
+    def create_lp_vars(self, prefix=""):
+        """
+        Shares a new lp variable registry with all entities
+        the network contains (see
+        L{gnw.entity.Entity.set_LP_VAR_REGISTRY}) and
+        creates lp variables in super class.
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        self.set_LP_VAR_REGISTRY( LpVarRegistry() )
+        
+        super( Network, self ).create_lp_vars( prefix )
+        
 
     def create_model(self, prefix=""):
         """
@@ -171,12 +204,279 @@ class Network( ContainerEntity ):
         # of volumes dispatched over all storages, all supply contracts,
         # and volumes bought/sold through markets and volumes from
         # firm profiles must equate to zero.
+        mrkt_list = self.get_entity_list( Market )
+        strg_list = self.get_entity_list( Storage )
+        splr_list = self.get_entity_list( Supplier )
+        frm_list = self.get_entity_list( FirmProfile )
         for t in xrange( nSteps ):
             self.constraint_list.append( 0.0 == \
-                pulp.lpSum( [-mrkt.vol[t] for mrkt in self.get_entity_list( Market )] ) + \
-                pulp.lpSum( [-strg.SB*strg.vol[t] for strg in self.get_entity_list( Storage )] ) + \
-                pulp.lpSum( [-splr.SB*splr.vol[t] for splr in self.get_entity_list( Supplier )] ) + \
-                pulp.lpSum( [-frm.SB*frm.vol[t] for frm in self.get_entity_list( FirmProfile )] ) )
+                pulp.lpSum( [-mrkt.vol[t] for mrkt in mrkt_list] ) + \
+                pulp.lpSum( [-strg.SB*strg.vol[t] for strg in strg_list] ) + \
+                pulp.lpSum( [-splr.SB*splr.vol[t] for splr in splr_list] ) + \
+                pulp.lpSum( [-frm.SB*frm.vol[t] for frm in frm_list] ) )
+
+
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the network
+        balance rows (see L{create_constraints}) to model as
+        a block of column indices and calls
+        L{gnw.entity.Entity.create_sparse_model} on all
+        entities the network contains.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        Entity.create_model( self, prefix )
+        
+        mrkt_list = self.get_entity_list( Market )
+        item_list = self.get_entity_list( Storage ) \
+            + self.get_entity_list( Supplier ) \
+            + self.get_entity_list( FirmProfile )
+        
+        # Network balance equation, see create_constraints
+        col = numpy.column_stack( [mrkt.get_lp_var_indices( "vol" ) for mrkt in mrkt_list]
+                                  + [item.get_lp_var_indices( "vol" ) for item in item_list] )
+        model.add_rows( self, col, [-1.0]*len( mrkt_list ) + [-item.SB for item in item_list], model.EQ, 0.0 )
+        
+        for item in self.get_entity_list():
+            item.create_sparse_model( model, prefix )
+
+
+    def get_sparse_model(self, prefix="", presolve=False):
+        """
+        Builds the model of the network as sparse matrix
+        (see L{create_sparse_model}) over the columns of
+        the network's lp variable registry, i.e.,
+        L{create_lp_vars} must have been called before.
+        Other than L{create_model} no L{pulp} objects are
+        created for entities that add their rows natively.
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        
+        @param presolve: flags whether singleton rows are
+            substituted by bounds and fixed variables folded
+            into right hand sides (see
+            L{gnw.sparse_model.SparseModel.presolve})
+        @type presolve: L{bool}
+        
+        @return: compiled sparse model
+        @rtype: L{gnw.sparse_model.SparseModel}
+        """
+        model = SparseModel( self.get_LP_VAR_REGISTRY() )
+        self.create_sparse_model( model, prefix )
+        model.compile()
+        if presolve:
+            model.presolve()
+        return model
+
+
+    def populate(self, problem, presolve=False):
+        """
+        Sets the objective function of problem and adds the
+        constraints of self and of all entities it contains in
+        a single pass, i.e., in the order of L{iter_constraints}.
+        Other than C{problem += constraint}, unnamed constraints
+        are inserted under precomputed names, using pulp's
+        naming scheme '_C<n>' (see
+        L{pulp.LpProblem.unusedConstraintName}), and the lp
+        variables of all constraints are registered with problem
+        at once. Named constraints are added by
+        L{pulp.LpProblem.addConstraint}, which checks for
+        overlapping names. The resulting problem equals the one
+        built by C{problem += constraint} per constraint; as
+        populate writes to the internal state of
+        L{pulp.LpProblem} (constraints, lastUnused,
+        modifiedConstraints), the pulp version is pinned in
+        setup.py.
+        
+        @param problem: lp problem to be populated
+        @type problem: L{pulp.LpProblem}
+        
+        @param presolve: flags whether singleton constraints are
+            substituted by bounds and fixed lp variables folded
+            into constants (see L{presolve_constraints}). The
+            constraints of the entities are kept, presolve works
+            on copies, whereas the tightened bounds need to be
+            restored after solving (see L{restore_lp_var_bounds}).
+        @type presolve: L{bool}
+        
+        @return: number of constraints (rows) each entity
+            contributed, in order of insertion
+        @rtype: L{list} of (L{gnw.entity.Entity}, L{int}) tuples
+        
+        @raise TypeError: a constraint is not a
+            L{pulp.LpConstraint}
+        """
+        self.restore_lp_var_bounds()
+        objective = self.get_objective()
+        
+        constraint_list_list = [(entity, entity.constraint_list) for entity in self.iter_entities()]
+        if presolve:
+            constraint_list_list = [(entity, [pulp.LpConstraint( constraint, constraint.sense, constraint.name )
+                                              for constraint in constraint_list])
+                                    for entity, constraint_list in constraint_list_list]
+            kept = set( [id( constraint ) for constraint in
+                         self.presolve_constraints( objective,
+                                                    [constraint for entity, constraint_list in constraint_list_list
+                                                     for constraint in constraint_list] )] )
+            constraint_list_list = [(entity, [constraint for constraint in constraint_list if id( constraint ) in kept])
+                                    for entity, constraint_list in constraint_list_list]
+        
+        constraints = problem.constraints
+        inserted_list = []
+        var_dict = {}
+        row_count_list = []
+        for entity, constraint_list in constraint_list_list:
+            for constraint in constraint_list:
+                if not isinstance( constraint, pulp.LpConstraint ):
+                    raise TypeError, "populate: constraint of '%s' is not a 'pulp.LpConstraint'" % entity.name
+                if constraint.name:
+                    # keeps modifiedConstraints in order of insertion
+                    problem.modifiedConstraints.extend( inserted_list )
+                    inserted_list = []
+                    problem.addConstraint( constraint )
+                    continue
+                problem.lastUnused += 1
+                name = "_C%d" % problem.lastUnused
+                while name in constraints:
+                    problem.lastUnused += 1
+                    name = "_C%d" % problem.lastUnused
+                constraints[name] = constraint
+                inserted_list.append( constraint )
+                var_dict.update( constraint )
+            row_count_list.append( (entity, len( constraint_list )) )
+        
+        problem.modifiedConstraints.extend( inserted_list )
+        var_dict.update( objective )
+        problem.addVariables( var_dict.keys() )
+        problem.objective = objective
+        
+        return row_count_list
+
+
+    def presolve_constraints(self, objective, constraint_list, tol=1.0e-9):
+        """
+        Substitutes constraints over a single lp variable by
+        bounds of the lp variable, and folds lp variables with
+        equal lower and upper bound into the constants of the
+        constraints using them and of objective. Both steps are
+        repeated while constraints become singletons, analogous
+        to L{gnw.sparse_model.SparseModel.presolve}. Note that
+        the constraints and the objective are modified in place,
+        i.e., need to be copies (see L{populate}). The original
+        bounds of the lp variables are recorded in
+        L{lp_var_bound_dict} (see L{restore_lp_var_bounds}).
+        
+        As pulp only writes lp variables used by constraints or
+        the objective, the solution values of folded lp variables
+        are set here, and a substituted constraint is kept if its
+        lp variable is not fixed and not used otherwise.
+        
+        @param objective: objective function
+        @type objective: L{pulp.LpAffineExpression}
+        
+        @param constraint_list: constraints
+        @type constraint_list: L{list} of L{pulp.LpConstraint}
+        
+        @param tol: tolerance for rounding bounds of integer lp
+            variables and for checking constraints without
+            lp variables
+        @type tol: L{float}
+        
+        @return: constraints not substituted, in order of
+            constraint_list. Constraints without lp variables
+            are kept only if violated.
+        @rtype: L{list} of L{pulp.LpConstraint}
+        """
+        occurrence_dict = {}
+        for constraint in constraint_list:
+            for lp_var in constraint.iterkeys():
+                occurrence_dict.setdefault( lp_var, [] ).append( constraint )
+        
+        removed = set()
+        substituted = set()
+        bound_dict = {}
+        queue = [constraint for constraint in constraint_list if len( constraint ) <= 1]
+        fixed_queue = [lp_var for lp_var in occurrence_dict
+                       if lp_var.lowBound is not None and lp_var.lowBound == lp_var.upBound]
+        while queue or fixed_queue:
+            if fixed_queue:
+                lp_var = fixed_queue.pop()
+                if lp_var in substituted:
+                    continue
+                substituted.add( lp_var )
+                value = lp_var.lowBound
+                lp_var.varValue = value
+                for constraint in occurrence_dict[lp_var]:
+                    if id( constraint ) in removed or lp_var not in constraint:
+                        continue
+                    constraint.constant += constraint.pop( lp_var )*value
+                    if len( constraint ) <= 1:
+                        queue.append( constraint )
+                if objective is not None and lp_var in objective:
+                    objective.constant += objective.pop( lp_var )*value
+                continue
+            
+            constraint = queue.pop()
+            if id( constraint ) in removed:
+                continue
+            if len( constraint ) == 0:
+                # constraint reads 'constant (sense) 0'
+                if constraint.sense*constraint.constant >= -tol and \
+                   (constraint.sense != pulp.LpConstraintEQ or abs( constraint.constant ) <= tol):
+                    removed.add( id( constraint ) )
+                continue
+            
+            # constraint reads 'a*lp_var + constant (sense) 0'
+            lp_var, a = constraint.items()[0]
+            if lp_var not in self.lp_var_bound_dict:
+                self.lp_var_bound_dict[lp_var] = (lp_var.lowBound, lp_var.upBound)
+            bound = -constraint.constant/a
+            sense = conditional( a < 0.0, -constraint.sense, constraint.sense )
+            if sense != pulp.LpConstraintGE:
+                if lp_var.cat == pulp.LpInteger:
+                    bound = float( numpy.floor( bound + tol ) )
+                if lp_var.upBound is None or bound < lp_var.upBound:
+                    lp_var.upBound = bound
+            if sense != pulp.LpConstraintLE:
+                if lp_var.cat == pulp.LpInteger:
+                    bound = float( numpy.ceil( -constraint.constant/a - tol ) )
+                if lp_var.lowBound is None or bound > lp_var.lowBound:
+                    lp_var.lowBound = bound
+            removed.add( id( constraint ) )
+            bound_dict[lp_var] = constraint
+            if lp_var.lowBound is not None and lp_var.lowBound == lp_var.upBound:
+                fixed_queue.append( lp_var )
+        
+        used = set( objective is not None and objective.keys() or [] )
+        for constraint in constraint_list:
+            if id( constraint ) not in removed:
+                used.update( constraint.iterkeys() )
+        for lp_var, constraint in bound_dict.iteritems():
+            if lp_var not in used and lp_var not in substituted:
+                removed.discard( id( constraint ) )
+        
+        return [constraint for constraint in constraint_list if id( constraint ) not in removed]
+
+
+    def restore_lp_var_bounds(self):
+        """
+        Restores the bounds of the lp variables tightened by
+        L{presolve_constraints}. Called by L{populate}, and
+        to be called once a presolved problem is solved.
+        """
+        for lp_var, (lowBound, upBound) in self.lp_var_bound_dict.iteritems():
+            lp_var.lowBound = lowBound
+            lp_var.upBound = upBound
+        self.lp_var_bound_dict = {}
 
 
     def update_fmt_dict(self, fmt_dict={}):
@@ -15,8 +15,16 @@
 """
 gnw: provides factory for L{gnw.network.Network} objects
 """
+import numpy
+
 from gnw.network import Network
+from gnw.entity import Entity
+from gnw.storage import Storage
+from gnw.supplier import Supplier
+from gnw.firm_profile import FirmProfile
+from gnw.time_grid import TimeGrid
 from gnw.util import dbg_print
+from gnw.util import conditional
 
 from gnw.storage_factory import StorageFactory
 from gnw.supplier_factory import SupplierFactory
@@ -84,10 +92,14 @@ class NetworkFactory( object ):
     Create = staticmethod( Create )
 
 
-    def CreateFromDataDict( ntwrk_dict={}, data_dict={}, verbose=False):
+    def CreateFromDataDict( ntwrk_dict={}, data_dict={}, verbose=False, entity_list=[]):
         """
         Creates a L{gnw.network.Network} instance and encapsulated
-        entity objects from given inputs.
+        entity objects from given inputs. Storages, suppliers
+        and firm profiles given in entity_list are taken as is
+        rather than created from the coefficient dictionaries
+        of the same names, which are not accessed then, i.e.,
+        not read if read lazily (see L{gnw.reader.read_coeffs}).
         
         @param ntwrk_dict: passed as is as first argument to
             factory function L{gnw.network_factory.NetworkFactory.Create}
@@ -129,6 +141,12 @@ class NetworkFactory( object ):
         @param verbose: whether to print progress messages to
              the console, or be quiet
         @type verbose: L{bool} 
+        
+        @param entity_list: storages, suppliers and firm profiles
+            created previously from the same coefficients, for
+            the same dispatch periods and discount factors (see
+            L{RebuildFromDataDict})
+        @type entity_list: L{list} of L{gnw.entity.Entity}
             
         @return: reference to L{gnw.network.Network} instance 
         """
@@ -150,6 +168,15 @@ class NetworkFactory( object ):
         if 'DISCOUNT_FACTOR' in mrkt_dict:
             DISCOUNT_FACTOR = mrkt_dict['DISCOUNT_FACTOR']
         
+        # all entities share the read-only arrays of one time grid
+        # by reference instead of copying the input arrays, see
+        # gnw.time_grid.TimeGrid.share_array
+        time_grid = TimeGrid( DISPATCH_PERIOD, DISCOUNT_FACTOR )
+        DISPATCH_PERIOD = time_grid.DISPATCH_PERIOD
+        DISCOUNT_FACTOR = time_grid.DISCOUNT_FACTOR
+        data_dict = dict( data_dict )
+        data_dict['MRKT_DICT'] = dict( mrkt_dict, DISPATCH_PERIOD = DISPATCH_PERIOD, DISCOUNT_FACTOR = DISCOUNT_FACTOR )
+        
     
         strg_dict_list = {}
         if 'STRG_DICT_LIST' in data_dict:
@@ -162,6 +189,13 @@ class NetworkFactory( object ):
             frm_dict_list = data_dict['FRM_DICT_LIST']
             
         
+        # entities to be reused by entity type and name
+        reused_dict = dict( [(entity_type, {}) for entity_type in Network.entity_type_list] )
+        for entity in entity_list:
+            for entity_type in reused_dict:
+                if isinstance( entity, entity_type ):
+                    reused_dict[entity_type][entity.name] = entity
+        
         dbg_print( "... initialising network '%s'" % ntwrk_dict['NAME'], verbose )
         ntwrk_entity_list = []
         
@@ -173,8 +207,12 @@ class NetworkFactory( object ):
                 raise ValueError, "value for 'nStrgs' does not match length of list 'STRG_DICT_LIST'"
             
             dbg_print( "initialising storages ...", verbose )
-            for strg_dict in strg_dict_list.itervalues():
-                dbg_print( "... storage '%s'" % strg_dict['NAME'], verbose )
+            for name, strg_dict in strg_dict_list.iteritems():
+                if name in reused_dict[Storage]:
+                    dbg_print( "... storage '%s' (unchanged)" % name, verbose )
+                    ntwrk_entity_list.append( reused_dict[Storage][name] )
+                    continue
+                dbg_print( "... storage '%s'" % name, verbose )
                 strg = StorageFactory.Create( strg_dict, DISCOUNT_FACTOR, DISPATCH_PERIOD )
                 ntwrk_entity_list.append( strg )
         
@@ -186,8 +224,12 @@ class NetworkFactory( object ):
                 raise ValueError, "value for 'nSplrs' does not match length of list 'SPLR_DICT_LIST'"
             
             dbg_print( "initialising suppliers ...", verbose )
-            for splr_dict in splr_dict_list.itervalues():
-                dbg_print( "... supplier '%s'" % splr_dict['NAME'], verbose )
+            for name, splr_dict in splr_dict_list.iteritems():
+                if name in reused_dict[Supplier]:
+                    dbg_print( "... supplier '%s' (unchanged)" % name, verbose )
+                    ntwrk_entity_list.append( reused_dict[Supplier][name] )
+                    continue
+                dbg_print( "... supplier '%s'" % name, verbose )
                 splr = SupplierFactory.Create( splr_dict, DISCOUNT_FACTOR, DISPATCH_PERIOD )
                 ntwrk_entity_list.append( splr )
         
@@ -199,8 +241,12 @@ class NetworkFactory( object ):
                 raise ValueError, "value for 'nFrmPrfls' does not match length of list 'FRM_DICT_LIST'"
             
             dbg_print( "initialising firm profiles ...", verbose )
-            for frm_dict in frm_dict_list.itervalues():
-                dbg_print( "... firm profile '%s'" % frm_dict['NAME'], verbose )
+            for name, frm_dict in frm_dict_list.iteritems():
+                if name in reused_dict[FirmProfile]:
+                    dbg_print( "... firm profile '%s' (unchanged)" % name, verbose )
+                    ntwrk_entity_list.append( reused_dict[FirmProfile][name] )
+                    continue
+                dbg_print( "... firm profile '%s'" % name, verbose )
                 frm = FirmProfileFactory.Create( frm_dict, DISCOUNT_FACTOR, DISPATCH_PERIOD )
                 ntwrk_entity_list.append( frm )
     
@@ -213,6 +259,53 @@ class NetworkFactory( object ):
     CreateFromDataDict = staticmethod( CreateFromDataDict )
 
 
+    def RebuildFromDataDict( ntwrk, data_dict={}, name_set_dict={}, verbose=False):
+        """
+        Creates a L{gnw.network.Network} instance from data_dict
+        like L{CreateFromDataDict}, e.g., for a scenario of the
+        data ntwrk has been created from. The storages, suppliers
+        and firm profiles of ntwrk named in name_set_dict are
+        reused, provided ntwrk has the dispatch periods and
+        discount factors given in data_dict. All entities are
+        created anew otherwise.
+        
+        @param ntwrk: network created previously
+        @type ntwrk: L{gnw.network.Network}
+        
+        @param data_dict: see L{CreateFromDataDict}
+        @type data_dict: L{dict}
+        
+        @param name_set_dict: names of the entities with unchanged
+            coefficients per data dictionary key, e.g., as returned
+            by L{gnw.reader.get_unchanged_entity_names}
+        @type name_set_dict: L{dict} of L{set} of L{str}
+        
+        @param verbose: see L{CreateFromDataDict}
+        @type verbose: L{bool}
+        
+        @return: reference to L{gnw.network.Network} instance 
+        """
+        mrkt_dict = data_dict.get( 'MRKT_DICT', {} )
+        DISPATCH_PERIOD = numpy.array( mrkt_dict.get( 'DISPATCH_PERIOD', [] ), dtype='double' )
+        DISCOUNT_FACTOR = mrkt_dict.get( 'DISCOUNT_FACTOR', None )
+        
+        entity_list = []
+        if numpy.array_equal( DISPATCH_PERIOD, ntwrk.DISPATCH_PERIOD ) \
+        and numpy.array_equal( Entity.create_coefficient_array( conditional( DISCOUNT_FACTOR is None, 1.0, DISCOUNT_FACTOR ),
+                                                                len( DISPATCH_PERIOD ),
+                                                                "Length of 'DISCOUNT_FACTOR' must match length of 'DISPATCH_PERIOD' (gnw.network_factory.NetworkFactory.RebuildFromDataDict)" ),
+                               ntwrk.DISCOUNT_FACTOR ):
+            for list_key, entity_type in [('STRG_DICT_LIST', Storage),
+                                          ('SPLR_DICT_LIST', Supplier),
+                                          ('FRM_DICT_LIST',  FirmProfile)]:
+                name_set = name_set_dict.get( list_key, set() )
+                entity_list += [entity for entity in ntwrk.get_entity_list( entity_type ) if entity.name in name_set]
+        
+        return NetworkFactory.CreateFromDataDict( {'NAME' : ntwrk.name}, data_dict, verbose, entity_list )
+    
+    RebuildFromDataDict = staticmethod( RebuildFromDataDict )
+
+
 
 if __name__ == "__main__" :
     print "gnw.network_factory.py"
@@ -18,7 +18,7 @@ gnw: provides standard product abstraction
 import numpy
 import pulp
 
-from gnw.entity import FmtDictEntry 
+from gnw.entity import Entity, FmtDictEntry 
 from gnw.container_entity import ContainerEntity
 
 from gnw.tranche import Tranche
@@ -116,12 +116,13 @@ class Product( ContainerEntity ):
 
     @ivar vol: lp decision variables representing the volume
         in [MWh] of the standard product during each
-        L{gnw.entity.Entity.DISPATCH_PERIOD}. They are equal
-        to 0 for dispatch periods not belonging to the
-        products delivery period and
+        L{gnw.entity.Entity.DISPATCH_PERIOD} of the products
+        delivery period only, i.e., vol[t - DELIVERY_PERIOD[0]] equals
         L{gnw.entity.Entity.DISPATCH_PERIOD}[t]*L{gnw.product.Product.pos}, 
         forall t in xrange( DELIVERY_PERIOD[0], DELIVERY_PERIOD[1] + 1 ).
-    @type vol: L{pulp.LpVariable}
+        The volume is 0 for all other dispatch periods (see
+        L{get_vol_values}).
+    @type vol: L{numpy.array} of L{pulp.LpVariable}
     """
     entity_type_list = (Tranche,)
 
@@ -195,7 +196,9 @@ class Product( ContainerEntity ):
             or L{numpy.array} of dtype='double'
         """
         # filter out the tranches that matter for
-        # this product
+        # this product (the factories hand each product
+        # its tranches only, see
+        # gnw.product_factory.ProductFactory.CreateTrancheIndex)
         entity_list = [item for item in entityList \
                        if isinstance( item, Product.entity_type_list ) \
                        and item.SB == sellbuy \
@@ -382,14 +385,14 @@ class Product( ContainerEntity ):
         """
         super( Product, self ).create_lp_vars( prefix )
         
-        nSteps = len( self.DISPATCH_PERIOD )
+        nDlvr = self.DELIVERY_PERIOD[1] + 1 - self.DELIVERY_PERIOD[0]
         
-        self.pos = pulp.LpVariable( prefix + self.name + "_pos" , lowBound = 0.0 )
+        self.create_lp_var_block( "pos", prefix + self.name + "_pos", (), lowBound = 0.0 )
         
-        self.num_clips = pulp.LpVariable( prefix + self.name + "_num_clips", lowBound = 0, cat = pulp.LpInteger )
-        self.semcont_trig = pulp.LpVariable( prefix + self.name + "_semcont_trig", lowBound = 0, upBound = 1, cat = pulp.LpInteger )
+        self.create_lp_var_block( "num_clips", prefix + self.name + "_num_clips", (), lowBound = 0, cat = pulp.LpInteger )
+        self.create_lp_var_block( "semcont_trig", prefix + self.name + "_semcont_trig", (), lowBound = 0, upBound = 1, cat = pulp.LpInteger )
 
-        self.vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_vol", range( nSteps ) ) )
+        self.create_lp_var_block( "vol", prefix + self.name + "_vol", nDlvr )
         
         
     def create_model(self, prefix=""):
@@ -408,9 +411,7 @@ class Product( ContainerEntity ):
         """
         super( Product, self ).create_model( prefix )
 
-        nSteps = len( self.DISPATCH_PERIOD )
-        deliveryPeriodIdx = [t for t in xrange( nSteps ) if self.DELIVERY_PERIOD[0] <= t and t <= self.DELIVERY_PERIOD[1]]
-        nonDeliveryPeriodIdx = [t for t in xrange( nSteps ) if t < self.DELIVERY_PERIOD[0] or self.DELIVERY_PERIOD[1] < t]
+        start = self.DELIVERY_PERIOD[0]
 
         if self.CAPACITY_LIMIT[0] is not None and self.CAPACITY_LIMIT[0] > 0.0:
             if self.CAPACITY_LIMIT[1] is None:
@@ -424,10 +425,8 @@ class Product( ContainerEntity ):
             self.constraint_list.append( self.pos == self.num_clips*self.CLIP_SIZE )
             self.constraint_list.append( self.num_clips*self.CLIP_SIZE <= self.CAPACITY_LIMIT[1] ) 
         
-        for t in deliveryPeriodIdx:
-            self.constraint_list.append( self.vol[t] == (self.pos + self.CURRENT_POSITION)*self.DISPATCH_PERIOD[t] )
-        for t in nonDeliveryPeriodIdx:
-            self.constraint_list.append( self.vol[t] == 0.0 )
+        for i in xrange( len( self.vol ) ):
+            self.constraint_list.append( self.vol[i] == (self.pos + self.CURRENT_POSITION)*self.DISPATCH_PERIOD[start + i] )
 
         # Standard product/trade tranche balance equation: The position
         # for a given standard product with given delivery period and
@@ -436,14 +435,69 @@ class Product( ContainerEntity ):
         # to the sum of the positions of all trade tranches with
         # equivalent features (it is assumed that there exists at least
         # one trade tranche with exactly such equivalent features in
-        # the network).
+        # the network), i.e., of all trade tranches of the product.
         self.constraint_list.append( self.pos == \
-            pulp.lpSum( [trn.pos for trn in self.get_entity_list( Tranche )
-                         if trn.SB == self.SB and \
-                         trn.DELIVERY_PERIOD[0] == self.DELIVERY_PERIOD[0] and
-                         trn.DELIVERY_PERIOD[1] == self.DELIVERY_PERIOD[1]] ) )
+            pulp.lpSum( [trn.pos for trn in self.get_entity_list( Tranche )] ) )
 
         self.objective_list.append( self.get_objective_value() )
+
+
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the rows and
+        objective terms of the product model (see L{create_model})
+        to model as blocks of column indices and calls
+        L{gnw.tranche.Tranche.create_sparse_model} on all
+        tranches the product contains.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model of self only, not of the tranches
+        Entity.create_model( self, prefix )
+        
+        start = self.DELIVERY_PERIOD[0]
+        final = self.DELIVERY_PERIOD[1]
+        
+        pos = self.get_lp_var_indices( "pos" ).reshape( 1 )
+        num_clips = self.get_lp_var_indices( "num_clips" ).reshape( 1 )
+        semcont_trig = self.get_lp_var_indices( "semcont_trig" ).reshape( 1 )
+        vol = self.get_lp_var_indices( "vol" )
+        
+        if self.CAPACITY_LIMIT[0] is not None and self.CAPACITY_LIMIT[0] > 0.0:
+            if self.CAPACITY_LIMIT[1] is None:
+                self.CAPACITY_LIMIT[1] = __very_large_positive_number__
+            model.add_rows( self, numpy.column_stack( (semcont_trig, pos) ), (self.CAPACITY_LIMIT[0], -1.0), model.LE, 0.0 )
+            model.add_rows( self, numpy.column_stack( (pos, semcont_trig) ), (1.0, -self.CAPACITY_LIMIT[1]), model.LE, 0.0 )
+        elif self.CAPACITY_LIMIT[1] is not None:
+            model.add_rows( self, pos, 1.0, model.LE, self.CAPACITY_LIMIT[1] )
+        
+        if self.CLIP_SIZE is not None and self.CLIP_SIZE > 0.0:
+            model.add_rows( self, numpy.column_stack( (pos, num_clips) ), (1.0, -self.CLIP_SIZE), model.EQ, 0.0 )
+            # a missing upper limit yields right hand side 0 as for
+            # the pulp constraint (pulp drops None terms)
+            model.add_rows( self, num_clips, self.CLIP_SIZE, model.LE, conditional( self.CAPACITY_LIMIT[1] is None, 0.0, self.CAPACITY_LIMIT[1] ) )
+        
+        # vol[i] == (pos + CURRENT_POSITION)*DISPATCH_PERIOD[start + i]
+        DP = numpy.asarray( self.DISPATCH_PERIOD[start:final + 1], dtype='double' )
+        model.add_rows( self, numpy.column_stack( (vol, numpy.repeat( pos, len( vol ) )) ),
+                        numpy.column_stack( (numpy.ones( len( vol ) ), -DP) ), model.EQ, self.CURRENT_POSITION*DP )
+        
+        # standard product/trade tranche balance equation, see create_model
+        trn_list = self.get_entity_list( Tranche )
+        model.add_rows( self, numpy.concatenate( [pos] + [trn.get_lp_var_indices( "pos" ).reshape( 1 ) for trn in trn_list] ).reshape( 1, -1 ),
+                        [1.0] + [-1.0]*len( trn_list ), model.EQ, 0.0 )
+        
+        # mark to market value, see get_mark_to_market_value
+        dtdf_sum = self.get_TIME_GRID().get_dtdf_sum( start, final )
+        model.add_objective( pos, self.SB*self.MID_PRICE*dtdf_sum, self.SB*self.MID_PRICE*self.CURRENT_POSITION*dtdf_sum )
+        
+        for trn in trn_list:
+            trn.create_sparse_model( model, prefix )
             
 
     def get_lp_vars(self):
@@ -460,6 +514,19 @@ class Product( ContainerEntity ):
             + [self.pos, self.semcont_trig, self.num_clips] 
 
 
+    def get_vol_values(self):
+        """
+        @return: solution values of the volume lp variables
+            L{vol} over all dispatch periods, 0 outside of the
+            delivery period and NaN for lp variables without
+            value (see L{gnw.entity.Entity.get_lp_var_solution})
+        @rtype: L{numpy.array} of dtype='double'
+        """
+        vol = numpy.zeros( len( self.DISPATCH_PERIOD ), dtype='double' )
+        vol[self.DELIVERY_PERIOD[0]:self.DELIVERY_PERIOD[1] + 1] = self.get_lp_var_solution( "vol" )
+        return vol
+
+
     def update_fmt_dict(self, fmt_dict={}):
         """
         Overwrites base class method by updating
@@ -512,17 +579,17 @@ class Product( ContainerEntity ):
                                                               self.DISCOUNT_FACTOR ),
                          'pos' :                FmtDictEntry( [ self.ffmt ],
                                                               'pos [MW]',
-                                                              0, None, True, self.pos ),
+                                                              0, None, True, self.get_lp_var_solution( "pos" ) ),
                          'num_clips' :          FmtDictEntry( [ self.ifmt ],
                                                               'num_clips',
                                                               0, None, True,
-                                                              self.num_clips ),
+                                                              self.get_lp_var_solution( "num_clips" ) ),
                          'semcont_trig' :       FmtDictEntry( [ self.ifmt ],
                                                               'semcont_trig',
-                                                              0, None, True, self.semcont_trig ),
+                                                              0, None, True, self.get_lp_var_solution( "semcont_trig" ) ),
                          'vol' :                FmtDictEntry( [ self.ffmt ],
                                                               'vol[t] [MWh]',
-                                                              1, (nSteps,), True, self.vol )})
+                                                              1, (nSteps,), True, self.get_vol_values() )})
         super( Product, self ).update_fmt_dict( fmt_dict )
 
 
@@ -537,7 +604,7 @@ class Product( ContainerEntity ):
         mid_price = self.MID_PRICE
         clip_size = self.CLIP_SIZE
         current_pos = self.CURRENT_POSITION
-        pos = self.pos.varValue
+        pos = self.get_lp_var_solution( "pos" )
         
         return (sb, start_idx, final_idx, cap_min, cap_max, mid_price, clip_size, current_pos, pos)
 
@@ -559,14 +626,34 @@ class Product( ContainerEntity ):
         """
         mtm = super( Product, self ).get_mark_to_market_value()
 
-        nSteps = len( self.DISPATCH_PERIOD )
-        deliveryPeriodIdx = [t for t in xrange( nSteps ) if self.DELIVERY_PERIOD[0] <= t and t <= self.DELIVERY_PERIOD[1]]
-        mtm += pulp.LpAffineExpression( self.SB*self.MID_PRICE*self.pos*             sum( [self.DISPATCH_PERIOD[t]*self.DISCOUNT_FACTOR[t] for t in deliveryPeriodIdx] ) )
-        mtm += pulp.LpAffineExpression( self.SB*self.MID_PRICE*self.CURRENT_POSITION*sum( [self.DISPATCH_PERIOD[t]*self.DISCOUNT_FACTOR[t] for t in deliveryPeriodIdx] ) )
+        dtdf_sum = self.get_TIME_GRID().get_dtdf_sum( self.DELIVERY_PERIOD[0], self.DELIVERY_PERIOD[1] )
+        mtm += pulp.LpAffineExpression( self.SB*self.MID_PRICE*self.pos*             dtdf_sum )
+        mtm += pulp.LpAffineExpression( self.SB*self.MID_PRICE*self.CURRENT_POSITION*dtdf_sum )
 
         return mtm
 
 
+    def get_mark_to_market_terms(self):
+        """
+        Returns the constant and the terms of the mark to
+        market value (see
+        L{gnw.entity.Entity.get_mark_to_market_terms}).
+        
+        @return: constant, solution value arrays and
+            coefficient arrays
+        @rtype: L{tuple} of (L{float}, L{list} of L{numpy.array},
+            L{list} of L{numpy.array})
+        """
+        constant, value_list, coeff_list = super( Product, self ).get_mark_to_market_terms()
+
+        dtdf_sum = self.get_TIME_GRID().get_dtdf_sum( self.DELIVERY_PERIOD[0], self.DELIVERY_PERIOD[1] )
+        value_list.append( numpy.array( [self.get_lp_var_solution( "pos" )] ) )
+        coeff_list.append( numpy.array( [self.SB*self.MID_PRICE*dtdf_sum] ) )
+        constant += self.SB*self.MID_PRICE*self.CURRENT_POSITION*dtdf_sum
+
+        return constant, value_list, coeff_list
+
+
     def get_lp_var_values(self, key_list=[]):
         """
         Retrieve solution values of all decision variables
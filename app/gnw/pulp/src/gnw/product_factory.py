@@ -59,7 +59,9 @@ class ProductFactory( object ):
 
         @param entity_list: list of instantiated and initialised
             object instances, being (direct or indirect) sub-class
-            of L{gnw.entity.Entity} and L{gnw.product.Product.entity_type_list}.
+            of L{gnw.entity.Entity} and L{gnw.product.Product.entity_type_list},
+            i.e., the trade tranches of the product (see
+            L{gnw.product_factory.ProductFactory.CreateTrancheIndex}).
         @type entity_list: instances of L{gnw.entity.Entity}
         
         @param discount_factor: discount factor(s) applicable to
@@ -130,6 +132,46 @@ class ProductFactory( object ):
     Create = staticmethod(Create)
 
 
+    def CreateTrancheIndex( trn_list=[] ):
+        """
+        Groups trade tranches by the standard product they
+        belong to, i.e., by sell/buy indicator and delivery
+        period, such that each product is handed exactly its
+        trade tranches (see L{GetTrancheList}).
+        
+        @param trn_list: instantiated and initialised
+            L{gnw.tranche.Tranche} objects
+        @type trn_list: L{list} of L{gnw.tranche.Tranche}
+        
+        @return: trade tranches per (SB, START_IDX, END_IDX)
+        @rtype: L{dict} of L{list} of L{gnw.tranche.Tranche}
+        """
+        trn_index = {}
+        for trn in trn_list:
+            key = (trn.SB, trn.DELIVERY_PERIOD[0], trn.DELIVERY_PERIOD[1])
+            trn_index.setdefault( key, [] ).append( trn )
+        return trn_index
+
+    CreateTrancheIndex = staticmethod( CreateTrancheIndex )
+
+
+    def GetTrancheList( prd_dict={}, trn_index={} ):
+        """
+        @param prd_dict: product dictionary, see L{Create}
+        @type prd_dict: L{dict}
+        
+        @param trn_index: trade tranche index, see
+            L{CreateTrancheIndex}
+        @type trn_index: L{dict}
+        
+        @return: trade tranches of the product given by prd_dict
+        @rtype: L{list} of L{gnw.tranche.Tranche}
+        """
+        return trn_index.get( (prd_dict['SB'], prd_dict['START_IDX'], prd_dict['END_IDX']), [] )
+
+    GetTrancheList = staticmethod( GetTrancheList )
+
+
     def CreateFromDataDict( prd_dict={}, data_dict={}, verbose=False):
         """
         Creates a L{gnw.product.Product} instance and encapsulated
@@ -216,7 +258,8 @@ class ProductFactory( object ):
                 trn = TrancheFactory.Create( trn_dict, DISCOUNT_FACTOR, DISPATCH_PERIOD ) 
                 prd_entity_list.append( trn )
 
-        return ProductFactory.Create( prd_dict, prd_entity_list, DISCOUNT_FACTOR, DISPATCH_PERIOD )
+        trn_index = ProductFactory.CreateTrancheIndex( prd_entity_list )
+        return ProductFactory.Create( prd_dict, ProductFactory.GetTrancheList( prd_dict, trn_index ), DISCOUNT_FACTOR, DISPATCH_PERIOD )
 
     CreateFromDataDict = staticmethod( CreateFromDataDict )
 
@@ -0,0 +1,273 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: Facilitates recording of wall clock time, cpu time and
+peak memory usage of individual (model build) phases
+"""
+import os
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows platforms
+    resource = None
+
+from gnw.container_entity import ContainerEntity
+from gnw.util import conditional
+
+
+class ProfileRecord( object ):
+    """
+    Timing and memory information recorded for one
+    phase, or for one entity within a phase.
+
+    @ivar phase: name of the phase
+    @type phase: L{str}
+
+    @ivar entity: name of the entity, or empty string
+        for network wide phases
+    @type entity: L{str}
+
+    @ivar depth: nesting level of the record, i.e., 0 for
+        phases and 1 + depth of the enclosing record otherwise
+    @type depth: L{int}
+
+    @ivar wall: elapsed wall clock time in seconds [s]
+    @type wall: L{float}
+
+    @ivar cpu: elapsed (user + system) cpu time in seconds [s]
+    @type cpu: L{float}
+
+    @ivar peak_rss: peak resident set size of the process in
+        kilobytes [kB] at the end of the phase, None if not
+        available on the current platform
+    @type peak_rss: L{int} or None
+    """
+    def __init__(self, phase, entity="", depth=0):
+        self.phase = phase
+        self.entity = entity
+        self.depth = depth
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss = None
+
+
+class Profiler( object ):
+    """
+    Records wall clock time, cpu time and peak resident
+    set size for named phases (e.g., reading coefficients,
+    creating the model, solving) and optionally for each
+    entity's L{gnw.entity.Entity.create_lp_vars} and
+    L{gnw.entity.Entity.create_model} (or
+    L{gnw.entity.Entity.create_sparse_model}) calls. If not enabled
+    all methods simply pass calls through, such that clients
+    need not distinguish between profiling and non-profiling
+    runs.
+
+    @ivar enabled: whether information is recorded
+    @type enabled: L{bool}
+
+    @ivar record_list: records in the order the phases
+        have been entered
+    @type record_list: L{list} of L{gnw.profiler.ProfileRecord}
+    """
+    sfmt = "%-s"
+    ffmt = "%.6f"
+    ifmt = "%0d"
+
+    def __init__(self, enabled=True):
+        """
+        @param enabled: whether information is recorded
+        @type enabled: L{bool}
+        """
+        self.enabled = enabled
+        self.record_list = []
+        self.stack = []
+        self.instrumented_list = []
+
+
+    def get_cpu_time():
+        """
+        @return: user plus system cpu time of the process in seconds
+        @rtype: L{float}
+        """
+        times = os.times()
+        return times[0] + times[1]
+
+    get_cpu_time = staticmethod( get_cpu_time )
+
+
+    def get_peak_rss():
+        """
+        @return: peak resident set size of the process in
+            kilobytes, None if not available on the current
+            platform
+        @rtype: L{int} or None
+        """
+        if resource is None:
+            return None
+        return resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+
+    get_peak_rss = staticmethod( get_peak_rss )
+
+
+    def start(self, phase, entity=""):
+        """
+        Enters a phase. Phases may be nested, e.g., an entity's
+        L{gnw.entity.Entity.create_model} call within the
+        network wide 'create_model' phase.
+
+        @param phase: name of the phase
+        @type phase: L{str}
+
+        @param entity: name of the entity
+        @type entity: L{str}
+        """
+        if not self.enabled:
+            return
+        record = ProfileRecord( phase, entity, len( self.stack ) )
+        self.record_list.append( record )
+        self.stack.append( (record, time.time(), self.get_cpu_time()) )
+
+
+    def stop(self):
+        """
+        Leaves the phase most recently entered via L{start}.
+
+        @return: record of the phase left, None if not enabled
+        @rtype: L{gnw.profiler.ProfileRecord} or None
+
+        @raise ValueError: if there is no phase to leave
+        """
+        if not self.enabled:
+            return None
+        if not self.stack:
+            raise ValueError, "stop: no profiling phase has been started"
+        record, wall, cpu = self.stack.pop()
+        record.wall = time.time() - wall
+        record.cpu = self.get_cpu_time() - cpu
+        record.peak_rss = self.get_peak_rss()
+        return record
+
+
+    def call(self, phase, func, *args, **kwargs):
+        """
+        Calls func with given arguments within phase.
+
+        @param phase: name of the phase
+        @type phase: L{str}
+
+        @param func: callable
+
+        @return: return value of func(*args, **kwargs)
+        """
+        self.start( phase )
+        try:
+            return func( *args, **kwargs )
+        finally:
+            self.stop()
+
+
+    def instrument(self, entity, method_name_list=("create_lp_vars", "create_model")):
+        """
+        Replaces the methods named in method_name_list of
+        entity and of all entities it (recursively) contains
+        by wrappers recording a phase per entity and method.
+        Records of container entities include the time spent
+        in the entities they contain. Has no effect if not
+        enabled. Call L{restore} to remove the wrappers.
+
+        @param entity: root of the entity tree, typically
+            a L{gnw.network.Network} instance
+        @type entity: L{gnw.entity.Entity}
+
+        @param method_name_list: names of the methods to be wrapped,
+            e.g., ("create_lp_vars", "create_sparse_model") for
+            models assembled by L{gnw.network.Network.get_sparse_model}.
+            Calls bypassing the entity's attribute (e.g., via super)
+            are not recorded.
+        @type method_name_list: sequence of L{str}
+        """
+        if not self.enabled:
+            return
+        for method_name in method_name_list:
+            setattr( entity, method_name, self.create_wrapper( entity, method_name ) )
+        self.instrumented_list.append( (entity, method_name_list) )
+
+        if isinstance( entity, ContainerEntity ):
+            for item in entity.get_entity_list():
+                self.instrument( item, method_name_list )
+
+
+    def create_wrapper(self, entity, method_name):
+        """
+        @return: function calling entity's bound method method_name
+            within a phase named method_name
+        """
+        method = getattr( entity, method_name )
+        def wrapper(*args, **kwargs):
+            self.start( method_name, entity.name )
+            try:
+                return method( *args, **kwargs )
+            finally:
+                self.stop()
+        return wrapper
+
+
+    def restore(self):
+        """
+        Removes all wrappers installed by L{instrument}.
+        """
+        for entity, method_name_list in self.instrumented_list:
+            for method_name in method_name_list:
+                if method_name in entity.__dict__:
+                    delattr( entity, method_name )
+        self.instrumented_list = []
+
+
+    def write(self, file, sep=";"):
+        """
+        Writes one header line and one line per record
+        to file.
+
+        @param file: file like object
+
+        @param sep: separator character to be used between elements
+        @type sep: L{str}
+        """
+        labels = ["phase", "entity", "depth", "wall [s]", "cpu [s]", "peak_rss [kB]"]
+        print >> file, sep.join( labels ) + sep
+        for record in self.record_list:
+            print >> file, sep.join( [self.sfmt % record.phase,
+                                      self.sfmt % record.entity,
+                                      self.ifmt % record.depth,
+                                      self.ffmt % record.wall,
+                                      self.ffmt % record.cpu,
+                                      conditional( record.peak_rss is None,
+                                                   "N/A",
+                                                   self.ifmt % (record.peak_rss or 0) )] ) + sep
+
+
+
+if __name__ == "__main__":
+    print "gnw.profiler.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
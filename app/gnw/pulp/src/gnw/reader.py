@@ -16,72 +16,424 @@
 gnw: Facilitates reading of problem data from
 initialisation text files
 """
+import os
+import gzip
+import filecmp
+import cPickle
+import cStringIO
+import numpy
+
+from multiprocessing.pool import ThreadPool
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
 from mosel import MoselInitFileReader
+from bundle import read_bundle, write_bundle, is_bundle
  
 from util import conditional
 
-def read_coeffs(data_dir, reader=MoselInitFileReader.read_mosel_init_file):
+from __init__ import __version__
+
+# version of the cache file layout written by save_cached_coeffs,
+# to be increased whenever the layout or the content of data
+# dictionaries returned by read_coeffs changes
+coeff_cache_version = 1
+
+# numpy dtypes used for the atomic coefficient types
+coeff_dtype_dict = { 'int'   : 'int',
+                     'float' : 'double',
+                     'bool'  : 'bool',
+                     'str'   : 'object' }
+
+# entity groups read by read_coeffs, given as tuples of
+# (data dictionary key, number key in gnrl_dict, names key in gnrl_dict, file name prefix)
+entity_group_list = [ ('STRG_DICT_LIST', 'nStrgs',    'STRG_NAMES',    "Storage_"),
+                      ('SPLR_DICT_LIST', 'nSplrs',    'SPLR_NAMES',    "Supplier_"),
+                      ('PRD_DICT_LIST',  'nStdPrds',  'STDPRD_NAMES',  "StandardProduct_"),
+                      ('TRN_DICT_LIST',  'nTrdTrns',  'TRDTRN_NAMES',  "TradeTranche_"),
+                      ('DSP_DICT_LIST',  'nDspPrds',  'DSPPRD_NAMES',  "DispatchProduct_"),
+                      ('FRM_DICT_LIST',  'nFrmPrfls', 'FRMPRFL_NAMES', "FirmProfile_") ]
+
+class LazyCoeffDict( dict ):
+    """
+    Coefficient dictionary of a single entity, which is read
+    on first access of any of its items, e.g., when a factory
+    first looks up one of the entity's keys.
+    
+    @ivar loader: function returning the coefficient dictionary
+    @type loader: callable
+    
+    @ivar args: arguments loader is called with
+    @type args: L{tuple}
+    
+    @ivar loaded: whether the dictionary has been read already
+    @type loaded: L{bool}
+    """
+    def __init__(self, loader, *args):
+        dict.__init__( self )
+        self.loader = loader
+        self.args = args
+        self.loaded = False
+    
+    
+    def load(self):
+        """
+        Reads the coefficient dictionary unless already read.
+        
+        @return: self
+        @rtype: L{gnw.reader.LazyCoeffDict}
+        """
+        if not self.loaded:
+            dict.update( self, self.loader( *self.args ) )
+            self.loaded = True
+        return self
+    
+    
+    def create_loading_method(name):
+        """
+        @return: method calling L{load} before the dict method name
+        """
+        method = getattr( dict, name )
+        def loading_method(self, *args, **kwargs):
+            self.load()
+            return method( self, *args, **kwargs )
+        loading_method.__name__ = name
+        loading_method.__doc__ = method.__doc__
+        return loading_method
+    
+    create_loading_method = staticmethod( create_loading_method )
+
+
+for method_name in [ "__contains__", "__delitem__", "__eq__", "__getitem__", "__iter__",
+                     "__len__", "__ne__", "__repr__", "__setitem__", "clear", "copy",
+                     "get", "has_key", "items", "iteritems", "iterkeys", "itervalues",
+                     "keys", "pop", "popitem", "setdefault", "update", "values" ]:
+    setattr( LazyCoeffDict, method_name, LazyCoeffDict.create_loading_method( method_name ) )
+del method_name
+
+
+def read_coeffs(data_dir, reader=MoselInitFileReader.read_mosel_init_file, jobs=1, lazy=False):
+    """
+    Reads all coefficient files of a test case.
+
+    @param data_dir: folder holding the coefficient files, or
+        bundle file written by L{write_coeffs_bundle}
+    @type data_dir: L{str}
+
+    @param reader: function reading a single file into a dictionary
+    @type reader: callable with signature reader( fname, aDict )
+
+    @param jobs: maximal number of threads reading and converting
+        the files of individual entities concurrently. Files
+        are read one after another if jobs is 1.
+    @type jobs: L{int}
+
+    @param lazy: whether the files of individual entities are read
+        on first access of the entities' coefficient dictionaries
+        (see L{LazyCoeffDict} and L{preload_coeffs}), rather than
+        up front. Parameter jobs is ignored if lazy is True.
+    @type lazy: L{bool}
+
+    @return: data dictionary with keys 'DSC_DICT', 'GNRL_DICT',
+        'MRKT_DICT' and the data dictionary keys given in
+        L{entity_group_list}. The latter hold dictionaries
+        mapping entity names to the entities' coefficient
+        dictionaries.
+    @rtype: L{dict}
+    """
+    if os.path.isfile( data_dir ):
+        return read_bundle( data_dir )
+    
     dsc_dict = create_coeff_desc_dict( [data_dir + "/CoefficientDescription.dat"], reader )
     gnrl_dict = create_coeff_dict( data_dir, "General", "Values", "dat", dsc_dict, reader )  
     mrkt_dict = create_coeff_dict( data_dir, "Market", "Values", "dat", dsc_dict, reader )
 
-    strg_dict_list = {}
-    if 'nStrgs' in gnrl_dict and gnrl_dict['nStrgs'] > 0:
-        if 'STRG_NAMES' not in gnrl_dict:
-            raise ValueError, "Expected key 'STRG_NAMES' not found in gnrl_dict"
-        for strg in gnrl_dict['STRG_NAMES']:
-            strg_dict = create_coeff_dict( data_dir, "Storage_" + strg, "Values", "dat", dsc_dict, reader )
-            strg_dict_list[strg] = strg_dict
-
-    splr_dict_list = {}
-    if 'nSplrs' in gnrl_dict and gnrl_dict['nSplrs'] > 0:
-        if 'SPLR_NAMES' not in gnrl_dict:
-            raise ValueError, "Expected key 'SPLR_NAMES' not found in gnrl_dict"            
-        for splr in gnrl_dict['SPLR_NAMES']:
-            splr_dict = create_coeff_dict( data_dir, "Supplier_" + splr, "Values", "dat", dsc_dict, reader )
-            splr_dict_list[splr] = splr_dict
-
-    prd_dict_list = {}
-    if 'nStdPrds' in gnrl_dict and gnrl_dict['nStdPrds'] > 0:
-        if 'STDPRD_NAMES' not in gnrl_dict:
-            raise ValueError, "Expected key 'STDPRD_NAMES' not found in gnrl_dict"            
-        for prd in gnrl_dict['STDPRD_NAMES']:
-            prd_dict = create_coeff_dict( data_dir, "StandardProduct_" + prd, "Values", "dat", dsc_dict, reader )
-            prd_dict_list[prd] = prd_dict
-
-    trn_dict_list = {}
-    if 'nTrdTrns' in gnrl_dict and gnrl_dict['nTrdTrns'] > 0:
-        if 'TRDTRN_NAMES' not in gnrl_dict:
-            raise ValueError, "Expected key 'TRDTRN_NAMES' not found in gnrl_dict"            
-        for trn in gnrl_dict['TRDTRN_NAMES']:
-            trn_dict = create_coeff_dict( data_dir, "TradeTranche_" + trn, "Values", "dat", dsc_dict, reader )
-            trn_dict_list[trn] = trn_dict
-
-    dsp_dict_list = {}
-    if 'nDspPrds' in gnrl_dict and gnrl_dict['nDspPrds'] > 0:
-        if 'DSPPRD_NAMES' not in gnrl_dict:
-            raise ValueError, "Expected key 'DSPPRD_NAMES' not found in gnrl_dict"            
-        for dsp in gnrl_dict['DSPPRD_NAMES']:
-            dsp_dict = create_coeff_dict( data_dir, "DispatchProduct_" + dsp, "Values", "dat", dsc_dict, reader )
-            dsp_dict_list[dsp] = dsp_dict
-
-    frm_dict_list = {}
-    if 'nFrmPrfls' in gnrl_dict and gnrl_dict['nFrmPrfls'] > 0:
-        if 'FRMPRFL_NAMES' not in gnrl_dict:
-            raise ValueError, "Expected key 'FRMPRFL_NAMES' not found in gnrl_dict"            
-        for frm in gnrl_dict['FRMPRFL_NAMES']:
-            frm_dict = create_coeff_dict( data_dir, "FirmProfile_" + frm, "Values", "dat", dsc_dict, reader )
-            frm_dict_list[frm] = frm_dict
-
-    return {'DSC_DICT'          : dsc_dict,
-            'GNRL_DICT'         : gnrl_dict,
-            'MRKT_DICT'         : mrkt_dict,
-            'STRG_DICT_LIST'    : strg_dict_list,
-            'SPLR_DICT_LIST'    : splr_dict_list,
-            'PRD_DICT_LIST'     : prd_dict_list,
-            'TRN_DICT_LIST'     : trn_dict_list,
-            'DSP_DICT_LIST'     : dsp_dict_list,
-            'FRM_DICT_LIST'     : frm_dict_list}
+    task_list = []
+    for list_key, number_key, names_key, fname_prefix in entity_group_list:
+        if number_key in gnrl_dict and gnrl_dict[number_key] > 0:
+            if names_key not in gnrl_dict:
+                raise ValueError, "Expected key '%s' not found in gnrl_dict" % names_key
+            for name in gnrl_dict[names_key]:
+                task_list.append( (list_key, name, fname_prefix + name) )
+
+    read_task = lambda task : create_coeff_dict( data_dir, task[2], "Values", "dat", dsc_dict, reader )
+    if lazy:
+        coeff_dict_list = [LazyCoeffDict( read_task, task ) for task in task_list]
+    else:
+        coeff_dict_list = map_jobs( read_task, task_list, jobs )
+
+    data_dict = {'DSC_DICT'          : dsc_dict,
+                 'GNRL_DICT'         : gnrl_dict,
+                 'MRKT_DICT'         : mrkt_dict}
+    for entity_group in entity_group_list:
+        data_dict[entity_group[0]] = {}
+    for i in xrange( len( task_list ) ):
+        data_dict[task_list[i][0]][task_list[i][1]] = coeff_dict_list[i]
+
+    return data_dict
+
+
+def preload_coeffs(data_dict, list_key_list=None, name_list=None, jobs=1):
+    """
+    Reads the coefficient dictionaries of selected entities of
+    a data dictionary returned by L{read_coeffs} with lazy = True.
+    
+    @param data_dict: data dictionary
+    @type data_dict: L{dict}
+    
+    @param list_key_list: data dictionary keys of the entity
+        groups to be read (see L{entity_group_list}), e.g.,
+        ['TRN_DICT_LIST'], None for all entity groups
+    @type list_key_list: L{list} of L{str} or None
+    
+    @param name_list: names of the entities to be read,
+        None for all entities of the selected groups
+    @type name_list: L{list} of L{str} or None
+    
+    @param jobs: maximal number of threads reading concurrently
+    @type jobs: L{int}
+    
+    @return: data_dict
+    @rtype: L{dict}
+    """
+    lazy_list = []
+    for entity_group in entity_group_list:
+        list_key = entity_group[0]
+        if list_key not in data_dict:
+            continue
+        if list_key_list is not None and list_key not in list_key_list:
+            continue
+        for name, coeff_dict in data_dict[list_key].iteritems():
+            if name_list is not None and name not in name_list:
+                continue
+            if isinstance( coeff_dict, LazyCoeffDict ) and not coeff_dict.loaded:
+                lazy_list.append( coeff_dict )
+    
+    map_jobs( LazyCoeffDict.load, lazy_list, jobs )
+    return data_dict
+
+
+def get_unchanged_entity_names(data_dir, ref_data_dir, data_dict):
+    """
+    Finds the entities of data dictionary data_dict, read from
+    data_dir, whose coefficient files have the same content in
+    folder ref_data_dir, without reading the files. The files
+    of an entity are all files '<file name prefix><name>_*.dat'
+    (see L{entity_group_list}). Entities are not considered
+    unchanged if file CoefficientDescription.dat differs.
+    
+    @param data_dir: see L{read_coeffs}
+    @type data_dir: L{str}
+    
+    @param ref_data_dir: folder holding the coefficient files
+        of a previous run
+    @type ref_data_dir: L{str}
+    
+    @param data_dict: data dictionary read from data_dir, e.g.,
+        by L{read_coeffs} with lazy = True
+    @type data_dict: L{dict}
+    
+    @return: names of the unchanged entities per data dictionary
+        key of L{entity_group_list}, empty if data_dir or
+        ref_data_dir is a bundle file
+    @rtype: L{dict} of L{set} of L{str}
+    """
+    name_set_dict = {}
+    if not os.path.isdir( data_dir ) or not os.path.isdir( ref_data_dir ):
+        return name_set_dict
+    
+    def is_same_file(fname):
+        ref_fname = os.path.join( ref_data_dir, fname )
+        return os.path.isfile( ref_fname ) and filecmp.cmp( os.path.join( data_dir, fname ), ref_fname, False )
+    
+    if not is_same_file( "CoefficientDescription.dat" ):
+        return name_set_dict
+    
+    fname_list = os.listdir( data_dir )
+    ref_fname_list = os.listdir( ref_data_dir )
+    for list_key, number_key, names_key, fname_prefix in entity_group_list:
+        name_set = name_set_dict[list_key] = set()
+        for name in data_dict.get( list_key, {} ):
+            # superset of the entity's files, as names may be
+            # prefixes of other names of the same group
+            is_entity_file = lambda fname : fname.startswith( fname_prefix + name + "_" ) and fname.endswith( ".dat" )
+            entity_fname_list = sorted( filter( is_entity_file, fname_list ) )
+            if entity_fname_list \
+            and entity_fname_list == sorted( filter( is_entity_file, ref_fname_list ) ) \
+            and all( [is_same_file( fname ) for fname in entity_fname_list] ):
+                name_set.add( name )
+    return name_set_dict
+
+
+def map_jobs(func, arg_list, jobs=1):
+    """
+    @return: [func( arg ) for arg in arg_list], evaluated in up
+        to jobs threads concurrently
+    @rtype: L{list}
+    """
+    if jobs > 1 and len( arg_list ) > 1:
+        pool = ThreadPool( min( jobs, len( arg_list ) ) )
+        try:
+            return pool.map( func, arg_list )
+        finally:
+            pool.close()
+            pool.join()
+    return [func( arg ) for arg in arg_list]
+
+
+def read_coeffs_cached(data_dir, cache_dir, reader=MoselInitFileReader.read_mosel_init_file, jobs=1, check_content=False):
+    """
+    Returns the data dictionary of L{read_coeffs} from a cache
+    file in cache_dir, if the cache file is valid, i.e., none
+    of the files read when it was created has changed since.
+    Otherwise calls L{read_coeffs} and (re-)writes the cache file.
+    
+    @param data_dir: see L{read_coeffs}
+    @type data_dir: L{str}
+    
+    @param cache_dir: folder holding the cache files, one per data_dir.
+        Created if it does not exist.
+    @type cache_dir: L{str}
+    
+    @param reader: see L{read_coeffs}
+    
+    @param jobs: see L{read_coeffs}
+    @type jobs: L{int}
+    
+    @param check_content: whether files are compared by content (md5
+        digest), or by size and modification time only
+    @type check_content: L{bool}
+    
+    @return: see L{read_coeffs}
+    @rtype: L{dict}
+    """
+    if is_bundle( data_dir ):
+        # bundle files are not cached
+        return read_bundle( data_dir )
+    
+    cache_fname = get_cache_fname( data_dir, cache_dir )
+    data_dict = load_cached_coeffs( cache_fname, data_dir, check_content )
+    if data_dict is not None:
+        return data_dict
+    
+    signature_list = []
+    def signing_reader(fname, aDict):
+        signature_list.append( (os.path.basename( fname ), get_file_signature( fname, check_content )) )
+        return reader( fname, aDict )
+    
+    data_dict = read_coeffs( data_dir, signing_reader, jobs )
+    
+    if not os.path.isdir( cache_dir ):
+        os.makedirs( cache_dir )
+    save_cached_coeffs( cache_fname, signature_list, data_dict )
+    return data_dict
+
+
+def write_coeffs_bundle(data_dir, bundle_fname, reader=MoselInitFileReader.read_mosel_init_file, jobs=1):
+    """
+    Converts all coefficient files of a test case into a
+    single bundle file (see L{gnw.bundle}), which can be
+    passed to L{read_coeffs} instead of data_dir.
+    
+    @param data_dir: see L{read_coeffs}
+    @type data_dir: L{str}
+    
+    @param bundle_fname: bundle file name
+    @type bundle_fname: L{str}
+    
+    @param reader: see L{read_coeffs}
+    
+    @param jobs: see L{read_coeffs}
+    @type jobs: L{int}
+    """
+    write_bundle( bundle_fname, read_coeffs( data_dir, reader, jobs ) )
+
+
+def get_cache_fname(data_dir, cache_dir):
+    """
+    @return: name of the cache file of data_dir in cache_dir
+    @rtype: L{str}
+    """
+    digest = md5( os.path.normcase( os.path.abspath( data_dir ) ) ).hexdigest()
+    return "%s/%s-%s-%s.%s" % (cache_dir, "gnw", "coeffs", digest, "pkl.gz")
+
+
+def get_file_signature(fname, check_content=False):
+    """
+    @return: size and modification time of file fname, and
+        additionally its md5 digest if check_content is True
+    @rtype: L{tuple}
+    """
+    stat = os.stat( fname )
+    if not check_content:
+        return (stat.st_size, stat.st_mtime)
+    file = open( fname, "rb" )
+    try:
+        return (stat.st_size, stat.st_mtime, md5( file.read() ).hexdigest())
+    finally:
+        file.close()
+
+
+def load_cached_coeffs(cache_fname, data_dir, check_content=False):
+    """
+    Loads data dictionary from cache file cache_fname.
+    
+    @return: data dictionary, None if the cache file does not
+        exist, can not be read or is out of date, i.e., any of the
+        files recorded in it has been changed or removed since
+    @rtype: L{dict} or None
+    """
+    if not os.path.isfile( cache_fname ):
+        return None
+    # unpickling from a gzip file object directly is slow, as it
+    # issues one read call per pickled item
+    file = gzip.open( cache_fname, "rb" )
+    try:
+        try:
+            buffer = cStringIO.StringIO( file.read() )
+            version, signature_list = cPickle.load( buffer )
+            if version != (__version__, coeff_cache_version):
+                return None
+            for fname, signature in signature_list:
+                if check_content and len( signature ) < 3:
+                    return None
+                fname = os.path.join( data_dir, fname )
+                if not os.path.isfile( fname ) \
+                or get_file_signature( fname, len( signature ) > 2 ) != signature:
+                    return None
+            return cPickle.load( buffer )
+        except (IOError, EOFError, ValueError, cPickle.UnpicklingError):
+            return None
+    finally:
+        file.close()
+
+
+def save_cached_coeffs(cache_fname, signature_list, data_dict):
+    """
+    Writes data dictionary data_dict together with the signatures
+    of all files it has been read from to cache file cache_fname.
+    The file is written under a temporary name first, so that
+    concurrent runs never read a partially written cache file.
+    
+    @param signature_list: list of tuples (file name, signature),
+        see L{get_file_signature}
+    @type signature_list: L{list} of L{tuple}
+    """
+    tmp_fname = "%s.%d.tmp" % (cache_fname, os.getpid())
+    buffer = cStringIO.StringIO()
+    cPickle.dump( ((__version__, coeff_cache_version), sorted( signature_list )), buffer, 2 )
+    cPickle.dump( data_dict, buffer, 2 )
+    file = gzip.open( tmp_fname, "wb", 1 )
+    try:
+        file.write( buffer.getvalue() )
+    finally:
+        file.close()
+    if os.path.exists( cache_fname ):
+        os.remove( cache_fname )
+    os.rename( tmp_fname, cache_fname )
 
 
 def create_coeff_desc_dict(fname_list, reader=MoselInitFileReader.read_mosel_init_file):
@@ -159,20 +511,51 @@ def convert_to(coeff, coeff_desc):
         else:
             raise ValueError, "convert_to: Unknown coefficient type string '%s'" % coeff_type
     elif coeff_dim == 1:
-        for r in xrange( len( coeff ) ):
-            coeff[r] = convert_to( coeff[r], [ [ coeff_dim - 1 ], coeff_desc[1] , coeff_desc[2] ] )
+        coeff_type = coeff_desc[2][0]
+        if coeff_type != 'str':
+            coeff = convert_column_to( coeff, coeff_type )
     elif coeff_dim == 2:
         coeff_cols = coeff_desc[1][0]
+        for r in xrange( len( coeff ) ):
+            if len( coeff[r] ) != coeff_cols:
+                raise IndexError, "convert_to: Row %d holds %d columns, expected %d" % (r, len( coeff[r] ), coeff_cols)
+        table = numpy.empty( len( coeff ),
+                             dtype=[ ("f%d" % c, coeff_dtype_dict[coeff_desc[2][c]]) for c in xrange( coeff_cols ) ] )
         for c in xrange( coeff_cols ):
-            coeff_type = coeff_desc[2][c]
-            for r in xrange( len( coeff ) ):
-                coeff[r][c] = convert_to( coeff[r][c], [ [ coeff_dim - 2 ], [ 1 ] , [ coeff_type ] ] )
+            table["f%d" % c] = convert_column_to( [ row[c] for row in coeff ], coeff_desc[2][c] )
+        coeff = table
     else:
         raise ValueError, "convert_to: Only dimensions 0, 1 and 2 supported. Have got %d" % coeff_dim
     
     return coeff
 
 
+def convert_column_to(column, coeff_type):
+    """
+    Converts all elements of a column of coefficient data
+    in a single step.
+
+    @param column: column of coefficient data as read from file
+    @type column: L{list} of L{str}
+
+    @param coeff_type: atomic coefficient type, one of the keys
+        of L{coeff_dtype_dict}
+    @type coeff_type: L{str}
+
+    @return: column converted to the numpy dtype given
+        in L{coeff_dtype_dict} for coeff_type
+    @rtype: L{numpy.array}
+
+    @raise ValueError: unknown coefficient type or element not
+        convertible to coeff_type
+    """
+    if coeff_type not in coeff_dtype_dict:
+        raise ValueError, "convert_column_to: Unknown coefficient type string '%s'" % coeff_type
+    if coeff_type == 'bool':
+        return numpy.array( column, dtype='S' ) == 'true'
+    return numpy.array( column, dtype=coeff_dtype_dict[coeff_type] )
+
+
 if __name__ == "__main__":
     baseDir = "C:/home/re04179/svn/GasNetworks/app/gnw/pulp/data/test/supplier-gas-terra-mup/pulp/data"
     
@@ -0,0 +1,509 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: sparse matrix representation of a gnw model, assembled from
+row blocks emitted by the entities over the columns of a
+L{gnw.lp_var_registry.LpVarRegistry}.
+"""
+import numpy
+import pulp
+
+
+class SparseModel( object ):
+    """
+    Sparse representation of a linear (mixed integer) model:
+    constraint matrix in coordinate (COO) format together with
+    sense and right hand side per row, and objective coefficients
+    per column. Columns are the variables of registry.
+
+    Entities add rows in blocks, either as fixed number of
+    nonzeros per row (see L{add_rows}), as triplets (see
+    L{add_triplets}), or as L{pulp.LpConstraint} instances
+    (see L{add_lp_constraints}) which are converted by
+    L{compile}.
+
+    @cvar LE: sense of rows 'a*x <= rhs'
+    @cvar EQ: sense of rows 'a*x == rhs'
+    @cvar GE: sense of rows 'a*x >= rhs'
+
+    @ivar registry: lp variable registry defining the columns
+    @type registry: L{gnw.lp_var_registry.LpVarRegistry}
+
+    @ivar nRows: number of rows
+    @type nRows: L{int}
+
+    @ivar row_count_list: number of rows per call of
+        add_* method together with the entity adding the rows
+    @type row_count_list: L{list} of
+        (L{gnw.entity.Entity}, L{int}) tuples
+
+    @ivar row, col, val: row index, column index and value
+        of the nonzeros, set by L{compile}
+    @type row, col, val: L{numpy.array}
+
+    @ivar sense, rhs: sense and right hand side per row,
+        set by L{compile}
+    @type sense, rhs: L{numpy.array}
+
+    @ivar obj: objective coefficient per column, set by
+        L{compile}
+    @type obj: L{numpy.array} of dtype='double'
+
+    @ivar obj_constant: constant term of the objective
+    @type obj_constant: L{float}
+
+    @ivar is_used: whether a column is referenced by any row or
+        objective block, set by L{compile}
+    @type is_used: L{numpy.array} of dtype='bool'
+
+    @ivar lower, upper: bounds per column, copied from registry
+        by L{compile} and tightened by L{presolve}, i.e., the
+        bounds of the registry are kept
+    @type lower, upper: L{numpy.array} of dtype='double'
+
+    @ivar presolved: flag whether L{presolve} has been applied
+    @type presolved: L{bool}
+    """
+    LE = pulp.LpConstraintLE
+    EQ = pulp.LpConstraintEQ
+    GE = pulp.LpConstraintGE
+
+
+    def __init__(self, registry):
+        """
+        @param registry: lp variable registry defining the columns
+        @type registry: L{gnw.lp_var_registry.LpVarRegistry}
+        """
+        self.registry = registry
+        self.nRows = 0
+        self.row_count_list = []
+
+        self.block_list = []
+        self.obj_block_list = []
+        self.obj_constant = 0.0
+        self.presolved = False
+        self.lp_constraint_list = []
+        self.lp_objective_list = []
+
+        self.row = numpy.empty( 0, dtype='int' )
+        self.col = numpy.empty( 0, dtype='int' )
+        self.val = numpy.empty( 0, dtype='double' )
+        self.sense = numpy.empty( 0, dtype='int8' )
+        self.rhs = numpy.empty( 0, dtype='double' )
+        self.obj = numpy.zeros( len( registry ), dtype='double' )
+        self.is_used = numpy.zeros( len( registry ), dtype='bool' )
+        self.lower = registry.lower[:len( registry )].copy()
+        self.upper = registry.upper[:len( registry )].copy()
+
+
+    def create_row_array(value, nRows, dtype):
+        """
+        @return: array of size nRows holding value, if value is a
+            scalar, or the elements of value otherwise
+        @rtype: L{numpy.array} of dtype
+
+        @raise ValueError: value is not a scalar and its size
+            does not match nRows
+        """
+        array = numpy.empty( nRows, dtype=dtype )
+        array[:] = value
+        return array
+
+    create_row_array = staticmethod( create_row_array )
+
+
+    def get_window_index(start, final):
+        """
+        Expands windows of dispatch periods, e.g., given by
+        L{gnw.constraint.ConstraintCoeff} instances, into
+        triplet form.
+
+        @param start: first dispatch period index per window
+        @type start: L{numpy.array} of dtype='int'
+
+        @param final: last dispatch period index per window
+        @type final: L{numpy.array} of dtype='int'
+
+        @return: window (row) index and dispatch period index
+            of each dispatch period covered by the windows
+        @rtype: L{tuple} of two L{numpy.array} of dtype='int'
+        """
+        start = numpy.asarray( start, dtype='int' )
+        length = numpy.asarray( final, dtype='int' ) - start + 1
+        row = numpy.repeat( numpy.arange( len( length ) ), length )
+        t = numpy.arange( length.sum() ) - numpy.repeat( length.cumsum() - length - start, length )
+        return row, t
+
+    get_window_index = staticmethod( get_window_index )
+
+
+    def add_triplets(self, owner, nRows, row, col, val, sense, rhs):
+        """
+        Adds a block of nRows rows given as triplets.
+
+        @param owner: entity adding the rows
+        @type owner: L{gnw.entity.Entity}
+
+        @param nRows: number of rows of the block
+        @type nRows: L{int}
+
+        @param row: row index of the nonzeros within the block,
+            i.e., in range( nRows )
+        @type row: L{numpy.array} of dtype='int'
+
+        @param col: column index of the nonzeros
+        @type col: L{numpy.array} of dtype='int'
+
+        @param val: value of the nonzeros
+        @type val: L{float} or L{numpy.array} of dtype='double'
+
+        @param sense: L{LE}, L{EQ} or L{GE} per row
+        @type sense: L{int} or L{numpy.array} of dtype='int'
+
+        @param rhs: right hand side per row
+        @type rhs: L{float} or L{numpy.array} of dtype='double'
+
+        @return: index of the first row of the block
+        @rtype: L{int}
+        """
+        col = numpy.asarray( col, dtype='int' ).ravel()
+        row = numpy.asarray( row, dtype='int' ).ravel() + self.nRows
+        val = self.create_row_array( val, len( col ), 'double' )
+        self.block_list.append( (self.nRows, row, col, val,
+                                 self.create_row_array( sense, nRows, 'int8' ),
+                                 self.create_row_array( rhs, nRows, 'double' )) )
+        return self.add_row_count( owner, nRows )
+
+
+    def add_rows(self, owner, col, val, sense, rhs):
+        """
+        Adds a block of rows having the same number of nonzeros.
+
+        @param owner: entity adding the rows
+        @type owner: L{gnw.entity.Entity}
+
+        @param col: column index of the nonzeros, one row
+            of col per row of the block
+        @type col: L{numpy.array} of dtype='int' of
+            shape (nRows, nNonzeros) or (nRows,)
+
+        @param val: values of the nonzeros, broadcast to
+            the shape of col
+        @type val: L{float} or L{numpy.array} of dtype='double'
+
+        @param sense: L{LE}, L{EQ} or L{GE} per row
+        @type sense: L{int} or L{numpy.array} of dtype='int'
+
+        @param rhs: right hand side per row
+        @type rhs: L{float} or L{numpy.array} of dtype='double'
+
+        @return: index of the first row of the block
+        @rtype: L{int}
+        """
+        col = numpy.asarray( col, dtype='int' )
+        nRows = col.shape[0]
+        col = col.reshape( (nRows, -1) )
+        full_val = numpy.empty( col.shape, dtype='double' )
+        full_val[:] = val
+        row = numpy.repeat( numpy.arange( nRows ), col.shape[1] )
+        return self.add_triplets( owner, nRows, row, col, full_val.ravel(), sense, rhs )
+
+
+    def add_lp_constraints(self, owner, constraints):
+        """
+        Adds a block of rows given as pulp constraints. The
+        constraints are converted by L{compile}.
+
+        @param owner: entity adding the rows
+        @type owner: L{gnw.entity.Entity}
+
+        @param constraints: constraints over lp variables created
+            by the registry, see
+            L{gnw.lp_var_registry.LpVarRegistry.create_lp_vars}
+        @type constraints: L{list} of L{pulp.LpConstraint}
+
+        @return: index of the first row of the block
+        @rtype: L{int}
+        """
+        self.lp_constraint_list.append( (self.nRows, constraints) )
+        return self.add_row_count( owner, len( constraints ) )
+
+
+    def add_row_count(self, owner, nRows):
+        """
+        @return: index of the first of nRows rows added by owner
+        @rtype: L{int}
+        """
+        self.row_count_list.append( (owner, nRows) )
+        self.nRows += nRows
+        return self.nRows - nRows
+
+
+    def add_objective(self, col, val, constant=0.0):
+        """
+        Adds terms to the objective function.
+
+        @param col: column indices
+        @type col: L{numpy.array} of dtype='int'
+
+        @param val: coefficients, broadcast to the shape of col
+        @type val: L{float} or L{numpy.array} of dtype='double'
+
+        @param constant: constant term
+        @type constant: L{float}
+        """
+        col = numpy.asarray( col, dtype='int' ).ravel()
+        self.obj_block_list.append( (col, self.create_row_array( val, len( col ), 'double' )) )
+        self.obj_constant += constant
+
+
+    def add_lp_objective(self, expression):
+        """
+        Adds a pulp expression to the objective function. The
+        expression is converted by L{compile}.
+
+        @param expression: expression over lp variables created
+            by the registry
+        @type expression: L{pulp.LpAffineExpression}
+        """
+        self.lp_objective_list.append( expression )
+
+
+    def get_column_dict(self):
+        """
+        @return: dictionary holding the column index with
+            the id of the lp variable as key, for all lp variables
+            created by the registry so far
+        @rtype: L{dict}
+        """
+        column_dict = {}
+        for owner in self.registry.owner_list:
+            owner.update_lp_var_column_dict( column_dict )
+        return column_dict
+
+
+    def convert_expression(expression, column_dict):
+        """
+        @return: column indices and coefficients of the
+            terms of expression
+        @rtype: L{tuple} of two L{list}
+
+        @raise ValueError: expression holds an lp variable
+            not created by the registry
+        """
+        col_list = []
+        val_list = []
+        for lp_var, value in expression.iteritems():
+            try:
+                col_list.append( column_dict[id( lp_var )] )
+            except KeyError:
+                raise ValueError, "lp variable '%s' is not registered (gnw.sparse_model.SparseModel.convert_expression)" % lp_var.name
+            val_list.append( value )
+        return col_list, val_list
+
+    convert_expression = staticmethod( convert_expression )
+
+
+    def compile(self):
+        """
+        Converts the rows added by L{add_lp_constraints} and
+        the expressions added by L{add_lp_objective}, and
+        concatenates all blocks into row, col, val, sense,
+        rhs and obj. Columns referenced by neither are
+        flagged in is_used. The bounds of the registry are
+        copied to lower and upper.
+        """
+        if self.lp_constraint_list or self.lp_objective_list:
+            column_dict = self.get_column_dict()
+
+        for first_row, constraints in self.lp_constraint_list:
+            row_list, col_list, val_list = [], [], []
+            for i, constraint in enumerate( constraints ):
+                cols, vals = self.convert_expression( constraint, column_dict )
+                row_list += [i]*len( cols )
+                col_list += cols
+                val_list += vals
+            self.block_list.append( (first_row,
+                                     numpy.array( row_list, dtype='int' ) + first_row,
+                                     numpy.array( col_list, dtype='int' ),
+                                     numpy.array( val_list, dtype='double' ),
+                                     numpy.array( [c.sense for c in constraints], dtype='int8' ),
+                                     numpy.array( [-c.constant for c in constraints], dtype='double' )) )
+        self.lp_constraint_list = []
+
+        for expression in self.lp_objective_list:
+            cols, vals = self.convert_expression( expression, column_dict )
+            self.obj_block_list.append( (numpy.array( cols, dtype='int' ),
+                                         numpy.array( vals, dtype='double' )) )
+            self.obj_constant += expression.constant
+        self.lp_objective_list = []
+
+        # blocks are concatenated in order of their first row
+        self.block_list.sort( key = lambda block: block[0] )
+        for i, name in enumerate( ("row", "col", "val", "sense", "rhs") ):
+            array = getattr( self, name )
+            setattr( self, name, numpy.concatenate( [array[:0]] + [block[i + 1] for block in self.block_list] ) )
+
+        nVars = len( self.registry )
+        self.obj = numpy.zeros( nVars, dtype='double' )
+        for col, val in self.obj_block_list:
+            self.obj += numpy.bincount( col, weights = val, minlength = nVars )
+
+        self.lower = self.registry.lower[:nVars].copy()
+        self.upper = self.registry.upper[:nVars].copy()
+
+        self.is_used = numpy.zeros( nVars, dtype='bool' )
+        self.is_used[self.col] = True
+        for col, val in self.obj_block_list:
+            self.is_used[col] = True
+
+
+    def presolve(self, tol=1.0e-9):
+        """
+        Substitutes rows holding a single nonzero by bounds of
+        the variable, i.e., tightens lower and upper of self
+        (the bounds of the registry are kept), and folds
+        variables with equal lower and upper bound into the
+        right hand side of the rows using them and into the
+        objective constant. Both steps are repeated while rows
+        become singletons. Rows without nonzeros are removed if
+        satisfied, and kept otherwise such that the solver
+        reports the model infeasible. Must be called after
+        L{compile}.
+
+        @param tol: tolerance for rounding bounds of integer
+            variables and for checking rows without nonzeros
+        @type tol: L{float}
+
+        @return: number of rows removed
+        @rtype: L{int}
+        """
+        registry = self.registry
+        nVars = len( registry )
+        lower = self.lower
+        upper = self.upper
+        is_integer = registry.is_integer[:nVars]
+
+        indptr, col, val = self.get_csr()
+        row = numpy.repeat( numpy.arange( self.nRows ), numpy.diff( indptr ) )
+        keep = val != 0.0
+        row, col, val = row[keep], col[keep], val[keep]
+        sense = self.sense.copy()
+        rhs = self.rhs.copy()
+        active = numpy.ones( self.nRows, dtype='bool' )
+        substituted = numpy.zeros( nVars, dtype='bool' )
+
+        while True:
+            count = numpy.bincount( row, minlength = self.nRows )
+
+            # singleton rows a*x (sense) rhs to bounds of x
+            singleton = numpy.flatnonzero( active[row] & (count[row] == 1) )
+            if len( singleton ) > 0:
+                r = row[singleton]
+                c = col[singleton]
+                bound = rhs[r]/val[singleton]
+                # the sense flips for negative coefficients
+                s = numpy.where( val[singleton] < 0.0, -sense[r], sense[r] )
+                up = s != self.GE
+                lo = s != self.LE
+                numpy.minimum.at( upper, c[up], bound[up] )
+                numpy.maximum.at( lower, c[lo], bound[lo] )
+                integer = c[is_integer[c]]
+                lower[integer] = numpy.ceil( lower[integer] - tol )
+                upper[integer] = numpy.floor( upper[integer] + tol )
+                active[r] = False
+
+            # fixed variables to right hand side and objective constant
+            fixed = (lower == upper) & ~substituted
+            substituted |= fixed
+            nonzero = fixed[col]
+            if len( singleton ) == 0 and not nonzero.any():
+                break
+            numpy.subtract.at( rhs, row[nonzero], val[nonzero]*lower[col[nonzero]] )
+            self.obj_constant += numpy.dot( self.obj[fixed], lower[fixed] )
+            self.obj[fixed] = 0.0
+            keep = ~nonzero & active[row]
+            row, col, val = row[keep], col[keep], val[keep]
+
+        # rows without nonzeros are kept only if violated
+        empty = active & (numpy.bincount( row, minlength = self.nRows ) == 0)
+        violated = ((sense == self.LE) & (rhs < -tol)) | ((sense == self.GE) & (rhs > tol)) | ((sense == self.EQ) & (abs( rhs ) > tol))
+        active &= ~empty | violated
+
+        # renumber rows, and replace the blocks by the presolved model
+        new_row = numpy.cumsum( active ) - 1
+        row_count_list = []
+        first = 0
+        for owner, nRows in self.row_count_list:
+            row_count_list.append( (owner, int( active[first:first + nRows].sum() )) )
+            first += nRows
+        self.row_count_list = row_count_list
+        nRemoved = self.nRows - int( active.sum() )
+        self.nRows -= nRemoved
+        self.row = new_row[row]
+        self.col = col
+        self.val = val
+        self.sense = sense[active]
+        self.rhs = rhs[active]
+        self.block_list = [(0, self.row, self.col, self.val, self.sense, self.rhs)]
+        self.obj_block_list = [(numpy.arange( nVars ), self.obj.copy())]
+        self.presolved = True
+        return nRemoved
+
+
+    def get_objective_value(self):
+        """
+        @return: objective value of the solution values
+            held by the registry (see
+            L{gnw.lp_var_registry.LpVarRegistry.set_values}),
+            columns without value (not used) are skipped
+        @rtype: L{float}
+        """
+        value = self.registry.value[:len( self.registry )]
+        return numpy.dot( self.obj[self.is_used], value[self.is_used] ) + self.obj_constant
+
+
+    def get_csr(self):
+        """
+        Returns the constraint matrix in compressed sparse row
+        (CSR) format, summing up duplicate entries.
+
+        @return: row pointers, column indices and values
+        @rtype: L{tuple} of three L{numpy.array}
+        """
+        order = numpy.lexsort( (self.col, self.row) )
+        row = self.row[order]
+        col = self.col[order]
+        val = self.val[order]
+        if len( row ) > 0:
+            first = numpy.flatnonzero( numpy.concatenate( ([True], (row[1:] != row[:-1]) | (col[1:] != col[:-1])) ) )
+            val = numpy.add.reduceat( val, first )
+            row = row[first]
+            col = col[first]
+        indptr = numpy.zeros( self.nRows + 1, dtype='int' )
+        numpy.cumsum( numpy.bincount( row, minlength = self.nRows ), out = indptr[1:] )
+        return indptr, col, val
+
+
+
+if __name__ == "__main__":
+    print "gnw.sparse_model.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
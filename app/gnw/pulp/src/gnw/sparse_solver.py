@@ -0,0 +1,317 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: solver backend for sparse models, see L{gnw.sparse_model}
+"""
+import os
+import subprocess
+import tempfile
+
+import numpy
+import pulp
+
+from gnw.util import conditional
+
+
+class SparseSolver( object ):
+    """
+    Solves a L{gnw.sparse_model.SparseModel} with the COIN-OR CBC
+    command line solver. The model is written in MPS format
+    directly from its arrays, i.e., without creating L{pulp}
+    expressions or generating LP text per constraint, and the
+    solution values are passed back to the model's
+    L{gnw.lp_var_registry.LpVarRegistry} by column index.
+
+    Usage:
+        - status = SparseSolver().solve( ntwrk.get_sparse_model() )
+
+    @cvar status_by_name: L{pulp.LpStatus} code per status of a
+        CBC solution file, i.e., the first line up to ' - objective
+        value'. CBC reports MIPs without integer feasible solution
+        as 'Integer infeasible', and problems stopped before proven
+        optimality as 'Stopped on <reason>'. Other statuses (e.g.
+        'Status unknown') map to L{pulp.LpStatusUndefined}.
+    @type status_by_name: L{dict}
+
+    @cvar sense_by_code: MPS row type per row sense
+        of L{gnw.sparse_model.SparseModel}
+    @type sense_by_code: L{dict}
+
+    @cvar default_options: CBC command line options passed for
+        every model, presolved or not, before L{options} (such that
+        the latter may override them), and passed to the pulp
+        solver of L{create_pulp_solver} as well, such that both
+        solve paths run CBC with the same settings. With CBC's
+        default cuts, the optimum of the make-up models of the
+        supplier-dummy-*-bo-*-mup test cases (coefficients ranging
+        from 1e-8 to 4e7) is cut off at the root node while CBC
+        still reports the solution optimal, on the pulp and the
+        sparse path, with or without presolve.
+    @type default_options: L{list} of L{str}
+
+    @ivar path: path of the CBC executable
+    @type path: L{str}
+
+    @ivar keepFiles: flag whether MPS and solution files are
+        kept (in the working directory)
+    @type keepFiles: L{bool}
+
+    @ivar mip: flag whether integer variables are respected
+    @type mip: L{bool}
+
+    @ivar msg: flag whether solver output is shown
+    @type msg: L{bool}
+
+    @ivar options: additional CBC command line options,
+        passed after L{default_options}
+    @type options: L{list} of L{str}
+    """
+    status_by_name = {'Optimal'                 : pulp.LpStatusOptimal,
+                      'Infeasible'              : pulp.LpStatusInfeasible,
+                      'Integer infeasible'      : pulp.LpStatusInfeasible,
+                      'Unbounded'               : pulp.LpStatusUnbounded,
+                      'Stopped on iterations'   : pulp.LpStatusNotSolved,
+                      'Stopped on time'         : pulp.LpStatusNotSolved,
+                      'Stopped on difficulties' : pulp.LpStatusNotSolved,
+                      'Stopped on ctrl-c'       : pulp.LpStatusNotSolved}
+
+    sense_by_code = {pulp.LpConstraintLE : "L",
+                     pulp.LpConstraintEQ : "E",
+                     pulp.LpConstraintGE : "G"}
+
+    default_options = ["cuts", "off"]
+
+
+    def __init__(self, path=None, keepFiles=0, mip=1, msg=0, options=[]):
+        """
+        @param path: path of the CBC executable, if None
+            the CBC executable shipped with L{pulp} (if any)
+            or 'cbc' otherwise
+        @type path: L{str} or None
+        """
+        if path is None:
+            path = getattr( getattr( pulp, "PULP_CBC_CMD", None ), "pulp_cbc_path", "cbc" )
+        self.path = path
+        self.keepFiles = keepFiles
+        self.mip = mip
+        self.msg = msg
+        self.options = options
+
+
+    def available(self):
+        """
+        @return: whether the CBC executable can be run
+        @rtype: L{bool}
+        """
+        return pulp.LpSolver_CMD.executable( self.path ) is not False
+
+
+    def get_options(self):
+        """
+        @return: CBC command line options, i.e., L{default_options}
+            followed by L{options}
+        @rtype: L{list} of L{str}
+        """
+        return self.default_options + list( self.options )
+
+
+    def create_pulp_solver(self):
+        """
+        @return: pulp solver running the CBC executable of self
+            with the options of L{get_options}, for solving a
+            L{pulp.LpProblem} populated by
+            L{gnw.network.Network.populate} the same way as
+            the sparse model
+        @rtype: L{pulp.COIN_CMD}
+        """
+        return pulp.COIN_CMD( path = self.path,
+                              keepFiles = self.keepFiles,
+                              mip = self.mip,
+                              msg = self.msg,
+                              options = self.get_options() )
+
+
+    def write_mps(self, model, fname, sense=pulp.LpMinimize):
+        """
+        Writes model in fixed MPS format to file fname. Rows
+        are named 'R<i>' and columns 'C<j>', where i and j are
+        row and column indices of model written with seven
+        digits. Maximisation problems
+        are written with negated objective coefficients, the
+        constant term of the objective is omitted (see
+        L{gnw.sparse_model.SparseModel.get_objective_value}).
+
+        @param model: compiled sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+
+        @param fname: file name
+        @type fname: L{str}
+
+        @param sense: L{pulp.LpMinimize} or L{pulp.LpMaximize}
+        @type sense: L{int}
+        """
+        registry = model.registry
+        nVars = len( registry )
+        indptr, col, val = model.get_csr()
+        row = numpy.repeat( numpy.arange( model.nRows ), numpy.diff( indptr ) )
+
+        # objective entries (row -1), and an objective entry for each
+        # column without any nonzero to have all columns declared
+        obj = model.obj*conditional( sense == pulp.LpMaximize, -1.0, 1.0 )
+        obj_col = numpy.flatnonzero( (obj != 0.0) | (numpy.bincount( col, minlength = nVars ) == 0) )
+        row = numpy.concatenate( (numpy.repeat( -1, len( obj_col ) ), row) )
+        col = numpy.concatenate( (obj_col, col) )
+        val = numpy.concatenate( (obj[obj_col], val) )
+        order = numpy.lexsort( (row, col) )
+
+        is_integer = (registry.is_integer[:nVars] & bool( self.mip )).tolist()
+        lower = model.lower
+        upper = model.upper
+
+        lines = ["NAME          GNW", "ROWS", " N  OBJ"]
+        lines += [" %s  R%07d" % (self.sense_by_code[s], i) for i, s in enumerate( model.sense.tolist() )]
+
+        lines.append( "COLUMNS" )
+        integer = False
+        for j, i, v in zip( col[order].tolist(), row[order].tolist(), val[order].tolist() ):
+            if is_integer[j] != integer:
+                integer = not integer
+                lines.append( conditional( integer,
+                                           "    MARK      'MARKER'                 'INTORG'",
+                                           "    MARK      'MARKER'                 'INTEND'" ) )
+            lines.append( "    C%07d  %-8s  % .12e" % (j, conditional( i < 0, "OBJ", "R%07d" % i ), v) )
+        if integer:
+            lines.append( "    MARK      'MARKER'                 'INTEND'" )
+
+        lines.append( "RHS" )
+        lines += ["    RHS       R%07d  % .12e" % (i, r) for i, r in enumerate( model.rhs.tolist() ) if r != 0.0]
+
+        lines.append( "BOUNDS" )
+        for j, (l, u) in enumerate( zip( lower.tolist(), upper.tolist() ) ):
+            if l == u:
+                lines.append( " FX BND       C%07d  % .12e" % (j, l) )
+                continue
+            if l == -numpy.inf:
+                lines.append( conditional( u == numpy.inf, " FR BND       C%07d" % j, " MI BND       C%07d" % j ) )
+            elif l != 0.0 or is_integer[j]:
+                lines.append( " LO BND       C%07d  % .12e" % (j, l) )
+            if u != numpy.inf:
+                lines.append( " UP BND       C%07d  % .12e" % (j, u) )
+            elif is_integer[j]:
+                lines.append( " PL BND       C%07d" % j )
+        lines.append( "ENDATA" )
+
+        file = open( fname, "w" )
+        file.write( "\n".join( lines ) + "\n" )
+        file.close()
+
+
+    def read_solution(self, model, fname):
+        """
+        Reads a CBC solution file of a model written by
+        L{write_mps}.
+
+        @return: problem status and value per column
+        @rtype: L{tuple} of (L{int}, L{numpy.array}
+            of dtype='double')
+        """
+        values = numpy.zeros( len( model.registry ), dtype='double' )
+        file = open( fname )
+        try:
+            status = self.status_by_name.get( file.readline().split( " - " )[0].strip(), pulp.LpStatusUndefined )
+            for line in file:
+                words = line.split()
+                if len( words ) < 3:
+                    continue
+                # infeasible rows/columns are marked by '**'
+                if words[0] == "**":
+                    words = words[1:]
+                if words[1][0] == "C":
+                    values[int( words[1][1:] )] = float( words[2] )
+        finally:
+            file.close()
+        return status, values
+
+
+    def solve(self, model, sense=pulp.LpMaximize):
+        """
+        Solves model and, if a solution was found, sets the
+        solution values of the lp variable registry of model
+        (see L{gnw.lp_var_registry.LpVarRegistry.set_values}).
+        Columns used by no row and no objective block (see
+        L{gnw.sparse_model.SparseModel.is_used}) are left
+        without value, as on the pulp path.
+
+        @param model: compiled sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+
+        @param sense: L{pulp.LpMinimize} or L{pulp.LpMaximize}
+        @type sense: L{int}
+
+        @return: problem status, see L{pulp.LpStatus}
+        @rtype: L{int}
+
+        @raise pulp.PulpSolverError: CBC could not be executed
+            or did not write a solution file
+        """
+        if not self.available():
+            raise pulp.PulpSolverError, "cannot execute '%s' (gnw.sparse_solver.SparseSolver.solve)" % self.path
+
+        if self.keepFiles:
+            base = "gnw-sparse"
+        else:
+            handle, base = tempfile.mkstemp( prefix = "gnw-sparse-" )
+            os.close( handle )
+            os.remove( base )
+        fname_mps = base + ".mps"
+        fname_sol = base + ".sol"
+
+        try:
+            self.write_mps( model, fname_mps, sense )
+
+            args = [self.path, fname_mps] + self.get_options()
+            args += [conditional( self.mip and model.registry.is_integer[:len( model.registry )].any(), "branch", "initialSolve" ),
+                     "printingOptions", "all", "solution", fname_sol]
+            pipe = conditional( self.msg, None, open( os.devnull, "w" ) )
+            try:
+                if subprocess.call( args, stdout = pipe, stderr = pipe ) != 0 or not os.path.exists( fname_sol ):
+                    raise pulp.PulpSolverError, "error while executing '%s' (gnw.sparse_solver.SparseSolver.solve)" % self.path
+            finally:
+                if pipe is not None:
+                    pipe.close()
+
+            status, values = self.read_solution( model, fname_sol )
+        finally:
+            if not self.keepFiles:
+                for fname in (fname_mps, fname_sol):
+                    if os.path.exists( fname ):
+                        os.remove( fname )
+
+        if status != pulp.LpStatusUndefined:
+            values[~model.is_used] = numpy.nan
+            model.registry.set_values( values )
+        return status
+
+
+
+if __name__ == "__main__":
+    print "gnw.sparse_solver.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -153,7 +153,82 @@ class Storage( Entity ):
         curves for each dispatch period and each capacity
         rate level.
     @type rel_rate_b_trig: L{numpy.array} of L{pulp.LpVariable}
+    
+    @ivar inj_rate_cumsum: lp decision variables representing the
+        cumulative sums of L{inj_rate} weighted by
+        L{gnw.entity.Entity.DISPATCH_PERIOD}, created analogously
+        to L{lev_pct_cumsum}.
+    @type inj_rate_cumsum: L{numpy.array} of L{pulp.LpVariable}
+    
+    @ivar rel_rate_cumsum: lp decision variables representing the
+        cumulative sums of L{rel_rate} weighted by
+        L{gnw.entity.Entity.DISPATCH_PERIOD}, created analogously
+        to L{lev_pct_cumsum}.
+    @type rel_rate_cumsum: L{numpy.array} of L{pulp.LpVariable}
+    
+    @ivar lev_pct_cumsum: lp decision variables representing the
+        cumulative sums of L{lev_pct}, created only if
+        L{CONSTRAINT_COEFF} holds sufficiently many windows
+        of LEV_PCT constraints (see L{compile_constraint_coeff}).
+        Same for L{inj_pct_cumsum} and L{rel_pct_cumsum}.
+    @type lev_pct_cumsum: L{numpy.array} of L{pulp.LpVariable}
+    
+    @ivar ccoeff_group_dict: boundary types and bounds of the
+        L{CONSTRAINT_COEFF} rows per (constraint type, START, FINAL)
+        group, see L{compile_constraint_coeff}
+    @type ccoeff_group_dict: L{dict}
+    
+    @ivar ccoeff_group_list: keys of L{ccoeff_group_dict} in
+        order of appearance in L{CONSTRAINT_COEFF}
+    @type ccoeff_group_list: L{list} of L{tuple}
+    
+    @ivar ccoeff_cumsum_list: constraint types of which window
+        sums are built from cumulative sums
+    @type ccoeff_cumsum_list: L{list} of L{int}
+    
+    @cvar CCOEFF_CUMSUM_RATIO: ratio of the total length of windows
+        of a constraint type to the number of dispatch periods
+        above which cumulative sums are used
+    @type CCOEFF_CUMSUM_RATIO: L{int}
+    
+    @cvar ccoeff_ctype_list: constraint types of
+        L{CONSTRAINT_COEFF} handled by storages
+    @type ccoeff_ctype_list: L{list} of L{int}
+    
+    @cvar ccoeff_attr_dict: attribute name of the lp variables
+        summed over per constraint type
+    @type ccoeff_attr_dict: L{dict}
+    
+    @cvar ccoeff_bound_ctype_list: constraint types of which
+        single dispatch period rows are lp variable bounds
+    @type ccoeff_bound_ctype_list: L{list} of L{int}
+    
+    @cvar ccoeff_sense_dict: sense of rows per boundary type
+    @type ccoeff_sense_dict: L{dict}
     """
+    CCOEFF_CUMSUM_RATIO = 3
+    
+    ccoeff_ctype_list = [ConstraintCoeff.ConstraintType.LEV_PCT,
+                         ConstraintCoeff.ConstraintType.INJ_CAP_PCT,
+                         ConstraintCoeff.ConstraintType.REL_CAP_PCT,
+                         ConstraintCoeff.ConstraintType.INJ_VOL_PCT,
+                         ConstraintCoeff.ConstraintType.REL_VOL_PCT]
+    
+    ccoeff_attr_dict = {ConstraintCoeff.ConstraintType.LEV_PCT     : "lev_pct",
+                        ConstraintCoeff.ConstraintType.INJ_CAP_PCT : "inj_rate",
+                        ConstraintCoeff.ConstraintType.REL_CAP_PCT : "rel_rate",
+                        ConstraintCoeff.ConstraintType.INJ_VOL_PCT : "inj_pct",
+                        ConstraintCoeff.ConstraintType.REL_VOL_PCT : "rel_pct"}
+    
+    ccoeff_bound_ctype_list = [ConstraintCoeff.ConstraintType.LEV_PCT,
+                               ConstraintCoeff.ConstraintType.INJ_VOL_PCT,
+                               ConstraintCoeff.ConstraintType.REL_VOL_PCT]
+    
+    ccoeff_sense_dict = {ConstraintCoeff.BoundaryType.LB : pulp.LpConstraintGE,
+                         ConstraintCoeff.BoundaryType.UB : pulp.LpConstraintLE,
+                         ConstraintCoeff.BoundaryType.EQ : pulp.LpConstraintEQ}
+    
+    
     def __init__(self, name,
                  sellbuy = __eSell__,
                  injCap = None,
@@ -286,6 +361,10 @@ class Storage( Entity ):
         self.rel_rate_b_trig = numpy.empty( 0, dtype='object' )
         self.rel_rate_a_trig = numpy.empty( 0, dtype='object' )
         
+        self.ccoeff_group_dict = {}
+        self.ccoeff_group_list = []
+        self.ccoeff_cumsum_list = []
+        
 
     def set_SB(self, value):
         """
@@ -440,24 +519,29 @@ class Storage( Entity ):
         nSteps = len( self.DISPATCH_PERIOD )
         nPoints = nSteps + 1
         
-        self.vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_vol", range( nSteps ) ) )
+        self.create_lp_var_block( "vol", prefix + self.name + "_vol", nSteps )
         
-        self.lev_pct = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_lev_pct", range( nPoints ), lowBound = 0.0 ) )
-        self.dsp_pct = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_dsp_pct", range( nSteps ) ) )
-        self.inj_pct = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_inj_pct", range( nSteps ), lowBound = 0.0 ) )
-        self.rel_pct = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_rel_pct", range( nSteps ), lowBound = 0.0 ) )
+        self.create_lp_var_block( "lev_pct", prefix + self.name + "_lev_pct", nPoints, lowBound = 0.0 )
+        self.create_lp_var_block( "dsp_pct", prefix + self.name + "_dsp_pct", nSteps )
+        self.create_lp_var_block( "inj_pct", prefix + self.name + "_inj_pct", nSteps, lowBound = 0.0 )
+        self.create_lp_var_block( "rel_pct", prefix + self.name + "_rel_pct", nSteps, lowBound = 0.0 )
         
         nInjLevels = len( self.LEV_DEP_INJ_CAP.LEVEL )
-        self.inj_rate = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_inj_rate", range( nSteps ), lowBound = 0.0 ) )
+        self.create_lp_var_block( "inj_rate", prefix + self.name + "_inj_rate", nSteps, lowBound = 0.0 )
         if nInjLevels > 0:
-            self.inj_rate_b_trig = numpy.array( [[pulp.LpVariable( prefix + self.name + "_inj_rate_b_trig_%d_%d" % (t,l), lowBound = 0, upBound = 1, cat = pulp.LpInteger ) for l in xrange( nInjLevels )] for t in xrange( nSteps )] )
-            self.inj_rate_a_trig = numpy.array( [[pulp.LpVariable( prefix + self.name + "_inj_rate_a_trig_%d_%d" % (t,l), lowBound = 0, upBound = 1, cat = pulp.LpInteger ) for l in xrange( nInjLevels )] for t in xrange( nSteps )] )
+            self.create_lp_var_block( "inj_rate_b_trig", prefix + self.name + "_inj_rate_b_trig", (nSteps, nInjLevels), lowBound = 0, upBound = 1, cat = pulp.LpInteger )
+            self.create_lp_var_block( "inj_rate_a_trig", prefix + self.name + "_inj_rate_a_trig", (nSteps, nInjLevels), lowBound = 0, upBound = 1, cat = pulp.LpInteger )
 
         nRelLevels = len( self.LEV_DEP_REL_CAP.LEVEL )
-        self.rel_rate = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_rel_rate", range( nSteps ), lowBound = 0.0 ) )
+        self.create_lp_var_block( "rel_rate", prefix + self.name + "_rel_rate", nSteps, lowBound = 0.0 )
         if nRelLevels > 0:
-            self.rel_rate_b_trig = numpy.array( [[pulp.LpVariable( prefix + self.name + "_rel_rate_b_trig_%d_%d" % (t,l), lowBound = 0, upBound = 1, cat = pulp.LpInteger ) for l in xrange( nRelLevels )] for t in xrange( nSteps )] )
-            self.rel_rate_a_trig = numpy.array( [[pulp.LpVariable( prefix + self.name + "_rel_rate_a_trig_%d_%d" % (t,l), lowBound = 0, upBound = 1, cat = pulp.LpInteger ) for l in xrange( nRelLevels )] for t in xrange( nSteps )] )
+            self.create_lp_var_block( "rel_rate_b_trig", prefix + self.name + "_rel_rate_b_trig", (nSteps, nRelLevels), lowBound = 0, upBound = 1, cat = pulp.LpInteger )
+            self.create_lp_var_block( "rel_rate_a_trig", prefix + self.name + "_rel_rate_a_trig", (nSteps, nRelLevels), lowBound = 0, upBound = 1, cat = pulp.LpInteger )
+        
+        self.compile_constraint_coeff()
+        for ctype in self.ccoeff_cumsum_list:
+            attr = self.ccoeff_attr_dict[ctype] + "_cumsum"
+            self.create_lp_var_block( attr, prefix + self.name + "_" + attr, len( self.get_lp_var_indices( self.ccoeff_attr_dict[ctype] ) ) )
 
             
     def create_model(self, prefix=""):
@@ -515,114 +599,291 @@ class Storage( Entity ):
         self.objective_list.append( self.get_objective_value() )
 
 
-    def create_constraint_coeff_constraints(self):
-        for i in xrange( len( self.CONSTRAINT_COEFF ) ):
-            if self.CONSTRAINT_COEFF[i].CTYPE & ConstraintCoeff.ConstraintType.LEV_PCT:
-                self.create_lev_constraint( self.CONSTRAINT_COEFF[i] )
-
-            if self.CONSTRAINT_COEFF[i].CTYPE & ConstraintCoeff.ConstraintType.INJ_CAP_PCT:
-                self.create_inj_cap_constraint( self.CONSTRAINT_COEFF[i] )
-
-            if self.CONSTRAINT_COEFF[i].CTYPE & ConstraintCoeff.ConstraintType.REL_CAP_PCT:
-                self.create_rel_cap_constraint( self.CONSTRAINT_COEFF[i] )
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the rows and
+        objective terms of the storage model (see L{create_model})
+        to model as blocks of column indices, vectorised over all
+        dispatch periods.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        super( Storage, self ).create_model( prefix )
+        
+        vol = self.get_lp_var_indices( "vol" )
+        lev_pct = self.get_lp_var_indices( "lev_pct" )
+        dsp_pct = self.get_lp_var_indices( "dsp_pct" )
+        inj_pct = self.get_lp_var_indices( "inj_pct" )
+        rel_pct = self.get_lp_var_indices( "rel_pct" )
+        inj_rate = self.get_lp_var_indices( "inj_rate" )
+        rel_rate = self.get_lp_var_indices( "rel_rate" )
+        
+        # storage start level constraint
+        model.add_rows( self, lev_pct[:1], 1.0, model.EQ, self.START_LEV_PCT )
+        
+        # storage level balance constraints
+        model.add_rows( self, numpy.column_stack( (lev_pct[1:], lev_pct[:-1], dsp_pct) ), (1.0, -1.0, -1.0), model.EQ, 0.0 )
+        
+        # storage end level constraint
+        if self.FINAL_LEV_PCT is not None:
+            model.add_rows( self, lev_pct[-1:], 1.0, conditional( self.STRICT_FINAL_LEV, model.EQ, model.GE ), self.FINAL_LEV_PCT )
+        
+        # storage constraints defined by CONSTRAINT_COEFF array
+        self.create_sparse_constraint_coeff_rows( model, lev_pct, dsp_pct )
+        
+        # storage level dependent injection/release capacity rate constraints
+        self.create_sparse_lev_dep_cap_rows( model, self.LEV_DEP_INJ_CAP, lev_pct, inj_rate, "inj_rate_b_trig", "inj_rate_a_trig" )
+        self.create_sparse_lev_dep_cap_rows( model, self.LEV_DEP_REL_CAP, lev_pct, rel_rate, "rel_rate_b_trig", "rel_rate_a_trig" )
+        
+        # vol[t] == -dsp_pct[t]*WGV
+        model.add_rows( self, numpy.column_stack( (vol, dsp_pct) ), (1.0, self.WGV), model.EQ, 0.0 )
+        
+        # storage injection/release transformation constraints
+        model.add_rows( self, numpy.column_stack( (inj_pct, dsp_pct) ), (1.0, -1.0), model.GE, 0.0 )
+        model.add_rows( self, numpy.column_stack( (rel_pct, dsp_pct) ), (1.0, 1.0), model.GE, 0.0 )
+        
+        # storage injection/release cost components to objective function
+        DF = numpy.asarray( self.DISCOUNT_FACTOR, dtype='double' )
+        model.add_objective( inj_pct, self.SB*self.WGV*numpy.asarray( self.INJ_COST, dtype='double' )*DF )
+        model.add_objective( rel_pct, self.SB*self.WGV*numpy.asarray( self.REL_COST, dtype='double' )*DF )
 
-            if self.CONSTRAINT_COEFF[i].CTYPE & ConstraintCoeff.ConstraintType.INJ_VOL_PCT:
-                self.create_inj_vol_constraint( self.CONSTRAINT_COEFF[i] )
 
-            if self.CONSTRAINT_COEFF[i].CTYPE & ConstraintCoeff.ConstraintType.REL_VOL_PCT:
-                self.create_rel_vol_constraint( self.CONSTRAINT_COEFF[i] )
+    def create_sparse_constraint_coeff_rows(self, model, lev_pct, dsp_pct):
+        """
+        Helper function to add the rows defined by the compiled
+        CONSTRAINT_COEFF array (see L{compile_constraint_coeff}
+        and L{create_constraint_coeff_constraints}) to model,
+        one block per constraint type.
+        """
+        CType = ConstraintCoeff.ConstraintType
         
-
-    def create_lev_constraint(self, constraint_coeff = ConstraintCoeff()):
-        dispatchPeriodIdx = xrange( constraint_coeff.START, constraint_coeff.FINAL + 1 )
-        if constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.LB:
-            self.constraint_list.append( pulp.lpSum( [self.lev_pct[t] for t in dispatchPeriodIdx] )
-                                         >= constraint_coeff.BOUND )
-            
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.UB:
-            self.constraint_list.append( pulp.lpSum( [self.lev_pct[t] for t in dispatchPeriodIdx] )
-                                         <= constraint_coeff.BOUND )
+        for ctype in self.ccoeff_cumsum_list:
+            lp_vars = self.get_lp_var_indices( self.ccoeff_attr_dict[ctype] )
+            cumsum = self.get_lp_var_indices( self.ccoeff_attr_dict[ctype] + "_cumsum" )
+            weights = self.get_constraint_coeff_weights( ctype )
+            model.add_rows( self, numpy.column_stack( (cumsum[:1], lp_vars[:1]) ), (1.0, -weights[0]), model.EQ, 0.0 )
+            model.add_rows( self, numpy.column_stack( (cumsum[1:], cumsum[:-1], lp_vars[1:]) ),
+                            numpy.column_stack( (numpy.ones( len( cumsum ) - 1 ), -numpy.ones( len( cumsum ) - 1 ), -weights[1:]) ),
+                            model.EQ, 0.0 )
         
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.EQ:
-            self.constraint_list.append( pulp.lpSum( [self.lev_pct[t] for t in dispatchPeriodIdx] )
-                                         == constraint_coeff.BOUND )
+        row_list_dict = dict( [(ctype, []) for ctype in self.ccoeff_ctype_list] )
+        for group in self.ccoeff_group_list:
+            if self.is_constraint_coeff_bound( group ):
+                self.tighten_constraint_coeff_bounds( group )
+                continue
+            ctype, START, FINAL = group
+            row_list_dict[ctype] += [(START, FINAL, BTYPE, BOUND) for BTYPE, BOUND in self.ccoeff_group_dict[group]]
         
-        else:
-            raise ValueError, "create_lev_constraint: Unknown boundary type %d encountered for constraint" % constraint_coeff.BTYPE
+        for ctype in self.ccoeff_ctype_list:
+            if len( row_list_dict[ctype] ) == 0:
+                continue
+            nRows = len( row_list_dict[ctype] )
+            START, FINAL, BTYPE, BOUND = [numpy.array( array ) for array in zip( *row_list_dict[ctype] )]
+            SENSE = numpy.choose( BTYPE, (model.GE, model.LE, model.EQ) )
+            
+            # window sums
+            attr = self.ccoeff_attr_dict[ctype]
+            if ctype in self.ccoeff_cumsum_list:
+                cumsum = self.get_lp_var_indices( attr + "_cumsum" )
+                first = numpy.flatnonzero( START > 0 )
+                row = numpy.concatenate( (numpy.arange( nRows ), first) )
+                col = numpy.concatenate( (cumsum[FINAL], cumsum[START[first] - 1]) )
+                val = numpy.concatenate( (numpy.ones( nRows ), -numpy.ones( len( first ) )) )
+            else:
+                row, t = model.get_window_index( START, FINAL )
+                col = self.get_lp_var_indices( attr )[t]
+                val = self.get_constraint_coeff_weights( ctype )[t]
+            
+            if ctype == CType.INJ_CAP_PCT or ctype == CType.REL_CAP_PCT:
+                if ctype == CType.INJ_CAP_PCT:
+                    val = -BOUND[row]*self.INJ_CAP*val
+                else:
+                    val = BOUND[row]*self.REL_CAP*val
+                    SENSE = -SENSE
+                # sum of dsp_pct[t] over the window equals the level change
+                single = numpy.flatnonzero( START == FINAL )
+                multiple = numpy.flatnonzero( START != FINAL )
+                row = numpy.concatenate( (single, multiple, multiple, row) )
+                col = numpy.concatenate( (dsp_pct[START[single]], lev_pct[FINAL[multiple] + 1], lev_pct[START[multiple]], col) )
+                val = numpy.concatenate( (numpy.repeat( self.WGV, len( single ) + len( multiple ) ), numpy.repeat( -self.WGV, len( multiple ) ), val) )
+                model.add_triplets( self, nRows, row, col, val, SENSE, 0.0 )
+            else:
+                model.add_triplets( self, nRows, row, col, val, SENSE, BOUND )
 
 
-    def create_inj_cap_constraint(self, constraint_coeff = ConstraintCoeff()):
-        dispatchPeriodIdx = xrange( constraint_coeff.START, constraint_coeff.FINAL + 1 )
-        if constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.LB:
-            self.constraint_list.append( self.WGV*pulp.lpSum( [self.dsp_pct[t] for t in dispatchPeriodIdx] )
-                                         >= constraint_coeff.BOUND*self.INJ_CAP*pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.inj_rate[t] for t in dispatchPeriodIdx] ) )
-            
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.UB:
-            self.constraint_list.append( self.WGV*pulp.lpSum( [self.dsp_pct[t] for t in dispatchPeriodIdx] )
-                                         <= constraint_coeff.BOUND*self.INJ_CAP*pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.inj_rate[t] for t in dispatchPeriodIdx] ) )
+    def create_sparse_lev_dep_cap_rows(self, model, lev_dep_cap, lev_pct, rate, b_trig_attr, a_trig_attr):
+        """
+        Helper function to add level dependent injection
+        or release capacity rate rows to model (see
+        L{create_lev_dep_inj_cap_constraints}).
+        """
+        nSteps = len( rate )
+        nLevels = len( lev_dep_cap.LEVEL )
         
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.EQ:
-            self.constraint_list.append( self.WGV*pulp.lpSum( [self.dsp_pct[t] for t in dispatchPeriodIdx] )
-                                         == constraint_coeff.BOUND*self.INJ_CAP*pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.inj_rate[t] for t in dispatchPeriodIdx] ) )
+        if nLevels == 0:
+            model.add_rows( self, rate, 1.0, model.EQ, 1.0 )
+            return
         
-        else:
-            raise ValueError, "create_inj_cap_constraint: Unknown boundary type %d encountered for constraint" % constraint_coeff.BTYPE
+        # Backstep interpolation
+        LEVEL = numpy.tile( numpy.asarray( lev_dep_cap.LEVEL, dtype='double' ), nSteps )
+        RATE = numpy.asarray( lev_dep_cap.RATE, dtype='double' )
+        b_trig = self.get_lp_var_indices( b_trig_attr )
+        a_trig = self.get_lp_var_indices( a_trig_attr )
+        lev = numpy.repeat( lev_pct[:nSteps], nLevels ).reshape( (nSteps, nLevels) )
+        
+        b_lev = numpy.dstack( (b_trig, lev) ).reshape( (-1, 2) )
+        model.add_rows( self, b_lev, 1.0, model.GE, LEVEL )
+        model.add_rows( self, b_lev, 1.0, model.LE, LEVEL + 1.0 )
+        
+        model.add_rows( self, numpy.column_stack( (a_trig[:, 0], b_trig[:, 0]) ), (1.0, -1.0), model.EQ, 0.0 )
+        if nLevels > 1:
+            model.add_rows( self, numpy.dstack( (a_trig[:, 1:], b_trig[:, 1:], b_trig[:, :-1]) ).reshape( (-1, 3) ), (1.0, -1.0, 1.0), model.EQ, 0.0 )
+        
+        model.add_rows( self, a_trig, 1.0, model.EQ, 1.0 )
+        model.add_rows( self, numpy.column_stack( (a_trig, rate) ), numpy.append( RATE, -1.0 ), model.EQ, 0.0 )
 
 
-    def create_rel_cap_constraint(self, constraint_coeff = ConstraintCoeff()):
-        dispatchPeriodIdx = xrange( constraint_coeff.START, constraint_coeff.FINAL + 1 )
-        # Note the change of relational operator in LB and UB boudnary types
-        # compared to function create_inj_cap_constraint for example.
-        if constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.LB:
-            self.constraint_list.append( self.WGV*pulp.lpSum( [self.dsp_pct[t] for t in dispatchPeriodIdx] )
-                                         <= -constraint_coeff.BOUND*self.REL_CAP*pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.rel_rate[t] for t in dispatchPeriodIdx] ) )
-            
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.UB:
-            self.constraint_list.append( self.WGV*pulp.lpSum( [self.dsp_pct[t] for t in dispatchPeriodIdx] )
-                                         >= -constraint_coeff.BOUND*self.REL_CAP*pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.rel_rate[t] for t in dispatchPeriodIdx] ) )
+    def compile_constraint_coeff(self):
+        """
+        Compiles the CONSTRAINT_COEFF array by grouping its rows by
+        (constraint type, START, FINAL), i.e., by the lp variables
+        and the window of dispatch periods summed over, such that
+        each window sum is built once for all rows of a group (see
+        L{get_constraint_coeff_window_sum}). Lp variables are summed
+        through cumulative auxiliary lp variables, if the windows
+        spanning multiple dispatch periods of a constraint type
+        cover more than L{CCOEFF_CUMSUM_RATIO} times the number of
+        dispatch periods in total.
         
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.EQ:
-            self.constraint_list.append( self.WGV*pulp.lpSum( [self.dsp_pct[t] for t in dispatchPeriodIdx] )
-                                         == -constraint_coeff.BOUND*self.REL_CAP*pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.rel_rate[t] for t in dispatchPeriodIdx] ) )
+        @raise ValueError: unknown boundary type
+        """
+        BType = ConstraintCoeff.BoundaryType
         
-        else:
-            raise ValueError, "create_rel_cap_constraint: Unknown boundary type %d encountered for constraint" % constraint_coeff.BTYPE
+        self.ccoeff_group_dict = {}
+        self.ccoeff_group_list = []
+        length_dict = dict.fromkeys( self.ccoeff_ctype_list, 0 )
+        for coeff in self.CONSTRAINT_COEFF:
+            for ctype in self.ccoeff_ctype_list:
+                if not coeff.CTYPE & ctype:
+                    continue
+                if coeff.BTYPE not in (BType.LB, BType.UB, BType.EQ):
+                    raise ValueError, "compile_constraint_coeff: Unknown boundary type %d encountered for constraint" % coeff.BTYPE
+                
+                group = (ctype, coeff.START, coeff.FINAL)
+                if group not in self.ccoeff_group_dict:
+                    self.ccoeff_group_dict[group] = []
+                    self.ccoeff_group_list.append( group )
+                    if coeff.FINAL > coeff.START:
+                        length_dict[ctype] += coeff.FINAL - coeff.START + 1
+                self.ccoeff_group_dict[group].append( (coeff.BTYPE, coeff.BOUND) )
+        
+        nSteps = len( self.DISPATCH_PERIOD )
+        self.ccoeff_cumsum_list = [ctype for ctype in self.ccoeff_ctype_list
+                                   if length_dict[ctype] > self.CCOEFF_CUMSUM_RATIO*nSteps]
 
 
-    def create_inj_vol_constraint(self, constraint_coeff = ConstraintCoeff()):
-        dispatchPeriodIdx = xrange( constraint_coeff.START, constraint_coeff.FINAL + 1 )
-        if constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.LB:
-            self.constraint_list.append( pulp.lpSum( [self.inj_pct[t] for t in dispatchPeriodIdx] )
-                                         >= constraint_coeff.BOUND )
-        
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.UB:
-            self.constraint_list.append( pulp.lpSum( [self.inj_pct[t] for t in dispatchPeriodIdx] )
-                                         <= constraint_coeff.BOUND )
-    
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.EQ:
-            self.constraint_list.append( pulp.lpSum( [self.inj_pct[t] for t in dispatchPeriodIdx] )
-                                         == constraint_coeff.BOUND )
-    
-        else:
-            raise ValueError, "create_inj_vol_constraint: Unknown boundary type %d encountered for constraint" % constraint_coeff.BTYPE
+    def get_constraint_coeff_weights(self, ctype):
+        """
+        @return: coefficients of the lp variables summed over
+            by windows of constraint type ctype
+        @rtype: L{numpy.array} of dtype='double'
+        """
+        if ctype & (ConstraintCoeff.ConstraintType.INJ_CAP_PCT|ConstraintCoeff.ConstraintType.REL_CAP_PCT):
+            return numpy.asarray( self.DISPATCH_PERIOD, dtype='double' )
+        return numpy.ones( len( self.get_lp_var_indices( self.ccoeff_attr_dict[ctype] ) ), dtype='double' )
+
+
+    def is_constraint_coeff_bound(self, group):
+        """
+        @return: whether the rows of group constrain
+            a single lp variable, i.e., are bounds
+        @rtype: L{bool}
+        """
+        ctype, START, FINAL = group
+        return START == FINAL and ctype in self.ccoeff_bound_ctype_list
 
 
-    def create_rel_vol_constraint(self, constraint_coeff = ConstraintCoeff()):
-        dispatchPeriodIdx = xrange( constraint_coeff.START, constraint_coeff.FINAL + 1 )
-        if constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.LB:
-            self.constraint_list.append( pulp.lpSum( [self.rel_pct[t] for t in dispatchPeriodIdx] )
-                                         >= constraint_coeff.BOUND )
+    def create_constraint_coeff_constraints(self):
+        """
+        Helper function to set up the constraints
+        defined by the compiled CONSTRAINT_COEFF array
+        (see L{compile_constraint_coeff}). Groups
+        constraining a single lp variable tighten its bounds.
+        """
+        CType = ConstraintCoeff.ConstraintType
         
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.UB:
-            self.constraint_list.append( pulp.lpSum( [self.rel_pct[t] for t in dispatchPeriodIdx] )
-                                         <= constraint_coeff.BOUND )
-    
-        elif constraint_coeff.BTYPE == ConstraintCoeff.BoundaryType.EQ:
-            self.constraint_list.append( pulp.lpSum( [self.rel_pct[t] for t in dispatchPeriodIdx] )
-                                         == constraint_coeff.BOUND )
-    
-        else:
-            raise ValueError, "create_rel_vol_constraint: Unknown boundary type %d encountered for constraint" % constraint_coeff.BTYPE
+        # cumulative sums: cumsum[t] == cumsum[t - 1] + weight[t]*lp_var[t]
+        for ctype in self.ccoeff_cumsum_list:
+            attr = self.ccoeff_attr_dict[ctype]
+            lp_vars = getattr( self, attr )
+            cumsum = getattr( self, attr + "_cumsum" )
+            weights = self.get_constraint_coeff_weights( ctype )
+            self.constraint_list.append( cumsum[0] == weights[0]*lp_vars[0] )
+            for t in xrange( 1, len( lp_vars ) ):
+                self.constraint_list.append( cumsum[t] == cumsum[t - 1] + weights[t]*lp_vars[t] )
+        
+        for group in self.ccoeff_group_list:
+            if self.is_constraint_coeff_bound( group ):
+                self.tighten_constraint_coeff_bounds( group )
+                continue
+            
+            ctype, START, FINAL = group
+            window_sum = self.get_constraint_coeff_window_sum( ctype, START, FINAL )
+            if ctype == CType.INJ_CAP_PCT or ctype == CType.REL_CAP_PCT:
+                # sum of dsp_pct[t] over the window equals the level change
+                if START == FINAL:
+                    dsp_sum = self.dsp_pct[START]
+                else:
+                    dsp_sum = self.lev_pct[FINAL + 1] - self.lev_pct[START]
+            
+            for BTYPE, BOUND in self.ccoeff_group_dict[group]:
+                sense = self.ccoeff_sense_dict[BTYPE]
+                # Note the change of relational operator in LB and UB boundary
+                # types of REL_CAP_PCT compared to INJ_CAP_PCT constraints.
+                if ctype == CType.INJ_CAP_PCT:
+                    self.constraint_list.append( pulp.LpConstraint( self.WGV*dsp_sum - BOUND*self.INJ_CAP*window_sum, sense, rhs = 0.0 ) )
+                elif ctype == CType.REL_CAP_PCT:
+                    self.constraint_list.append( pulp.LpConstraint( self.WGV*dsp_sum + BOUND*self.REL_CAP*window_sum, -sense, rhs = 0.0 ) )
+                else:
+                    self.constraint_list.append( pulp.LpConstraint( window_sum, sense, rhs = BOUND ) )
+
+
+    def get_constraint_coeff_window_sum(self, ctype, START, FINAL):
+        """
+        @return: weighted sum of the lp variables of constraint
+            type ctype over dispatch periods START to FINAL
+            (see L{get_constraint_coeff_weights})
+        @rtype: L{pulp.LpAffineExpression}
+        """
+        attr = self.ccoeff_attr_dict[ctype]
+        if ctype in self.ccoeff_cumsum_list:
+            cumsum = getattr( self, attr + "_cumsum" )
+            if START == 0:
+                return pulp.LpAffineExpression( [(cumsum[FINAL], 1.0)] )
+            return cumsum[FINAL] - cumsum[START - 1]
+        
+        lp_vars = getattr( self, attr )
+        weights = self.get_constraint_coeff_weights( ctype )
+        return pulp.LpAffineExpression( [(lp_vars[t], weights[t]) for t in xrange( START, FINAL + 1 )] )
+
+
+    def tighten_constraint_coeff_bounds(self, group):
+        """
+        Tightens the bounds of the single lp variable constrained
+        by the rows of group (see L{is_constraint_coeff_bound}).
+        """
+        BType = ConstraintCoeff.BoundaryType
+        ctype, START, FINAL = group
+        for BTYPE, BOUND in self.ccoeff_group_dict[group]:
+            self.tighten_lp_var_bounds( self.ccoeff_attr_dict[ctype], START,
+                                        lowBound = conditional( BTYPE != BType.UB, BOUND, None ),
+                                        upBound = conditional( BTYPE != BType.LB, BOUND, None ) )
 
 
     def create_lev_dep_inj_cap_constraints(self):
@@ -706,7 +967,8 @@ class Storage( Entity ):
             + self.inj_rate_a_trig.tolist()\
             + self.rel_rate.tolist()\
             + self.rel_rate_b_trig.tolist()\
-            + self.rel_rate_a_trig.tolist()
+            + self.rel_rate_a_trig.tolist()\
+            + sum( [getattr( self, self.ccoeff_attr_dict[ctype] + "_cumsum" ).tolist() for ctype in self.ccoeff_cumsum_list], [] )
 
             
     def update_fmt_dict(self, fmt_dict={}):
@@ -731,30 +993,30 @@ class Storage( Entity ):
                          'START_LEV_PCT' :     FmtDictEntry( [ self.ffmt ], 'START_LEV_PCT [%]',        0, None,            False,  self.START_LEV_PCT ),
                          'FINAL_LEV_PCT' :     FmtDictEntry( [ self.ffmt ], 'FINAL_LEV_PCT [%]',        0, None,            False,  self.FINAL_LEV_PCT ),
                          'STRICT_FINAL_LEV' :  FmtDictEntry( [ self.sfmt ], 'STRICT_FINAL_LEV',         0, None,            False,  self.STRICT_FINAL_LEV ),
-                         'vol':                FmtDictEntry( [ self.ffmt ], 'vol[t] [MWh]',             1, (nSteps,),       True,   self.vol),
-                         'lev_pct' :           FmtDictEntry( [ self.ffmt ], 'lev_pct[t] [%]',           1, (nPoints,),      True,   self.lev_pct ),
-                         'dsp_pct' :           FmtDictEntry( [ self.ffmt ], 'dsp_pct[t] [%]',           1, (nSteps,),       True,   self.dsp_pct ),
-                         'rel_pct' :           FmtDictEntry( [ self.ffmt ], 'rel_pct[t] [%]',           1, (nSteps,),       True,   self.rel_pct ),
-                         'inj_pct' :           FmtDictEntry( [ self.ffmt ], 'inj_pct[t] [%]',           1, (nSteps,),       True,   self.inj_pct ),
+                         'vol':                FmtDictEntry( [ self.ffmt ], 'vol[t] [MWh]',             1, (nSteps,),       True,   self.get_lp_var_solution( "vol" )),
+                         'lev_pct' :           FmtDictEntry( [ self.ffmt ], 'lev_pct[t] [%]',           1, (nPoints,),      True,   self.get_lp_var_solution( "lev_pct" ) ),
+                         'dsp_pct' :           FmtDictEntry( [ self.ffmt ], 'dsp_pct[t] [%]',           1, (nSteps,),       True,   self.get_lp_var_solution( "dsp_pct" ) ),
+                         'rel_pct' :           FmtDictEntry( [ self.ffmt ], 'rel_pct[t] [%]',           1, (nSteps,),       True,   self.get_lp_var_solution( "rel_pct" ) ),
+                         'inj_pct' :           FmtDictEntry( [ self.ffmt ], 'inj_pct[t] [%]',           1, (nSteps,),       True,   self.get_lp_var_solution( "inj_pct" ) ),
                          'INJ_COST' :          FmtDictEntry( [ self.ffmt ], 'INJ_COST[t] [EUR/MWh]',    1, (nSteps,),       False,  self.INJ_COST ),
                          'REL_COST' :          FmtDictEntry( [ self.ffmt ], 'REL_COST[t] [EUR/MWh]',    1, (nSteps,),       False,  self.REL_COST ),
                          'DF' :                FmtDictEntry( [ self.ffmt ], 'DF[t]',                    1, (nSteps,),       False,  self.DISCOUNT_FACTOR ),
-                         'inj_rate' :          FmtDictEntry( [ self.ffmt ], 'inj_rate[t] [%]',          1, (nSteps,),       True,   self.inj_rate ),
-                         'rel_rate' :          FmtDictEntry( [ self.ffmt ], 'rel_rate[t] [%]',          1, (nSteps,),       True,   self.rel_rate )})
+                         'inj_rate' :          FmtDictEntry( [ self.ffmt ], 'inj_rate[t] [%]',          1, (nSteps,),       True,   self.get_lp_var_solution( "inj_rate" ) ),
+                         'rel_rate' :          FmtDictEntry( [ self.ffmt ], 'rel_rate[t] [%]',          1, (nSteps,),       True,   self.get_lp_var_solution( "rel_rate" ) )})
         
         nInjLevs = len( self.LEV_DEP_INJ_CAP.LEVEL ) 
         if  nInjLevs > 0:
             fmt_dict.update({'LEV_DEP_INJ_CAP_LEVEL' : FmtDictEntry( [ self.ffmt ]*nInjLevs, 'LEV_DEP_INJ_CAP.LEVEL[i] [%]', 1, (nInjLevs,), False, self.LEV_DEP_INJ_CAP.LEVEL ),
                              'LEV_DEP_INJ_CAP_RATE' :  FmtDictEntry( [ self.ffmt ]*nInjLevs, 'LEV_DEP_INJ_CAP.RATE[i] [%]',  1, (nInjLevs,), False, self.LEV_DEP_INJ_CAP.RATE ),
-                             'inj_rate_b_trig' :       FmtDictEntry( [ self.ifmt ]*nInjLevs, 'inj_rate_b_trig[t,%d]', 2, (nSteps,nInjLevs), True, self.inj_rate_b_trig ),
-                             'inj_rate_a_trig' :       FmtDictEntry( [ self.ifmt ]*nInjLevs, 'inj_rate_a_trig[t,%d]', 2, (nSteps,nInjLevs), True, self.inj_rate_a_trig )})
+                             'inj_rate_b_trig' :       FmtDictEntry( [ self.ifmt ]*nInjLevs, 'inj_rate_b_trig[t,%d]', 2, (nSteps,nInjLevs), True, self.get_lp_var_solution( "inj_rate_b_trig" ) ),
+                             'inj_rate_a_trig' :       FmtDictEntry( [ self.ifmt ]*nInjLevs, 'inj_rate_a_trig[t,%d]', 2, (nSteps,nInjLevs), True, self.get_lp_var_solution( "inj_rate_a_trig" ) )})
             
         nRelLevs = len( self.LEV_DEP_REL_CAP.LEVEL )
         if nRelLevs > 0:
             fmt_dict.update({'LEV_DEP_REL_CAP_LEVEL' : FmtDictEntry( [ self.ffmt ]*nRelLevs, 'LEV_DEP_REL_CAP.LEVEL[i] [%]', 1, (nRelLevs,), False, self.LEV_DEP_REL_CAP.LEVEL ),
                              'LEV_DEP_REL_CAP_RATE' :  FmtDictEntry( [ self.ffmt ]*nRelLevs, 'LEV_DEP_REL_CAP.RATE[i] [%]',  1, (nRelLevs,), False, self.LEV_DEP_REL_CAP.RATE ),
-                             'rel_rate_b_trig' :       FmtDictEntry( [ self.ifmt ]*nRelLevs, 'rel_rate_b_trig[t,%d]', 2, (nSteps,nRelLevs), True, self.rel_rate_b_trig ),
-                             'rel_rate_a_trig' :       FmtDictEntry( [ self.ifmt ]*nRelLevs, 'rel_rate_a_trig[t,%d]', 2, (nSteps,nRelLevs), True, self.rel_rate_a_trig )})
+                             'rel_rate_b_trig' :       FmtDictEntry( [ self.ifmt ]*nRelLevs, 'rel_rate_b_trig[t,%d]', 2, (nSteps,nRelLevs), True, self.get_lp_var_solution( "rel_rate_b_trig" ) ),
+                             'rel_rate_a_trig' :       FmtDictEntry( [ self.ifmt ]*nRelLevs, 'rel_rate_a_trig[t,%d]', 2, (nSteps,nRelLevs), True, self.get_lp_var_solution( "rel_rate_a_trig" ) )})
 
         super( Storage, self ).update_fmt_dict( fmt_dict )
 
@@ -764,9 +1026,11 @@ class Storage( Entity ):
         """
         nSteps = len( self.DISPATCH_PERIOD )
         
-        vol = [-self.SB*self.vol[t].varValue for t in xrange( nSteps )]
-        cashflow = [self.SB*(self.INJ_COST[t]*self.inj_pct[t].varValue +
-                             self.REL_COST[t]*self.rel_pct[t].varValue)*self.WGV for t in xrange( nSteps )]
+        vol = (-self.SB*self.get_lp_var_solution( "vol" )).tolist()
+        inj_pct = self.get_lp_var_solution( "inj_pct" )
+        rel_pct = self.get_lp_var_solution( "rel_pct" )
+        cashflow = [self.SB*(self.INJ_COST[t]*inj_pct[t] +
+                             self.REL_COST[t]*rel_pct[t])*self.WGV for t in xrange( nSteps )]
         
         return (vol, cashflow) 
 
@@ -796,6 +1060,29 @@ class Storage( Entity ):
         return mtm
 
 
+    def get_mark_to_market_terms(self):
+        """
+        Returns the constant and the terms of the mark to
+        market value (see
+        L{gnw.entity.Entity.get_mark_to_market_terms}).
+        
+        @return: constant, solution value arrays and
+            coefficient arrays
+        @rtype: L{tuple} of (L{float}, L{list} of L{numpy.array},
+            L{list} of L{numpy.array})
+        """
+        constant, value_list, coeff_list = super( Storage, self ).get_mark_to_market_terms()
+
+        nSteps = len( self.DISPATCH_PERIOD )
+        # storage injection/release cost components to objective function
+        value_list.append( self.get_lp_var_solution( "inj_pct" ) )
+        coeff_list.append( self.INJ_COST[:nSteps]*self.DISCOUNT_FACTOR[:nSteps]*(self.SB*self.WGV) )
+        value_list.append( self.get_lp_var_solution( "rel_pct" ) )
+        coeff_list.append( self.REL_COST[:nSteps]*self.DISCOUNT_FACTOR[:nSteps]*(self.SB*self.WGV) )
+        
+        return constant, value_list, coeff_list
+
+
 class LevDepDispatchCurve( object ):
     """
     Encapsulates information on level dependent capacity
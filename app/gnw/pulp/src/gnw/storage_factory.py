@@ -183,15 +183,15 @@ class StorageFactory( object ):
         
         constraint_coeff_list = []
         if 'MIN_LEV_PCT' in strg_dict:
-            constraint_coeff_list += strg_dict['MIN_LEV_PCT']
+            constraint_coeff_list += list( strg_dict['MIN_LEV_PCT'] )
         if 'MAX_LEV_PCT' in strg_dict:
-            constraint_coeff_list + strg_dict['MAX_LEV_PCT']
+            constraint_coeff_list += list( strg_dict['MAX_LEV_PCT'] )
         if 'MAX_INJ_CAP_PCT' in strg_dict:
-            constraint_coeff_list += strg_dict['MAX_INJ_CAP_PCT']
+            constraint_coeff_list += list( strg_dict['MAX_INJ_CAP_PCT'] )
         if 'MAX_REL_CAP_PCT' in strg_dict:
-            constraint_coeff_list += strg_dict['MAX_REL_CAP_PCT']
+            constraint_coeff_list += list( strg_dict['MAX_REL_CAP_PCT'] )
         if 'CONSTRAINT_COEFF' in strg_dict:
-            constraint_coeff_list += strg_dict['CONSTRAINT_COEFF']
+            constraint_coeff_list += list( strg_dict['CONSTRAINT_COEFF'] )
 
             
         INJ_CAP = None
@@ -25,6 +25,7 @@ from gnw.util import conditional
 from gnw.util import isnumeric
 from gnw.util import isint
 from gnw.util import issequence
+from gnw.util import isarray
 
 from __init__ import __eSell__
 from __init__ import __eBuy___
@@ -329,6 +330,8 @@ class Supplier( Entity ):
         """
         super( Supplier, self ).__init__( name )
         
+        self.contract_price_cumsum = None
+        
         self.set_SB( sellbuy )
 
         self.ACQ = conditional( acq is None, 1.0, acq )
@@ -536,7 +539,7 @@ class Supplier( Entity ):
                 else:
                     initial_balance = value
                     
-        elif issequence( value ):
+        elif issequence( value ) or isarray( value ):
             if has_flag:
                 if has_expiry_flag:
                     if len( value ) != num_expiry_periods:
@@ -723,8 +726,8 @@ class Supplier( Entity ):
         """
         """
         nSteps = len( self.DISPATCH_PERIOD )
-        self.pos_pct = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_pos_pct", range( nSteps ), lowBound = 0.0 ) )
-        self.vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_vol", range( nSteps ), lowBound = 0.0 ) )
+        self.create_lp_var_block( "pos_pct", prefix + self.name + "_pos_pct", nSteps, lowBound = 0.0 )
+        self.create_lp_var_block( "vol", prefix + self.name + "_vol", nSteps, lowBound = 0.0 )
         
 
     def create_mup_and_cfw_lp_vars(self, prefix=""):
@@ -732,10 +735,7 @@ class Supplier( Entity ):
         """
         if self.HAS_MUP or self.HAS_CFW:
             nPeriods = len( self.acc_period_tuple_list )
-            self.top_period_trig = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_top_period_trig",
-                                                                        range( nPeriods ),
-                                                                        lowBound = 0, upBound = 1,
-                                                                        cat = pulp.LpInteger ) )
+            self.create_lp_var_block( "top_period_trig", prefix + self.name + "_top_period_trig", nPeriods, lowBound = 0, upBound = 1, cat = pulp.LpInteger )
         self.create_mup_lp_vars( prefix )
         self.create_cfw_lp_vars( prefix )
 
@@ -748,35 +748,21 @@ class Supplier( Entity ):
         
         if self.HAS_MUP:
             nPeriods = len( self.acc_period_tuple_list )
-            self.mup_period_vol_bal = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_period_vol_bal",
-                                                                           range( nPeriods ),
-                                                                           lowBound = 0.0 ) )
-            self.mup_period_vol_inc = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_period_vol_inc",
-                                                                           range( nPeriods ),
-                                                                           lowBound = 0.0 ) )
-            self.mup_period_vol_dec = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_period_vol_dec",
-                                                                           range( nPeriods ),
-                                                                           lowBound = 0.0 ) )
-            self.mup_period_vol_chg = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_period_vol_chg",
-                                                                           range( nPeriods ) ) ) # is free variable, may be replaced by affine expression
+            self.create_lp_var_block( "mup_period_vol_bal", prefix + self.name + "_mup_period_vol_bal", nPeriods, lowBound = 0.0 )
+            self.create_lp_var_block( "mup_period_vol_inc", prefix + self.name + "_mup_period_vol_inc", nPeriods, lowBound = 0.0 )
+            self.create_lp_var_block( "mup_period_vol_dec", prefix + self.name + "_mup_period_vol_dec", nPeriods, lowBound = 0.0 )
+            self.create_lp_var_block( "mup_period_vol_chg", prefix + self.name + "_mup_period_vol_chg", nPeriods ) # is free variable, may be replaced by affine expression
             
             nSteps = len( self.DISPATCH_PERIOD )
-            self.mup_trig = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_trig",
-                                                                 range( nSteps ),
-                                                                 lowBound = 0, upBound = 1,
-                                                                 cat = pulp.LpInteger ) )
-            self.mup_vol = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_vol",
-                                                                range( nSteps ),
-                                                                lowBound = 0.0 ) )
+            self.create_lp_var_block( "mup_trig", prefix + self.name + "_mup_trig", nSteps, lowBound = 0, upBound = 1, cat = pulp.LpInteger )
+            self.create_lp_var_block( "mup_vol", prefix + self.name + "_mup_vol", nSteps, lowBound = 0.0 )
+            # remaining volume after dispatch period t up to the end of its accounting period
+            self.create_lp_var_block( "mup_rem_vol", prefix + self.name + "_mup_rem_vol", nSteps, lowBound = 0.0 )
 
             if self.HAS_MUP_EXPIRY:
-                self.mup_period_vol_exp_bal = numpy.array( [[pulp.LpVariable( prefix + self.name + "_mup_period_vol_exp_bal_%d_%d" % (k,i), lowBound = 0.0 )
-                                                             for i in range( self.MUP_NUM_EXPIRY_PERIODS )] for k in range( nPeriods )] )
-                self.mup_period_vol_exp_dec = numpy.array( [[pulp.LpVariable( prefix + self.name + "_mup_period_vol_exp_dec_%d_%d" % (k,i), lowBound = 0.0 )
-                                                             for i in range( self.MUP_NUM_EXPIRY_PERIODS )] for k in range( nPeriods )] )
-                self.mup_period_vol_exp = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_mup_period_vol_exp",
-                                                                               range( nPeriods ),
-                                                                               lowBound = 0.0 ) )
+                self.create_lp_var_block( "mup_period_vol_exp_bal", prefix + self.name + "_mup_period_vol_exp_bal", (nPeriods, self.MUP_NUM_EXPIRY_PERIODS), lowBound = 0.0 )
+                self.create_lp_var_block( "mup_period_vol_exp_dec", prefix + self.name + "_mup_period_vol_exp_dec", (nPeriods, self.MUP_NUM_EXPIRY_PERIODS), lowBound = 0.0 )
+                self.create_lp_var_block( "mup_period_vol_exp", prefix + self.name + "_mup_period_vol_exp", nPeriods, lowBound = 0.0 )
 
 
     def create_cfw_lp_vars(self, prefix=""):
@@ -786,26 +772,15 @@ class Supplier( Entity ):
         
         if self.HAS_CFW:
             nPeriods = len( self.acc_period_tuple_list )
-            self.cfw_period_vol_bal = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_cfw_period_vol_bal",
-                                                                           range( nPeriods ),
-                                                                           lowBound = 0.0 ) )
-            self.cfw_period_vol_inc = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_cfw_period_vol_inc",
-                                                                           range( nPeriods ),
-                                                                           lowBound = 0.0 ) )
-            self.cfw_period_vol_dec = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_cfw_period_vol_dec",
-                                                                           range( nPeriods ),
-                                                                           lowBound = 0.0 ) )
-            self.cfw_period_vol_chg = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_cfw_period_vol_chg",
-                                                                           range( nPeriods ) ) ) # is free variable, may be replaced by affine expression
+            self.create_lp_var_block( "cfw_period_vol_bal", prefix + self.name + "_cfw_period_vol_bal", nPeriods, lowBound = 0.0 )
+            self.create_lp_var_block( "cfw_period_vol_inc", prefix + self.name + "_cfw_period_vol_inc", nPeriods, lowBound = 0.0 )
+            self.create_lp_var_block( "cfw_period_vol_dec", prefix + self.name + "_cfw_period_vol_dec", nPeriods, lowBound = 0.0 )
+            self.create_lp_var_block( "cfw_period_vol_chg", prefix + self.name + "_cfw_period_vol_chg", nPeriods ) # is free variable, may be replaced by affine expression
 
             if self.HAS_CFW_EXPIRY:
-                self.cfw_period_vol_exp_bal = numpy.array( [[pulp.LpVariable( prefix + self.name + "_cfw_period_vol_exp_bal_%d_%d" % (k,i), lowBound = 0.0 )
-                                                             for i in range( self.CFW_NUM_EXPIRY_PERIODS )] for k in range( nPeriods )] )
-                self.cfw_period_vol_exp_dec = numpy.array( [[pulp.LpVariable( prefix + self.name + "_cfw_period_vol_exp_dec_%d_%d" % (k,i), lowBound = 0.0 )
-                                                             for i in range( self.CFW_NUM_EXPIRY_PERIODS )] for k in range( nPeriods )] )
-                self.cfw_period_vol_exp = numpy.array( pulp.LpVariable.matrix( prefix + self.name + "_cfw_period_vol_exp",
-                                                                               range( nPeriods ),
-                                                                               lowBound = 0.0 ) )
+                self.create_lp_var_block( "cfw_period_vol_exp_bal", prefix + self.name + "_cfw_period_vol_exp_bal", (nPeriods, self.CFW_NUM_EXPIRY_PERIODS), lowBound = 0.0 )
+                self.create_lp_var_block( "cfw_period_vol_exp_dec", prefix + self.name + "_cfw_period_vol_exp_dec", (nPeriods, self.CFW_NUM_EXPIRY_PERIODS), lowBound = 0.0 )
+                self.create_lp_var_block( "cfw_period_vol_exp", prefix + self.name + "_cfw_period_vol_exp", nPeriods, lowBound = 0.0 )
 
             
     def collect_mup_constraint_coeff_information(self):
@@ -1032,6 +1007,14 @@ class Supplier( Entity ):
                 self.constraint_list.append( self.mup_period_vol_chg[k] <= MUP_PERIOD_VOL_UB )
                 
                 self.constraint_list.append( self.mup_period_vol_dec[k] == pulp.lpSum( [self.mup_vol[d] for d in dispatchPeriodIdx] ) )
+                
+                # remaining volume recursion, i.e.,
+                # mup_rem_vol[t] == lpSum( [vol[d] for d in xrange( t + 1, FINAL + 1 )] ),
+                # so that each trigger constraint below has a constant number of terms
+                self.constraint_list.append( self.mup_rem_vol[FINAL] == 0.0 )
+                for t in xrange( START, FINAL ):
+                    self.constraint_list.append( self.mup_rem_vol[t] == self.mup_rem_vol[t + 1] + self.vol[t + 1] )
+                
                 for t in dispatchPeriodIdx:
                     self.constraint_list.append( self.mup_vol[t] <= self.vol[t] )
                     self.constraint_list.append( self.mup_vol[t] <= self.mup_trig[t]*self.CONSTRAINT_COEFF[self.daily_constraint_coeff_max_index_dict[(t,t)]].BOUND*self.ACQ )
@@ -1040,7 +1023,7 @@ class Supplier( Entity ):
                     if t < FINAL:
                         self.constraint_list.append( self.mup_trig[t] <= self.mup_trig[t + 1] )
                         
-                        period_vol = pulp.lpSum( [self.vol[d] for d in xrange( t + 1, FINAL + 1)] )
+                        period_vol = self.mup_rem_vol[t]
                         
                         if True:
                             if PERIOD_VOL_UB:
@@ -1168,6 +1151,354 @@ class Supplier( Entity ):
         self.objective_list.append( self.get_mup_mark_to_market_value() )
         
 
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the rows and
+        objective terms of the supplier model (see L{create_model})
+        to model as blocks of column indices, vectorised over
+        dispatch periods and accounting periods.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        super( Supplier, self ).create_model( prefix )
+        
+        self.create_sparse_std_rows( model )
+        self.create_sparse_mup_and_cfw_rows( model )
+        self.create_sparse_ias39_rows( model )
+        self.create_sparse_objective( model )
+
+
+    def get_acc_period_arrays(self):
+        """
+        @return: START and FINAL of the accounting periods
+            (see L{acc_period_tuple_list}) and the corresponding
+            minimal and maximal period volumes in [MWh]
+        @rtype: L{tuple} of two L{numpy.array} of dtype='int'
+            and two L{numpy.array} of dtype='double'
+        """
+        START = numpy.array( [period_tuple[0] for period_tuple in self.acc_period_tuple_list], dtype='int' )
+        FINAL = numpy.array( [period_tuple[1] for period_tuple in self.acc_period_tuple_list], dtype='int' )
+        PERIOD_VOL_LB = numpy.array( [self.CONSTRAINT_COEFF[self.acc_period_constraint_coeff_min_index_dict[period_tuple]].BOUND*self.ACQ
+                                      for period_tuple in self.acc_period_tuple_list], dtype='double' )
+        PERIOD_VOL_UB = numpy.array( [self.CONSTRAINT_COEFF[self.acc_period_constraint_coeff_max_index_dict[period_tuple]].BOUND*self.ACQ
+                                      for period_tuple in self.acc_period_tuple_list], dtype='double' )
+        return START, FINAL, PERIOD_VOL_LB, PERIOD_VOL_UB
+
+
+    def add_sparse_period_vol_rows(self, model, k, vol_val, col, val, sense, rhs):
+        """
+        Helper function to add one row per accounting period
+        k[i] to model, holding the period volume (sum of vol over
+        the dispatch periods of accounting period k[i]) with
+        coefficient vol_val[i] and the nonzeros col[i], val[i].
+        
+        @param k: accounting period indices
+        @type k: L{numpy.array} of dtype='int'
+        
+        @param vol_val: coefficient of the period volume per row
+        @type vol_val: L{float} or L{numpy.array} of dtype='double'
+        
+        @param col: column indices, one row of col per row
+        @type col: L{numpy.array} of dtype='int' of shape (len( k ), n)
+        
+        @param val: values, broadcast to the shape of col
+        @type val: L{float} or L{numpy.array} of dtype='double'
+        """
+        START, FINAL = self.get_acc_period_arrays()[:2]
+        nRows = len( k )
+        col = numpy.asarray( col, dtype='int' ).reshape( (nRows, -1) )
+        full_val = numpy.empty( col.shape, dtype='double' )
+        full_val[:] = val
+        vol_val = model.create_row_array( vol_val, nRows, 'double' )
+        row, t = model.get_window_index( START[k], FINAL[k] )
+        model.add_triplets( self, nRows,
+                            numpy.concatenate( (row, numpy.repeat( numpy.arange( nRows ), col.shape[1] )) ),
+                            numpy.concatenate( (self.get_lp_var_indices( "vol" )[t], col.ravel()) ),
+                            numpy.concatenate( (vol_val[row], full_val.ravel()) ),
+                            sense, rhs )
+
+
+    def create_sparse_std_rows(self, model):
+        """
+        Sparse counterpart of L{create_std_constraints}.
+        """
+        vol = self.get_lp_var_indices( "vol" )
+        pos_pct = self.get_lp_var_indices( "pos_pct" )
+        DP = numpy.asarray( self.DISPATCH_PERIOD, dtype='double' )
+        
+        # vol[t] == pos_pct[t]*ACQ*DISPATCH_PERIOD[t]
+        model.add_rows( self, numpy.column_stack( (vol, pos_pct) ),
+                        numpy.column_stack( (numpy.ones( len( vol ) ), -self.ACQ*DP) ), model.EQ, 0.0 )
+        
+        # multi-dispatch-period min/max volume constraints
+        SENSE = {ConstraintCoeff.BoundaryType.LB : model.GE,
+                 ConstraintCoeff.BoundaryType.UB : model.LE,
+                 ConstraintCoeff.BoundaryType.EQ : model.EQ}
+        ccoeff_list = [ccoeff for ccoeff in self.CONSTRAINT_COEFF if ccoeff.CTYPE & ConstraintCoeff.ConstraintType.POS_PCT]
+        for i, ccoeff in enumerate( self.CONSTRAINT_COEFF ):
+            if ccoeff.CTYPE & ConstraintCoeff.ConstraintType.POS_PCT and ccoeff.BTYPE not in SENSE:
+                raise ValueError, "create_model: Unknown boundary type %d encountered for constraint number %d" % (ccoeff.BTYPE,i)
+        if ccoeff_list:
+            row, t = model.get_window_index( [ccoeff.START for ccoeff in ccoeff_list], [ccoeff.FINAL for ccoeff in ccoeff_list] )
+            model.add_triplets( self, len( ccoeff_list ), row, pos_pct[t], DP[t],
+                                numpy.array( [SENSE[ccoeff.BTYPE] for ccoeff in ccoeff_list] ),
+                                numpy.array( [ccoeff.BOUND for ccoeff in ccoeff_list], dtype='double' ) )
+
+
+    def create_sparse_mup_and_cfw_rows(self, model):
+        """
+        Sparse counterpart of L{create_mup_and_cfw_constraints}.
+        """
+        if self.HAS_MUP or self.HAS_CFW:
+            nPeriods = len( self.acc_period_tuple_list )
+            k = numpy.arange( nPeriods )
+            PERIOD_VOL_LB, PERIOD_VOL_UB = self.get_acc_period_arrays()[2:]
+            top_period_trig = self.get_lp_var_indices( "top_period_trig" )
+            
+            # (PERIOD_VOL_LB - period_vol)/PERIOD_VOL_UB <= top_period_trig[k] <= (PERIOD_VOL_LB - period_vol)/PERIOD_VOL_UB + 1.0
+            # for PERIOD_VOL_UB != 0, top_period_trig[k] == 0 otherwise
+            ub = k[PERIOD_VOL_UB != 0.0]
+            self.add_sparse_period_vol_rows( model, ub, -1.0/PERIOD_VOL_UB[ub], top_period_trig[ub], -1.0, model.LE, -(PERIOD_VOL_LB[ub]/PERIOD_VOL_UB[ub]) )
+            self.add_sparse_period_vol_rows( model, ub, 1.0/PERIOD_VOL_UB[ub], top_period_trig[ub], 1.0, model.LE, PERIOD_VOL_LB[ub]/PERIOD_VOL_UB[ub] + 1.0 )
+            zero = k[PERIOD_VOL_UB == 0.0]
+            if len( zero ) > 0:
+                model.add_rows( self, top_period_trig[zero], 1.0, model.EQ, 0.0 )
+            
+            if self.HAS_MUP and self.HAS_CFW:
+                # period_vol - PERIOD_VOL_LB == cfw_period_vol_chg[k] - mup_period_vol_chg[k]
+                self.add_sparse_period_vol_rows( model, k, 1.0,
+                                                 numpy.column_stack( (self.get_lp_var_indices( "cfw_period_vol_chg" ), self.get_lp_var_indices( "mup_period_vol_chg" )) ),
+                                                 (-1.0, 1.0), model.EQ, PERIOD_VOL_LB )
+            
+            if self.HAS_MUP and not self.HAS_CFW:
+                # PERIOD_VOL_LB - period_vol <= mup_period_vol_chg[k]
+                #     <= PERIOD_VOL_LB - period_vol + (1.0 - top_period_trig[k])*(PERIOD_VOL_UB - PERIOD_VOL_LB)
+                mup_period_vol_chg = self.get_lp_var_indices( "mup_period_vol_chg" )
+                self.add_sparse_period_vol_rows( model, k, 1.0, mup_period_vol_chg, 1.0, model.GE, PERIOD_VOL_LB )
+                self.add_sparse_period_vol_rows( model, k, 1.0, numpy.column_stack( (mup_period_vol_chg, top_period_trig) ),
+                                                 numpy.column_stack( (numpy.ones( nPeriods ), PERIOD_VOL_UB - PERIOD_VOL_LB) ),
+                                                 model.LE, PERIOD_VOL_LB + (PERIOD_VOL_UB - PERIOD_VOL_LB) )
+            
+            if self.HAS_CFW and not self.HAS_MUP:
+                # cfw_period_vol_chg[k] == period_vol - PERIOD_VOL_LB
+                self.add_sparse_period_vol_rows( model, k, -1.0, self.get_lp_var_indices( "cfw_period_vol_chg" ), 1.0, model.EQ, -PERIOD_VOL_LB )
+            
+            self.create_sparse_mup_rows( model )
+            self.create_sparse_cfw_rows( model )
+
+
+    def create_sparse_balance_rows(self, model, attr, HAS_EXPIRY, NUM_EXPIRY_PERIODS, INITIAL_BALANCE):
+        """
+        Helper function to add the balance rows shared by the
+        make-up and the carry forward model (see
+        L{create_mup_constraints} and L{create_cfw_constraints})
+        to model.
+        
+        @param attr: prefix of the lp variable blocks, i.e.,
+            'mup' or 'cfw'
+        @type attr: L{str}
+        """
+        nPeriods = len( self.acc_period_tuple_list )
+        chg = self.get_lp_var_indices( attr + "_period_vol_chg" )
+        inc = self.get_lp_var_indices( attr + "_period_vol_inc" )
+        dec = self.get_lp_var_indices( attr + "_period_vol_dec" )
+        bal = self.get_lp_var_indices( attr + "_period_vol_bal" )
+        
+        # chg[k] == inc[k] - dec[k]
+        model.add_rows( self, numpy.column_stack( (chg, inc, dec) ), (1.0, -1.0, 1.0), model.EQ, 0.0 )
+        
+        if not HAS_EXPIRY:
+            # cannot use-up more gas in any period than is actually available
+            model.add_rows( self, numpy.column_stack( (bal, dec) ), (1.0, -1.0), model.GE, 0.0 )
+            # balance equations
+            if nPeriods > 0:
+                model.add_rows( self, bal[:1], 1.0, model.EQ, INITIAL_BALANCE*self.ACQ )
+                model.add_rows( self, numpy.column_stack( (bal[1:], bal[:-1], chg[:-1]) ), (1.0, -1.0, -1.0), model.EQ, 0.0 )
+        
+        else:
+            E = NUM_EXPIRY_PERIODS
+            exp_bal = self.get_lp_var_indices( attr + "_period_vol_exp_bal" ).reshape( (nPeriods, E) )
+            exp_dec = self.get_lp_var_indices( attr + "_period_vol_exp_dec" ).reshape( (nPeriods, E) )
+            exp = self.get_lp_var_indices( attr + "_period_vol_exp" )
+            
+            model.add_rows( self, numpy.column_stack( (bal, exp_bal) ), [1.0] + [-1.0]*E, model.EQ, 0.0 )
+            model.add_rows( self, numpy.column_stack( (dec, exp_dec) ), [1.0] + [-1.0]*E, model.EQ, 0.0 )
+            # record the amount of expired gas for accounting period k
+            model.add_rows( self, numpy.column_stack( (exp, exp_bal[:, 0], exp_dec[:, 0]) ), (1.0, -1.0, 1.0), model.EQ, 0.0 )
+            
+            if nPeriods > 0:
+                model.add_rows( self, exp_bal[0], 1.0, model.EQ, numpy.array( [INITIAL_BALANCE[i]*self.ACQ for i in xrange( E )], dtype='double' ) )
+                model.add_rows( self, numpy.column_stack( (exp_bal[1:, E - 1], inc[:-1]) ), (1.0, -1.0), model.EQ, 0.0 )
+                # exp_bal[k,i-1] == exp_bal[k-1,i] - exp_dec[k-1,i] for i > 0
+                model.add_rows( self, numpy.column_stack( (exp_bal[1:, :-1].ravel(), exp_bal[:-1, 1:].ravel(), exp_dec[:-1, 1:].ravel()) ),
+                                (1.0, -1.0, 1.0), model.EQ, 0.0 )
+            model.add_rows( self, numpy.column_stack( (exp_bal.ravel(), exp_dec.ravel()) ), (1.0, -1.0), model.GE, 0.0 )
+
+
+    def create_sparse_mup_rows(self, model):
+        """
+        Sparse counterpart of L{create_mup_constraints}.
+        """
+        if self.HAS_MUP:
+            nPeriods = len( self.acc_period_tuple_list )
+            START, FINAL, PERIOD_VOL_LB, PERIOD_VOL_UB = self.get_acc_period_arrays()
+            
+            MUP_PERIOD_VOL_LB = numpy.empty( nPeriods, dtype='double' )
+            MUP_PERIOD_VOL_UB = numpy.empty( nPeriods, dtype='double' )
+            for k, period_tuple in enumerate( self.acc_period_tuple_list ):
+                if period_tuple in self.mup_bnd_ccoeff_min_period_index_dict:
+                    MUP_PERIOD_VOL_LB[k] = max( self.CONSTRAINT_COEFF[self.mup_bnd_ccoeff_min_period_index_dict[period_tuple]].BOUND*self.ACQ, PERIOD_VOL_LB[k] - PERIOD_VOL_UB[k] )
+                else:
+                    MUP_PERIOD_VOL_LB[k] = PERIOD_VOL_LB[k] - PERIOD_VOL_UB[k]
+                if period_tuple in self.mup_bnd_ccoeff_max_period_index_dict:
+                    MUP_PERIOD_VOL_UB[k] = min( self.CONSTRAINT_COEFF[self.mup_bnd_ccoeff_max_period_index_dict[period_tuple]].BOUND*self.ACQ, PERIOD_VOL_LB[k] )
+                else:
+                    MUP_PERIOD_VOL_UB[k] = PERIOD_VOL_LB[k]
+            
+            self.create_sparse_balance_rows( model, "mup", self.HAS_MUP_EXPIRY, self.MUP_NUM_EXPIRY_PERIODS, self.MUP_INITIAL_BALANCE )
+            
+            top_period_trig = self.get_lp_var_indices( "top_period_trig" )
+            chg = self.get_lp_var_indices( "mup_period_vol_chg" )
+            inc = self.get_lp_var_indices( "mup_period_vol_inc" )
+            dec = self.get_lp_var_indices( "mup_period_vol_dec" )
+            vol = self.get_lp_var_indices( "vol" )
+            mup_vol = self.get_lp_var_indices( "mup_vol" )
+            mup_trig = self.get_lp_var_indices( "mup_trig" )
+            mup_rem_vol = self.get_lp_var_indices( "mup_rem_vol" )
+            
+            # inc[k] <= top_period_trig[k]*PERIOD_VOL_LB
+            # dec[k] <= (1.0 - top_period_trig[k])*(PERIOD_VOL_UB - PERIOD_VOL_LB)
+            model.add_rows( self, numpy.column_stack( (inc, top_period_trig) ), numpy.column_stack( (numpy.ones( nPeriods ), -PERIOD_VOL_LB) ), model.LE, 0.0 )
+            model.add_rows( self, numpy.column_stack( (dec, top_period_trig) ), numpy.column_stack( (numpy.ones( nPeriods ), PERIOD_VOL_UB - PERIOD_VOL_LB) ),
+                            model.LE, PERIOD_VOL_UB - PERIOD_VOL_LB )
+            
+            model.add_rows( self, chg, 1.0, model.GE, MUP_PERIOD_VOL_LB )
+            model.add_rows( self, chg, 1.0, model.LE, MUP_PERIOD_VOL_UB )
+            
+            # dec[k] == sum of mup_vol[d] over accounting period k
+            row, t = model.get_window_index( START, FINAL )
+            model.add_triplets( self, nPeriods, numpy.concatenate( (numpy.arange( nPeriods ), row) ), numpy.concatenate( (dec, mup_vol[t]) ),
+                                numpy.concatenate( (numpy.ones( nPeriods ), -numpy.ones( len( t ) )) ), model.EQ, 0.0 )
+            
+            # remaining volume recursion, see create_mup_constraints
+            model.add_rows( self, mup_rem_vol[FINAL], 1.0, model.EQ, 0.0 )
+            inner = t < FINAL[row]
+            model.add_rows( self, numpy.column_stack( (mup_rem_vol[t[inner]], mup_rem_vol[t[inner] + 1], vol[t[inner] + 1]) ), (1.0, -1.0, -1.0), model.EQ, 0.0 )
+            
+            # make-up trigger rows per dispatch period t of accounting period k
+            DAILY_VOL_UB = numpy.array( [self.CONSTRAINT_COEFF[self.daily_constraint_coeff_max_index_dict[(d,d)]].BOUND*self.ACQ for d in t.tolist()], dtype='double' )
+            model.add_rows( self, numpy.column_stack( (mup_vol[t], vol[t]) ), (1.0, -1.0), model.LE, 0.0 )
+            model.add_rows( self, numpy.column_stack( (mup_vol[t], mup_trig[t]) ), numpy.column_stack( (numpy.ones( len( t ) ), -DAILY_VOL_UB) ), model.LE, 0.0 )
+            model.add_rows( self, numpy.column_stack( (mup_trig[t], mup_vol[t]) ), (1.0, -1.0), model.LE, 0.0 )
+            model.add_rows( self, numpy.column_stack( (mup_trig[t], dec[row]) ), (1.0, -1.0), model.LE, 0.0 )
+            
+            k, t = row[inner], t[inner]
+            model.add_rows( self, numpy.column_stack( (mup_trig[t], mup_trig[t + 1]) ), (1.0, -1.0), model.LE, 0.0 )
+            
+            # (dec[k] - mup_vol[t] - mup_rem_vol[t])/PERIOD_VOL_UB <= mup_trig[t]
+            #     <= (dec[k] - mup_vol[t] - mup_rem_vol[t])/PERIOD_VOL_UB + 1.0
+            # for PERIOD_VOL_UB != 0, mup_trig[t] == 0 otherwise
+            ub = PERIOD_VOL_UB[k] != 0.0
+            UB = PERIOD_VOL_UB[k[ub]]
+            col = numpy.column_stack( (dec[k[ub]], mup_vol[t[ub]], mup_rem_vol[t[ub]], mup_trig[t[ub]]) )
+            model.add_rows( self, col, numpy.column_stack( (1.0/UB, -1.0/UB, -1.0/UB, -numpy.ones( len( UB ) )) ), model.LE, 0.0 )
+            model.add_rows( self, col, numpy.column_stack( (-(1.0/UB), 1.0/UB, 1.0/UB, numpy.ones( len( UB ) )) ), model.LE, 1.0 )
+            if not ub.all():
+                model.add_rows( self, mup_trig[t[~ub]], 1.0, model.EQ, 0.0 )
+
+
+    def create_sparse_cfw_rows(self, model):
+        """
+        Sparse counterpart of L{create_cfw_constraints}.
+        """
+        if self.HAS_CFW:
+            nPeriods = len( self.acc_period_tuple_list )
+            PERIOD_VOL_LB, PERIOD_VOL_UB = self.get_acc_period_arrays()[2:]
+            
+            CFW_PERIOD_VOL_LB = numpy.empty( nPeriods, dtype='double' )
+            CFW_PERIOD_VOL_UB = numpy.empty( nPeriods, dtype='double' )
+            for k, period_tuple in enumerate( self.acc_period_tuple_list ):
+                if period_tuple in self.cfw_bnd_ccoeff_min_period_index_dict:
+                    CFW_PERIOD_VOL_LB[k] = max( self.CONSTRAINT_COEFF[self.cfw_bnd_ccoeff_min_period_index_dict[period_tuple]].BOUND*self.ACQ, -PERIOD_VOL_LB[k] )
+                else:
+                    CFW_PERIOD_VOL_LB[k] = -PERIOD_VOL_LB[k]
+                if period_tuple in self.cfw_bnd_ccoeff_max_period_index_dict:
+                    CFW_PERIOD_VOL_UB[k] = min( self.CONSTRAINT_COEFF[self.cfw_bnd_ccoeff_max_period_index_dict[period_tuple]].BOUND*self.ACQ, PERIOD_VOL_UB[k] - PERIOD_VOL_LB[k] )
+                else:
+                    CFW_PERIOD_VOL_UB[k] = PERIOD_VOL_UB[k] - PERIOD_VOL_LB[k]
+            
+            self.create_sparse_balance_rows( model, "cfw", self.HAS_CFW_EXPIRY, self.CFW_NUM_EXPIRY_PERIODS, self.CFW_INITIAL_BALANCE )
+            
+            top_period_trig = self.get_lp_var_indices( "top_period_trig" )
+            chg = self.get_lp_var_indices( "cfw_period_vol_chg" )
+            inc = self.get_lp_var_indices( "cfw_period_vol_inc" )
+            dec = self.get_lp_var_indices( "cfw_period_vol_dec" )
+            
+            # inc[k] <= (1.0 - top_period_trig[k])*CFW_PERIOD_VOL_UB
+            # dec[k] <= -top_period_trig[k]*CFW_PERIOD_VOL_LB
+            model.add_rows( self, numpy.column_stack( (inc, top_period_trig) ), numpy.column_stack( (numpy.ones( nPeriods ), CFW_PERIOD_VOL_UB) ), model.LE, CFW_PERIOD_VOL_UB )
+            model.add_rows( self, numpy.column_stack( (dec, top_period_trig) ), numpy.column_stack( (numpy.ones( nPeriods ), CFW_PERIOD_VOL_LB) ), model.LE, 0.0 )
+            
+            model.add_rows( self, chg, 1.0, model.GE, CFW_PERIOD_VOL_LB )
+            model.add_rows( self, chg, 1.0, model.LE, CFW_PERIOD_VOL_UB )
+
+
+    def create_sparse_ias39_rows(self, model):
+        """
+        Sparse counterpart of L{create_ias39_constraints}.
+        """
+        if self.HAS_IAS39:
+            MUP_INIT = conditional( self.HAS_MUP,
+                                    conditional( not self.HAS_MUP_EXPIRY,
+                                                 self.MUP_INITIAL_BALANCE,
+                                                 sum( [self.MUP_INITIAL_BALANCE[i] for i in xrange( self.MUP_NUM_EXPIRY_PERIODS )] )),
+                                    0.0 )
+            CFW_INIT = conditional( self.HAS_CFW,
+                                    conditional( not self.HAS_CFW_EXPIRY,
+                                                 self.CFW_INITIAL_BALANCE,
+                                                 sum( [self.CFW_INITIAL_BALANCE[i] for i in xrange( self.CFW_NUM_EXPIRY_PERIODS )] )),
+                                    0.0 )
+            
+            START, FINAL, PERIOD_VOL_LB = self.get_acc_period_arrays()[:3]
+            
+            # On average take ACQmin + initial make-up - initial carry forward
+            row, t = model.get_window_index( START, FINAL )
+            model.add_triplets( self, 1, numpy.zeros( len( t ), dtype='int' ), self.get_lp_var_indices( "vol" )[t], 1.0,
+                                model.EQ, sum( PERIOD_VOL_LB.tolist() ) + (MUP_INIT - CFW_INIT)*self.ACQ )
+            
+            # ZERO make-up/carry forward balance at the end of the optimisation
+            if self.HAS_MUP:
+                model.add_rows( self, self.get_lp_var_indices( "mup_period_vol_chg" ).reshape( 1, -1 ), 1.0, model.EQ, -(MUP_INIT*self.ACQ) )
+            if self.HAS_CFW:
+                model.add_rows( self, self.get_lp_var_indices( "cfw_period_vol_chg" ).reshape( 1, -1 ), 1.0, model.EQ, -(CFW_INIT*self.ACQ) )
+
+
+    def create_sparse_objective(self, model):
+        """
+        Sparse counterpart of L{create_objective}, see
+        L{get_std_mark_to_market_value} and
+        L{get_mup_mark_to_market_value}.
+        """
+        nSteps = len( self.DISPATCH_PERIOD )
+        CPDF = numpy.asarray( self.CONTRACT_PRICE[:nSteps], dtype='double' )*numpy.asarray( self.DISCOUNT_FACTOR[:nSteps], dtype='double' )
+        model.add_objective( self.get_lp_var_indices( "vol" ), self.SB*CPDF )
+        
+        if self.HAS_MUP:
+            START, FINAL = self.get_acc_period_arrays()[:2]
+            AVG_CONTRACT_PRICE = numpy.array( [self.get_average_contract_price( k ) for k in xrange( len( self.acc_period_tuple_list ) )], dtype='double' )
+            DF = numpy.asarray( self.DISCOUNT_FACTOR, dtype='double' )[FINAL]
+            model.add_objective( self.get_lp_var_indices( "mup_period_vol_inc" ), self.SB*self.MUP_CREATE_PRICE_RATE*AVG_CONTRACT_PRICE*DF )
+            model.add_objective( self.get_lp_var_indices( "mup_period_vol_dec" ), self.SB*self.MUP_USEUP_PRICE_RATE *AVG_CONTRACT_PRICE*DF )
+            row, t = model.get_window_index( START, FINAL )
+            model.add_objective( self.get_lp_var_indices( "mup_vol" )[t], -self.SB*CPDF[t] )
+
+
     def get_lp_vars(self):
         """
         This method returns a list containing all
@@ -1192,6 +1523,7 @@ class Supplier( Entity ):
             lp_vars_list += self.mup_period_vol_chg.tolist()
             lp_vars_list += self.mup_trig.tolist()
             lp_vars_list += self.mup_vol.tolist()
+            lp_vars_list += self.mup_rem_vol.tolist()
         if self.HAS_CFW:
             lp_vars_list += self.cfw_period_vol_bal.tolist()
             lp_vars_list += self.cfw_period_vol_dec.tolist()
@@ -1227,12 +1559,12 @@ class Supplier( Entity ):
                          'HAS_IAS39' :          FmtDictEntry( [ self.ifmt ], 'HAS_IAS39',                   0, None,            False,  self.HAS_IAS39 ),
                          'CONTRACT_PRICE' :     FmtDictEntry( [ self.ffmt ], 'CONTRACT_PRICE[t] [EUR/MWh]', 1, (nSteps,),       False,  self.CONTRACT_PRICE ),
                          'DF' :                 FmtDictEntry( [ self.ffmt ], 'DF[t]',                       1, (nSteps,),       False,  self.DISCOUNT_FACTOR ),
-                         'pos_pct' :            FmtDictEntry( [ self.ffmt ], 'pos_pct[t] [MW%]',            1, (nSteps,),       True,   self.pos_pct ),
-                         'vol' :                FmtDictEntry( [ self.ffmt ], 'vol[t] [MWh]',                1, (nSteps,),       True,   self.vol )})
+                         'pos_pct' :            FmtDictEntry( [ self.ffmt ], 'pos_pct[t] [MW%]',            1, (nSteps,),       True,   self.get_lp_var_solution( "pos_pct" ) ),
+                         'vol' :                FmtDictEntry( [ self.ffmt ], 'vol[t] [MWh]',                1, (nSteps,),       True,   self.get_lp_var_solution( "vol" ) )})
         
         if self.HAS_MUP or self.HAS_CFW:
             nPeriods = len( self.acc_period_tuple_list )
-            fmt_dict.update({'top_period_trig' :            FmtDictEntry( [ self.ifmt ], 'top_period_trig[k]',          1,  (nPeriods,),     True,   self.top_period_trig )})
+            fmt_dict.update({'top_period_trig' :            FmtDictEntry( [ self.ifmt ], 'top_period_trig[k]',          1,  (nPeriods,),     True,   self.get_lp_var_solution( "top_period_trig" ) )})
         
         if self.HAS_MUP:
             fmt_dict.update({'HAS_MUP_EXPIRY' :             FmtDictEntry( [ self.ifmt ], 'HAS_MUP_EXPIRY',              0,  None,               False,  self.HAS_MUP_EXPIRY ),
@@ -1242,29 +1574,29 @@ class Supplier( Entity ):
                              'MUP_INITIAL_BALANCE' :        conditional(self.HAS_MUP_EXPIRY,
                                                                         FmtDictEntry( [ self.ffmt ], 'MUP_INITIAL_BALANCE[i] [MW%]',  1,  (self.MUP_NUM_EXPIRY_PERIODS,), False,  self.MUP_INITIAL_BALANCE ),
                                                                         FmtDictEntry( [ self.ffmt ], 'MUP_INITIAL_BALANCE [MW%]',     0,  None,                           False,  self.MUP_INITIAL_BALANCE )),
-                             'mup_period_vol_bal' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_bal[k] [MWh]', 1,  (nPeriods,),        True,   self.mup_period_vol_bal ),
-                             'mup_period_vol_dec' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_dec[k] [MWh]', 1,  (nPeriods,),        True,   self.mup_period_vol_dec ),
-                             'mup_period_vol_inc' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_inc[k] [MWh]', 1,  (nPeriods,),        True,   self.mup_period_vol_inc ),
-                             'mup_period_vol_chg' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_chg[k] [MWh]', 1,  (nPeriods,),        True,   self.mup_period_vol_chg ),
-                             'mup_trig' :                   FmtDictEntry( [ self.ifmt ], 'mup_trig[t]',                 1,  (nSteps,),          True,   self.mup_trig ),
-                             'mup_vol' :                    FmtDictEntry( [ self.ffmt ], 'mup_vol[t] [MWh]',            1,  (nSteps,),          True,   self.mup_vol )})
+                             'mup_period_vol_bal' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_bal[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "mup_period_vol_bal" ) ),
+                             'mup_period_vol_dec' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_dec[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "mup_period_vol_dec" ) ),
+                             'mup_period_vol_inc' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_inc[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "mup_period_vol_inc" ) ),
+                             'mup_period_vol_chg' :         FmtDictEntry( [ self.ffmt ], 'mup_period_vol_chg[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "mup_period_vol_chg" ) ),
+                             'mup_trig' :                   FmtDictEntry( [ self.ifmt ], 'mup_trig[t]',                 1,  (nSteps,),          True,   self.get_lp_var_solution( "mup_trig" ) ),
+                             'mup_vol' :                    FmtDictEntry( [ self.ffmt ], 'mup_vol[t] [MWh]',            1,  (nSteps,),          True,   self.get_lp_var_solution( "mup_vol" ) )})
 
             if self.HAS_MUP_EXPIRY:
                 fmt_dict.update({'mup_period_vol_exp' :
                                     FmtDictEntry( [ self.ffmt ],
                                                   'mup_period_vol_exp[k] [MWh]',
                                                   1, (nPeriods,), True,
-                                                  self.mup_period_vol_exp ),
+                                                  self.get_lp_var_solution( "mup_period_vol_exp" ) ),
                                  'mup_period_vol_exp_bal' :
                                     FmtDictEntry( [ self.ffmt ]*self.MUP_NUM_EXPIRY_PERIODS,
                                                   'mup_period_vol_exp_bal[k,%d] [MWh]',
                                                   2, (nPeriods,self.MUP_NUM_EXPIRY_PERIODS), True,
-                                                  self.mup_period_vol_exp_bal ),
+                                                  self.get_lp_var_solution( "mup_period_vol_exp_bal" ) ),
                                  'mup_period_vol_exp_dec' :
                                     FmtDictEntry( [ self.ffmt ]*self.MUP_NUM_EXPIRY_PERIODS,
                                                   'mup_period_vol_exp_dec[k,%d] [MWh]',
                                                   2, (nPeriods,self.MUP_NUM_EXPIRY_PERIODS), True,
-                                                  self.mup_period_vol_exp_dec )})
+                                                  self.get_lp_var_solution( "mup_period_vol_exp_dec" ) )})
 
         if self.HAS_CFW:
             fmt_dict.update({'HAS_CFW_EXPIRY' :             FmtDictEntry( [ self.ifmt ], 'HAS_CFW_EXPIRY',              0,  None,               False,  self.HAS_CFW_EXPIRY ),
@@ -1272,27 +1604,27 @@ class Supplier( Entity ):
                              'CFW_INITIAL_BALANCE' :        conditional(self.HAS_CFW_EXPIRY,
                                                                         FmtDictEntry( [ self.ffmt ], 'CFW_INITIAL_BALANCE[i] [MW%]',  1,  (self.CFW_NUM_EXPIRY_PERIODS,), False,  self.CFW_INITIAL_BALANCE ),
                                                                         FmtDictEntry( [ self.ffmt ], 'CFW_INITIAL_BALANCE [MW%]',     0,  None,                           False,  self.CFW_INITIAL_BALANCE )),
-                             'cfw_period_vol_bal' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_bal[k] [MWh]', 1,  (nPeriods,),        True,   self.cfw_period_vol_bal ),
-                             'cfw_period_vol_dec' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_dec[k] [MWh]', 1,  (nPeriods,),        True,   self.cfw_period_vol_dec ),
-                             'cfw_period_vol_inc' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_inc[k] [MWh]', 1,  (nPeriods,),        True,   self.cfw_period_vol_inc ),
-                             'cfw_period_vol_chg' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_chg[k] [MWh]', 1,  (nPeriods,),        True,   self.cfw_period_vol_chg )})
+                             'cfw_period_vol_bal' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_bal[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "cfw_period_vol_bal" ) ),
+                             'cfw_period_vol_dec' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_dec[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "cfw_period_vol_dec" ) ),
+                             'cfw_period_vol_inc' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_inc[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "cfw_period_vol_inc" ) ),
+                             'cfw_period_vol_chg' :         FmtDictEntry( [ self.ffmt ], 'cfw_period_vol_chg[k] [MWh]', 1,  (nPeriods,),        True,   self.get_lp_var_solution( "cfw_period_vol_chg" ) )})
 
             if self.HAS_CFW_EXPIRY:
                 fmt_dict.update({'cfw_period_vol_exp' :
                                     FmtDictEntry( [ self.ffmt ],
                                                   'cfw_period_vol_exp[k] [MWh]',
                                                   1, (nPeriods,), True,
-                                                  self.cfw_period_vol_exp ),
+                                                  self.get_lp_var_solution( "cfw_period_vol_exp" ) ),
                                  'cfw_period_vol_exp_bal' :
                                     FmtDictEntry( [ self.ffmt ]*self.CFW_NUM_EXPIRY_PERIODS,
                                                   'cfw_period_vol_exp_bal[k,%d] [MWh]',
                                                   2, (nPeriods,self.CFW_NUM_EXPIRY_PERIODS), True,
-                                                  self.cfw_period_vol_exp_bal ),
+                                                  self.get_lp_var_solution( "cfw_period_vol_exp_bal" ) ),
                                  'cfw_period_vol_exp_dec' :
                                     FmtDictEntry( [ self.ffmt ]*self.CFW_NUM_EXPIRY_PERIODS,
                                                   'cfw_period_vol_exp_dec[k,%d] [MWh]',
                                                   2, (nPeriods, self.CFW_NUM_EXPIRY_PERIODS), True,
-                                                  self.cfw_period_vol_exp_dec )})
+                                                  self.get_lp_var_solution( "cfw_period_vol_exp_dec" ) )})
             
         super( Supplier, self ).update_fmt_dict( fmt_dict )
 
@@ -1303,9 +1635,9 @@ class Supplier( Entity ):
         nSteps = len( self.DISPATCH_PERIOD )
         
         if self.HAS_MUP:
-            volume = [-self.SB*(self.vol[t].varValue - self.mup_vol[t].varValue) for t in xrange( nSteps )]
+            volume = (-self.SB*(self.get_lp_var_solution( "vol" ) - self.get_lp_var_solution( "mup_vol" ))).tolist()
         else:
-            volume = [-self.SB*self.vol[t].varValue for t in xrange( nSteps )]
+            volume = (-self.SB*self.get_lp_var_solution( "vol" )).tolist()
 
         cashflow = [-self.CONTRACT_PRICE[t]*volume[t] for t in xrange( nSteps )]
 
@@ -1333,8 +1665,8 @@ class Supplier( Entity ):
             mup_accounting_period_avg_prc = [0.0]*nPeriods
             if self.HAS_MUP:
     
-                mup_accounting_period_vol_bal = [self.mup_period_vol_bal[k].varValue for k in xrange( nPeriods )]
-                mup_accounting_period_vol_chg = [self.mup_period_vol_chg[k].varValue for k in xrange( nPeriods )]
+                mup_accounting_period_vol_bal = self.get_lp_var_solution( "mup_period_vol_bal" ).tolist()
+                mup_accounting_period_vol_chg = self.get_lp_var_solution( "mup_period_vol_chg" ).tolist()
                 mup_accounting_period_avg_prc = self.get_average_contract_price_list( accountingPeriod )
             
             result = [mup_accounting_period_vol_bal,
@@ -1347,7 +1679,7 @@ class Supplier( Entity ):
             mup_dispatch_period_avg_prc = [0.0]*nSteps
             mup_dispatch_period_vol_cfl = [0.0]*nSteps
             if self.HAS_MUP:
-                mup_dispatch_period_vol_dec = [-self.SB*self.mup_vol[t].varValue for t in xrange( nSteps )]
+                mup_dispatch_period_vol_dec = (-self.SB*self.get_lp_var_solution( "mup_vol" )).tolist()
                 mup_dispatch_period_avg_prc = self.get_average_contract_price_list( accountingPeriod ) 
                 mup_dispatch_period_vol_cfl = [-mup_dispatch_period_vol_dec[t]*mup_dispatch_period_avg_prc[t] for t in xrange( nSteps )]
                 
@@ -1369,8 +1701,8 @@ class Supplier( Entity ):
         cfw_accounting_period_vol_chg = [0.0]*nPeriods
         if self.HAS_CFW:
 
-            cfw_accounting_period_vol_bal = [self.cfw_period_vol_bal[k].varValue for k in xrange( nPeriods )]
-            cfw_accounting_period_vol_chg = [self.cfw_period_vol_chg[k].varValue for k in xrange( nPeriods )]
+            cfw_accounting_period_vol_bal = self.get_lp_var_solution( "cfw_period_vol_bal" ).tolist()
+            cfw_accounting_period_vol_chg = self.get_lp_var_solution( "cfw_period_vol_chg" ).tolist()
             
         return [cfw_accounting_period_vol_bal,
                 cfw_accounting_period_vol_chg]
@@ -1422,6 +1754,45 @@ class Supplier( Entity ):
         return mtm
 
 
+    def get_mark_to_market_terms(self):
+        """
+        Returns the constant and the terms of the mark to
+        market value (see
+        L{gnw.entity.Entity.get_mark_to_market_terms}).
+        
+        @return: constant, solution value arrays and
+            coefficient arrays
+        @rtype: L{tuple} of (L{float}, L{list} of L{numpy.array},
+            L{list} of L{numpy.array})
+        """
+        constant, value_list, coeff_list = super( Supplier, self ).get_mark_to_market_terms()
+
+        # standard contract price components, see get_std_mark_to_market_value
+        nSteps = len( self.DISPATCH_PERIOD )
+        value_list.append( self.get_lp_var_solution( "vol" ) )
+        coeff_list.append( self.CONTRACT_PRICE[:nSteps]*self.DISCOUNT_FACTOR[:nSteps]*self.SB )
+        
+        # make-up components, see get_mup_mark_to_market_value
+        if self.HAS_MUP:
+            mup_period_vol_inc = self.get_lp_var_solution( "mup_period_vol_inc" )
+            mup_period_vol_dec = self.get_lp_var_solution( "mup_period_vol_dec" )
+            mup_vol = self.get_lp_var_solution( "mup_vol" )
+            nPeriods = len( self.acc_period_tuple_list )
+            for k in xrange( nPeriods ):
+                START, FINAL = self.acc_period_tuple_list[k][0], self.acc_period_tuple_list[k][1]
+                
+                AVG_CONTRACT_PRICE = self.get_average_contract_price( k )
+                
+                value_list.append( mup_period_vol_inc[k:k + 1] )
+                coeff_list.append( numpy.array( [self.SB*self.MUP_CREATE_PRICE_RATE*AVG_CONTRACT_PRICE*self.DISCOUNT_FACTOR[FINAL]] ) )
+                value_list.append( mup_period_vol_dec[k:k + 1] )
+                coeff_list.append( numpy.array( [self.SB*self.MUP_USEUP_PRICE_RATE *AVG_CONTRACT_PRICE*self.DISCOUNT_FACTOR[FINAL]] ) )
+                value_list.append( mup_vol[START:FINAL + 1] )
+                coeff_list.append( self.CONTRACT_PRICE[START:FINAL + 1]*self.DISCOUNT_FACTOR[START:FINAL + 1]*(-self.SB) )
+        
+        return constant, value_list, coeff_list
+
+
     def get_average_contract_price(self, k):
         """
         @param k: index into
@@ -1473,12 +1844,32 @@ class Supplier( Entity ):
         # Possible would as well be (additionally) a discount factor
         # weighted average.
         if dispatchPeriodIdx: 
-            AVG_CONTRACT_PRICE = sum( [self.CONTRACT_PRICE[t]*self.DISPATCH_PERIOD[t] for t in dispatchPeriodIdx] )
-            AVG_CONTRACT_PRICE /= sum( [self.DISPATCH_PERIOD[t] for t in dispatchPeriodIdx] )
+            time_grid = self.get_TIME_GRID()
+            AVG_CONTRACT_PRICE = time_grid.get_window_sum( self.get_contract_price_cumsum(), START, FINAL )
+            AVG_CONTRACT_PRICE /= time_grid.get_dt_sum( START, FINAL )
 
         return AVG_CONTRACT_PRICE
 
 
+    def get_contract_price_cumsum(self):
+        """
+        @return: cumulative sums of dispatch period weighted
+            contract prices L{gnw.supplier.Supplier.CONTRACT_PRICE}
+            (see L{gnw.time_grid.TimeGrid.create_weighted_cumsum}),
+            cached as long as contract prices and time grid
+            remain unchanged
+        @rtype: L{numpy.array} of dtype='double'
+        """
+        time_grid = self.get_TIME_GRID()
+        if self.contract_price_cumsum is None \
+        or self.contract_price_cumsum[0] is not self.CONTRACT_PRICE \
+        or self.contract_price_cumsum[1] is not time_grid:
+            self.contract_price_cumsum = (self.CONTRACT_PRICE,
+                                          time_grid,
+                                          time_grid.create_weighted_cumsum( self.CONTRACT_PRICE ))
+        return self.contract_price_cumsum[2]
+
+
     def get_average_contract_price_list(self, accountingPeriod=True):
         """ Returns a list of size len( self.acc_period_tuple_list )
         of prices corresponding to the average contract prices over
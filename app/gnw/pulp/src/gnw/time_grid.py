@@ -0,0 +1,191 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Package file
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: immutable time grid, i.e., dispatch periods and discount
+factors, shared by reference between all entities of a network,
+providing delivery window aggregates in constant time.
+"""
+import numpy
+
+
+class TimeGrid( object ):
+    """
+    Immutable time grid holding the dispatch periods and
+    discount factors of a network together with their
+    cumulative sums. Sums over a delivery window [start, final]
+    of dispatch periods, of discounted dispatch periods, and of
+    dispatch period weighted (price) curves, see
+    L{create_weighted_cumsum}, are evaluated in constant time as
+    difference of two cumulative sums.
+    All arrays held by a time grid are read-only, such that
+    entities share them by reference, see L{share_array}.
+
+    @ivar DISPATCH_PERIOD: dispatch periods in hours [h]
+    @type DISPATCH_PERIOD: L{numpy.array} of dtype='double'
+
+    @ivar DISCOUNT_FACTOR: discount factor per dispatch period
+    @type DISCOUNT_FACTOR: L{numpy.array} of dtype='double'
+
+    @ivar dt_cumsum: cumulative sums of DISPATCH_PERIOD
+        with leading zero
+    @type dt_cumsum: L{numpy.array} of dtype='double'
+
+    @ivar dtdf_cumsum: cumulative sums of
+        DISPATCH_PERIOD*DISCOUNT_FACTOR with leading zero
+    @type dtdf_cumsum: L{numpy.array} of dtype='double'
+    """
+    def __init__(self, dispatchPeriod, discountFactor=None):
+        """
+        @param dispatchPeriod: dispatch periods in hours [h]
+        @type dispatchPeriod: L{list} of L{float} or
+            L{numpy.array} of dtype='double'
+
+        @param discountFactor: discount factors, None for 1.0
+        @type discountFactor: None, L{float}, L{list} of L{float}
+            or L{numpy.array} of dtype='double'
+
+        @raise ValueError: lengths of dispatchPeriod and
+            discountFactor do not match
+        """
+        nSteps = len( dispatchPeriod )
+
+        self.DISPATCH_PERIOD = self.share_array( dispatchPeriod )
+        if discountFactor is None:
+            self.DISCOUNT_FACTOR = numpy.ones( nSteps, dtype='double' )
+        elif numpy.ndim( discountFactor ) == 0:
+            self.DISCOUNT_FACTOR = numpy.empty( nSteps, dtype='double' )
+            self.DISCOUNT_FACTOR[:] = discountFactor
+        else:
+            self.DISCOUNT_FACTOR = self.share_array( discountFactor )
+        if len( self.DISCOUNT_FACTOR ) != nSteps:
+            raise ValueError, "Length of 'discountFactor' must match length of 'dispatchPeriod' (gnw.time_grid.TimeGrid.__init__)"
+
+        self.dt_cumsum = self.create_weighted_cumsum( 1.0 )
+        self.dtdf_cumsum = self.create_weighted_cumsum( self.DISCOUNT_FACTOR )
+
+        self.DISPATCH_PERIOD.setflags( write=False )
+        self.DISCOUNT_FACTOR.setflags( write=False )
+
+
+    def __len__(self):
+        """
+        @return: number of dispatch periods
+        @rtype: L{int}
+        """
+        return len( self.DISPATCH_PERIOD )
+
+
+    def matches(self, dispatchPeriod, discountFactor=None):
+        """
+        @return: whether dispatchPeriod and discountFactor
+            (if not None) hold the same values as self
+        @rtype: L{bool}
+        """
+        if not numpy.array_equal( self.DISPATCH_PERIOD, dispatchPeriod ):
+            return False
+        return discountFactor is None \
+            or numpy.array_equal( self.DISCOUNT_FACTOR, discountFactor )
+
+
+    def share_array(value):
+        """
+        @param value: values per dispatch period
+        @type value: L{list} of L{float} or
+            L{numpy.array} of dtype='double'
+
+        @return: value itself, if it is a read-only array of
+            dtype='double', e.g., an array of a time grid, which
+            is shared by reference, a copy of value otherwise
+        @rtype: L{numpy.array} of dtype='double'
+        """
+        if isinstance( value, numpy.ndarray ) \
+        and value.dtype == numpy.double \
+        and not value.flags.writeable:
+            return value
+        return numpy.array( value, dtype='double' )
+
+    share_array = staticmethod( share_array )
+
+
+    def create_weighted_cumsum(self, values):
+        """
+        Returns the cumulative sums of DISPATCH_PERIOD*values
+        with leading zero, e.g., of dispatch period weighted
+        prices, to be passed to L{get_window_sum}.
+
+        @param values: value per dispatch period
+        @type values: L{float} or L{numpy.array} of dtype='double'
+
+        @return: read-only cumulative sums of size len( self ) + 1
+        @rtype: L{numpy.array} of dtype='double'
+        """
+        cumsum = numpy.zeros( len( self.DISPATCH_PERIOD ) + 1, dtype='double' )
+        numpy.cumsum( self.DISPATCH_PERIOD*values, out=cumsum[1:] )
+        cumsum.setflags( write=False )
+        return cumsum
+
+
+    def get_window_sum(cumsum, start, final):
+        """
+        @param cumsum: cumulative sums with leading zero
+        @type cumsum: L{numpy.array} of dtype='double'
+
+        @param start: index of first dispatch period of window
+        @type start: L{int}
+
+        @param final: index of last dispatch period of window
+        @type final: L{int}
+
+        @return: sum over dispatch periods t of window
+            [start, final] restricted to valid indices, i.e.,
+            cumsum[final + 1] - cumsum[start], 0.0 for empty windows
+        @rtype: L{float}
+        """
+        start = max( start, 0 )
+        final = min( final, len( cumsum ) - 2 )
+        if final < start:
+            return 0.0
+        return float( cumsum[final + 1] - cumsum[start] )
+
+    get_window_sum = staticmethod( get_window_sum )
+
+
+    def get_dt_sum(self, start, final):
+        """
+        @return: sum of DISPATCH_PERIOD over window [start, final]
+        @rtype: L{float}
+        """
+        return self.get_window_sum( self.dt_cumsum, start, final )
+
+
+    def get_dtdf_sum(self, start, final):
+        """
+        @return: sum of DISPATCH_PERIOD*DISCOUNT_FACTOR over
+            window [start, final]
+        @rtype: L{float}
+        """
+        return self.get_window_sum( self.dtdf_cumsum, start, final )
+
+
+
+if __name__ == "__main__":
+    print "gnw.time_grid.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
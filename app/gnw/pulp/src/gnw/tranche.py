@@ -15,6 +15,7 @@
 """
 gnw: provides trade or price tranche abstraction
 """
+import numpy
 import pulp
 
 from gnw.entity import Entity, FmtDictEntry
@@ -315,8 +316,8 @@ class Tranche( Entity ):
         @type prefix: L{str}
         """
         super( Tranche, self ).create_lp_vars( prefix )
-        self.pos = pulp.LpVariable( prefix + self.name + "_pos" , lowBound = 0.0 )
-        self.semcont_trig = pulp.LpVariable( prefix + self.name + "_semcont_trig", lowBound = 0, upBound = 1, cat = pulp.LpInteger )
+        self.create_lp_var_block( "pos", prefix + self.name + "_pos", (), lowBound = 0.0 )
+        self.create_lp_var_block( "semcont_trig", prefix + self.name + "_semcont_trig", (), lowBound = 0, upBound = 1, cat = pulp.LpInteger )
 
         
     def create_model(self, prefix=""):
@@ -349,6 +350,37 @@ class Tranche( Entity ):
         self.objective_list.append( self.get_objective_value() )
 
 
+    def create_sparse_model(self, model, prefix=""):
+        """
+        Overwrites base class method by adding the rows and
+        objective terms of the tranche model (see L{create_model})
+        to model as blocks of column indices.
+        
+        @param model: sparse model
+        @type model: L{gnw.sparse_model.SparseModel}
+        
+        @param prefix: prefix string prepended to all symbolic
+            lp variable names
+        @type prefix: L{str}
+        """
+        # resets pulp model only
+        super( Tranche, self ).create_model( prefix )
+        
+        pos = self.get_lp_var_indices( "pos" ).reshape( 1 )
+        semcont_trig = self.get_lp_var_indices( "semcont_trig" ).reshape( 1 )
+        
+        if self.CAPACITY_LIMIT[0] is not None and self.CAPACITY_LIMIT[0] > 0.0:
+            if self.CAPACITY_LIMIT[1] is None:
+                self.CAPACITY_LIMIT[1] = __very_large_positive_number__
+            model.add_rows( self, numpy.column_stack( (semcont_trig, pos) ), (self.CAPACITY_LIMIT[0], -1.0), model.LE, 0.0 )
+            model.add_rows( self, numpy.column_stack( (pos, semcont_trig) ), (1.0, -self.CAPACITY_LIMIT[1]), model.LE, 0.0 )
+        elif self.CAPACITY_LIMIT[1] is not None:
+            model.add_rows( self, pos, 1.0, model.LE, self.CAPACITY_LIMIT[1] )
+        
+        dtdf_sum = self.get_TIME_GRID().get_dtdf_sum( self.DELIVERY_PERIOD[0], self.DELIVERY_PERIOD[1] )
+        model.add_objective( pos, -self.BID_ASK_ADJ*dtdf_sum )
+
+
     def get_lp_vars(self):
         """
         This method returns a list containing all
@@ -382,8 +414,8 @@ class Tranche( Entity ):
                          'FINAL_IDX' :             FmtDictEntry( [ self.ifmt ], 'FINAL_IDX',                0, None,      False, self.DELIVERY_PERIOD[1] ),
                          'CAPACITY_LIMIT_MIN' :    FmtDictEntry( [ self.ffmt ], 'CAPACITY_LIMIT_MIN [MW]',  0, None,      False, self.CAPACITY_LIMIT[0] ),
                          'CAPACITY_LIMIT_MAX' :    FmtDictEntry( [ self.ffmt ], 'CAPACITY_LIMIT_MAX [MW]',  0, None,      False, self.CAPACITY_LIMIT[1] ),
-                         'pos' :                   FmtDictEntry( [ self.ffmt ], 'pos [MW]',                 0, None,      True,  self.pos ),
-                         'semcont_trig' :          FmtDictEntry( [ self.ffmt ], 'semcont_trig',             0, None,      True,  self.semcont_trig ),
+                         'pos' :                   FmtDictEntry( [ self.ffmt ], 'pos [MW]',                 0, None,      True,  self.get_lp_var_solution( "pos" ) ),
+                         'semcont_trig' :          FmtDictEntry( [ self.ffmt ], 'semcont_trig',             0, None,      True,  self.get_lp_var_solution( "semcont_trig" ) ),
                          'DF' :                    FmtDictEntry( [ self.ffmt ], 'DF[t]',                    1, (nSteps,), False, self.DISCOUNT_FACTOR )})
 
         super( Tranche, self ).update_fmt_dict( fmt_dict )
@@ -398,7 +430,7 @@ class Tranche( Entity ):
         cap_min = self.CAPACITY_LIMIT[0]
         cap_max = self.CAPACITY_LIMIT[1]
         bidAskAdj = self.BID_ASK_ADJ
-        pos = self.pos.varValue
+        pos = self.get_lp_var_solution( "pos" )
         
         return (sb, start_idx, final_idx, cap_min, cap_max, bidAskAdj, pos)
 
@@ -408,8 +440,7 @@ class Tranche( Entity ):
         """
         obj = super( Tranche, self ).get_objective_value()
         
-        nSteps = len( self.DISPATCH_PERIOD )
-        deliveryPeriodIdx = [t for t in xrange( nSteps ) if self.DELIVERY_PERIOD[0] <= t and t <= self.DELIVERY_PERIOD[1]]
+        dtdf_sum = self.get_TIME_GRID().get_dtdf_sum( self.DELIVERY_PERIOD[0], self.DELIVERY_PERIOD[1] )
         # if SB = -1 (i.e., __eBuy___) then
         #    we have to add the adjustment to the mid price (i.e., MID_PRICE + BID_ASK_ADJ)
         #    to get the asking price, but have to multiply position times price with SB to
@@ -426,7 +457,7 @@ class Tranche( Entity ):
         #        = SB*pos*MID_PRICE - pos*BID_ASK_ADJ
         # In both cases term SB*pos*MID_PRICE is handled by gnw.product.Product.get_objective_value().
         # Here only term -pos*BID_ASK_ADJ is handled
-        obj += pulp.LpAffineExpression( -self.BID_ASK_ADJ*self.pos*sum( [self.DISPATCH_PERIOD[t]*self.DISCOUNT_FACTOR[t] for t in deliveryPeriodIdx ] ) )
+        obj += pulp.LpAffineExpression( -self.BID_ASK_ADJ*self.pos*dtdf_sum )
         return obj
 
 
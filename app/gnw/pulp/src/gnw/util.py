@@ -20,11 +20,15 @@ in Python or some package/module but my ignorance
 prevents to find/use them.
 """
 import sys
+import gzip
+
+import numpy
 
 isint = lambda x : isinstance( x, int )
 isfloat = lambda x : isinstance( x, float )
 
 isarray = lambda x : isinstance( x, numpy.ndarray )
+isrecord = lambda x : isinstance( x, numpy.void )
 islist =  lambda x : isinstance( x, list )
 istuple = lambda x : isinstance( x, tuple )
 isbuffer = lambda x : isinstance( x, buffer )
@@ -62,6 +66,89 @@ def dbg_print(message, verbose=False, file=None):
             sys.stdout.flush()
 
 
+def open_results_file(fname, compresslevel=0):
+    """
+    Opens result file fname for writing. If compresslevel
+    is positive, the output is compressed on the fly using
+    gzip and ".gz" is appended to fname.
+    
+    @param fname: name of the file
+    @type fname: L{str}
+    
+    @param compresslevel: gzip compression level, 0 for
+        writing an uncompressed (text) file
+    @type compresslevel: L{int} in [0, 9]
+    
+    @return: file object opened for writing
+    @rtype: L{file} or L{gzip.GzipFile}
+    
+    @raise ValueError: compresslevel is not in [0, 9]
+    """
+    if compresslevel not in range( 10 ):
+        raise ValueError, "open_results_file: compression level needs to be in [0, 9]"
+    if compresslevel > 0:
+        return gzip.open( fname + ".gz", "wb", compresslevel )
+    return open( fname, "w" )
+
+
+def get_softspace(text):
+    """
+    @return: separator inserted by the print statement
+        between text and a subsequent item, i.e., no
+        separator if text ends with a whitespace character
+        other than ' ', a single blank otherwise
+    @rtype: L{str}
+    """
+    if text and text[-1].isspace() and text[-1] != " ":
+        return ""
+    return " "
+
+
+def format_print_lines(fmt_table, value_table, sep=";"):
+    """
+    Formats a table of values in one pass, returning
+    the same text that is written to a file by printing
+    each row as follows::
+    
+        for j in xrange( num_cols ):
+            print >> file, (fmt_table[i,j] + sep) % value_table[i,j],
+        print >> file
+    
+    @param fmt_table: format strings, each holding
+        exactly one conversion specification
+    @type fmt_table: 2-dimensional L{numpy.array} of dtype='object'
+        
+    @param value_table: values, same shape as fmt_table
+    @type value_table: 2-dimensional L{numpy.array} of dtype='object'
+    
+    @param sep: separator character to be used between elements
+    @type sep: L{str}
+    
+    @return: formatted lines, each terminated by a newline character
+    @rtype: L{str}
+    """
+    num_rows, num_cols = fmt_table.shape
+    if num_rows == 0 or num_cols == 0:
+        return "\n"*num_rows
+    
+    if sep == "":
+        # separator depends on each formatted value
+        lines = []
+        for i in xrange( num_rows ):
+            line = ""
+            for j in xrange( num_cols ):
+                if j > 0:
+                    line += get_softspace( line )
+                line += fmt_table[i,j] % value_table[i,j]
+            lines.append( line + "\n" )
+        return "".join( lines )
+    
+    cell_sep = sep.replace( "%", "%%" )
+    row_fmt = (cell_sep + get_softspace( sep )).join
+    block_fmt = "".join( [row_fmt( row ) + cell_sep + "\n" for row in fmt_table.tolist()] )
+    return block_fmt % tuple( value_table.ravel().tolist() )
+
+
 
 if __name__ == "__main__":
     print "gnw.util.py"
@@ -22,13 +22,17 @@ from gnw.storage import Storage
 from gnw.market import Market
 from gnw.product import Product
 from gnw.tranche import Tranche
+from gnw.container_entity import ContainerEntity
+from gnw.bundle import write_bundle
 
 from util import conditional
+from util import format_print_lines
 
 from __init__ import __eSell__
 from __init__ import __eBuy___
 
 import sys
+import numpy
 import pulp
 
 
@@ -43,8 +47,9 @@ def write_product_results(ntwrk, lp, file=sys.stdout, sfmt="%-s", ffmt="%.8f", i
         to ntwrk.
     @type lp: L{pulp.LpProblem}
     
-    @param file: file object that has been opened for writing
-    @type file: L{file}
+    @param file: file object that has been opened for writing,
+        e.g., by L{gnw.util.open_results_file}
+    @type file: L{file} or L{gzip.GzipFile}
     
     @param sfmt: format string for strings
     @type sfmt: L{str}
@@ -117,7 +122,12 @@ def write_product_results(ntwrk, lp, file=sys.stdout, sfmt="%-s", ffmt="%.8f", i
                 
     sb_list = [__eSell__, __eBuy___]
     
-    var_dict = lp.variablesDict()
+    # group tranches by sell/buy indicator and delivery period once,
+    # rather than scanning all tranches for each product
+    trn_list_dict = {}
+    for trn in trn_entity_list:
+        key = (trn.SB, trn.DELIVERY_PERIOD[0], trn.DELIVERY_PERIOD[1])
+        trn_list_dict.setdefault( key, [] ).append( trn )
     
     # Print header line
     for item in hdr_list:
@@ -127,36 +137,39 @@ def write_product_results(ntwrk, lp, file=sys.stdout, sfmt="%-s", ffmt="%.8f", i
         prd_list = [prd for prd in prd_entity_list if prd.SB == sb]
         for prd in prd_list:
 
-            delivery_period_idx = xrange( prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1] + 1)
+            start, final = prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1]
+            
+            time_grid = prd.get_TIME_GRID()
+            dp_sum = time_grid.get_dt_sum( start, final )
+            dpdf_sum = time_grid.get_dtdf_sum( start, final )
+            
+            pos = prd.get_lp_var_solution( "pos" )
 
             print >> file, (fmt_dict['name'] + sep) % prd.name,
-            print >> file, (fmt_dict['start idx'] + sep) % prd.DELIVERY_PERIOD[0],
-            print >> file, (fmt_dict['final idx'] + sep) % prd.DELIVERY_PERIOD[1],
+            print >> file, (fmt_dict['start idx'] + sep) % start,
+            print >> file, (fmt_dict['final idx'] + sep) % final,
             print >> file, (fmt_dict['buy/sell [-1/1]'] + sep) % prd.SB,
             if prd.CLIP_SIZE > 0.0:
-                print >> file, (fmt_dict['clips'] + sep) % var_dict[prd.name + "_num_clips"].varValue,
+                print >> file, (fmt_dict['clips'] + sep) % prd.get_lp_var_solution( "num_clips" ),
             else:
                 print >> file, (fmt_dict['clips'] + sep) % 0,
-            print >> file, (fmt_dict['pos [MW]'] + sep) % var_dict[prd.name + "_pos"].varValue,
+            print >> file, (fmt_dict['pos [MW]'] + sep) % pos,
             print >> file, (fmt_dict['cur pos [MW]'] + sep) % prd.CURRENT_POSITION,
-            print >> file, (fmt_dict['net pos [MW]'] + sep) % (var_dict[prd.name + "_pos"].varValue + prd.CURRENT_POSITION),
-            print >> file, (fmt_dict['vol [MWh]'] + sep) % sum( [var_dict[prd.name + "_vol_%d" % t].varValue for t in delivery_period_idx] ),
+            print >> file, (fmt_dict['net pos [MW]'] + sep) % (pos + prd.CURRENT_POSITION),
+            print >> file, (fmt_dict['vol [MWh]'] + sep) % sum( prd.get_lp_var_solution( "vol" ).tolist() ),
             print >> file, (fmt_dict['mid price [EUR/MWh]'] + sep) % prd.MID_PRICE,
-            print >> file, (fmt_dict['avg df'] + sep) % (sum( [prd.DISPATCH_PERIOD[t]*prd.DISCOUNT_FACTOR[t] for t in delivery_period_idx] )/sum( [prd.DISPATCH_PERIOD[t] for t in delivery_period_idx] )),
+            print >> file, (fmt_dict['avg df'] + sep) % (dpdf_sum/dp_sum),
 
-            trn_list = [trn for trn in trn_entity_list \
-                        if trn.SB == prd.SB \
-                        and trn.DELIVERY_PERIOD[0] == prd.DELIVERY_PERIOD[0] \
-                        and trn.DELIVERY_PERIOD[1] == prd.DELIVERY_PERIOD[1]]
-            for trn in trn_list:
+            for trn in trn_list_dict.get( (prd.SB, start, final), [] ):
                 print >> file, (fmt_dict['name'] + sep) % trn.name,
-                print >> file, (fmt_dict['pos [MW]'] + sep) % var_dict[trn.name + "_pos"].varValue,
-                print >> file, (fmt_dict['vol [MWh]'] + sep) % (var_dict[trn.name + "_pos"].varValue*sum( [prd.DISPATCH_PERIOD[t] for t in delivery_period_idx] )),
+                trn_pos = trn.get_lp_var_solution( "pos" )
+                print >> file, (fmt_dict['pos [MW]'] + sep) % trn_pos,
+                print >> file, (fmt_dict['vol [MWh]'] + sep) % (trn_pos*dp_sum),
                 print >> file, (fmt_dict['bid/ask adj [EUR/MWh]'] + sep) % trn.BID_ASK_ADJ,
 
             print >> file
 
-    
+
 def write_dispatch_results(ntwrk, lp, file=sys.stdout, sfmt="%-s", ffmt="%.8f", ifmt="%0d", sep=';'): 
     """
     Writes storage dispatch results to file.
@@ -168,8 +181,9 @@ def write_dispatch_results(ntwrk, lp, file=sys.stdout, sfmt="%-s", ffmt="%.8f",
         to ntwrk.
     @type lp: L{pulp.LpProblem}
     
-    @param file: file object that has been opened for writing
-    @type file: L{file}
+    @param file: file object that has been opened for writing,
+        e.g., by L{gnw.util.open_results_file}
+    @type file: L{file} or L{gzip.GzipFile}
     
     @param sfmt: format string for strings
     @type sfmt: L{str}
@@ -260,120 +274,165 @@ def write_dispatch_results(ntwrk, lp, file=sys.stdout, sfmt="%-s", ffmt="%.8f",
                 
     sb_list = [__eSell__, __eBuy___]
     
-    var_dict = lp.variablesDict()
-    
     NA = "N/A"
     
-    # Print 1st header row
-    for item in hdr_list:
-        print >> file, (sfmt + sep) % item,
-    print >> file
-    
-    # Print 2nd header row
-    for i in xrange( len( dsp_hdr_list ) ):
-        print >> file, (sfmt + sep) % NA,
+    # The output is assembled as one table of format strings
+    # and one table of values (3 header rows followed by one
+    # row per point in time), which are formatted in one pass.
+    nRows = 3 + nPnts
+    nCols = len( hdr_list )
+    fmt_table = numpy.empty( (nRows, nCols), dtype='object' )
+    value_table = numpy.empty( (nRows, nCols), dtype='object' )
+    fmt_table[:] = sfmt
+    value_table[:] = NA
+    
+    # 1st header row
+    value_table[0,:] = hdr_list
+    
+    # 2nd and 3rd header row
+    c = len( dsp_hdr_list )
     for strg in strg_entity_list:
-        for i in xrange( len( strg_hdr_list ) ):
-            print >> file, (sfmt + sep) % strg.name,
+        value_table[1,c:c + len( strg_hdr_list )] = strg.name
+        c += len( strg_hdr_list )
     for prd in prd_entity_list:
-        for i in xrange( len( prd_hdr_list ) ):
-            print >> file, (sfmt + sep) % prd.name,
-    print >> file
-            
-    # Print 3rd header row
-    for i in xrange( len( dsp_hdr_list ) ):
-        print >> file, (sfmt + sep) % NA,
-    for i in xrange( nStrgs ):
-        for j in xrange( len( strg_hdr_list ) ):
-            print >> file, (sfmt + sep) % NA,
+        value_table[1,c:c + len( prd_hdr_list )] = prd.name
+        fmt_table[2,c:c + len( prd_hdr_list )] = fmt_dict['buy/sell [-1/1]']
+        value_table[2,c:c + len( prd_hdr_list )] = prd.SB
+        c += len( prd_hdr_list )
+    
+    # data rows, the last data row only holding storage levels
+    fmt_rows = fmt_table[3:,:]
+    value_rows = value_table[3:,:]
+    
+    def set_column(c, fmt, values, start=0):
+        fmt_rows[start:start + len( values ),c] = fmt
+        value_rows[start:start + len( values ),c] = values
+    
+    inj_cost = numpy.zeros( nStps, dtype='double' )
+    rel_cost = numpy.zeros( nStps, dtype='double' )
+    c = len( dsp_hdr_list )
+    for strg in strg_entity_list:
+        lev_pct = strg.get_lp_var_solution( "lev_pct" )[:nPnts]
+        inj_pct = strg.get_lp_var_solution( "inj_pct" )[:nStps]
+        rel_pct = strg.get_lp_var_solution( "rel_pct" )[:nStps]
+        inj_cost += inj_pct*strg.INJ_COST[:nStps]*strg.WGV
+        rel_cost += rel_pct*strg.REL_COST[:nStps]*strg.WGV
+        set_column( c, fmt_dict['inj cost [EUR/MWh]'], strg.INJ_COST[:nStps] )
+        set_column( c + 1, fmt_dict['rel cost [EUR/MWh]'], strg.REL_COST[:nStps] )
+        set_column( c + 2, fmt_dict['lev [WGV%]'], lev_pct )
+        set_column( c + 3, fmt_dict['lev [MWh]'], lev_pct*strg.WGV )
+        set_column( c + 4, fmt_dict['inj [WGV%]'], inj_pct )
+        set_column( c + 5, fmt_dict['inj [MWh]'], inj_pct*strg.WGV )
+        set_column( c + 6, fmt_dict['rel [WGV%]'], rel_pct )
+        set_column( c + 7, fmt_dict['rel [MWh]'], rel_pct*strg.WGV )
+        c += len( strg_hdr_list )
+    
+    # products by sell/buy indicator and delivery period
+    prd_list_dict = {}
     for prd in prd_entity_list:
-        for i in xrange( len( prd_hdr_list ) ):
-            print >> file, (fmt_dict['buy/sell [-1/1]'] + sep) % prd.SB,
-    print >> file
+        key = (prd.SB, prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1])
+        prd_list_dict.setdefault( key, [] ).append( prd )
+    
+    sales_revenue = numpy.zeros( nStps, dtype='double' )
+    purchase_cost = numpy.zeros( nStps, dtype='double' )
+    for trn in trn_entity_list:
+        if trn.SB != __eSell__ and trn.SB != __eBuy___:
+            continue
+        start, final = trn.DELIVERY_PERIOD[0], trn.DELIVERY_PERIOD[1]
+        prd_list = prd_list_dict.get( (trn.SB, start, final), [] )
+        if len( prd_list ) != 1:
+            raise ValueError, "more than one product found for given tranche"
+        prd = prd_list[0]
+        cash_flow = conditional( trn.SB == __eSell__, sales_revenue, purchase_cost )
+        cash_flow[start:final + 1] += trn.get_lp_var_solution( "pos" )*trn.DISPATCH_PERIOD[start:final + 1]*(prd.MID_PRICE - trn.SB*trn.BID_ASK_ADJ)
+    
+    set_column( 0, fmt_dict['idx'], range( nPnts ) )
+    set_column( 1, fmt_dict['dt [h]'], ntwrk.DISPATCH_PERIOD[:nStps] )
+    set_column( 2, fmt_dict['inj cost [EUR]'], ntwrk.DISCOUNT_FACTOR[:nStps]*inj_cost )
+    set_column( 3, fmt_dict['rel cost [EUR]'], ntwrk.DISCOUNT_FACTOR[:nStps]*rel_cost )
+    set_column( 4, fmt_dict['sales revenue [EUR]'], sales_revenue )
+    set_column( 5, fmt_dict['purchase cost [EUR]'], purchase_cost )
+    set_column( 6, fmt_dict['df'], ntwrk.DISCOUNT_FACTOR[:nStps] )
     
-    # Print data rows
-    for t in xrange( nPnts ):
-        print >> file, (fmt_dict['idx'] + sep) % t,
-        
-        if t == nStps:
-            # print last data row
-            for i in xrange( len( dsp_hdr_list ) - 1 ):
-                print >> file, (sfmt + sep) % NA,
-            for strg in strg_entity_list:
-                print >> file, (sfmt + sep) % NA,
-                print >> file, (sfmt + sep) % NA,
-                print >> file, (fmt_dict['lev [WGV%]'] + sep) % var_dict[strg.name + '_lev_pct_%d' % t].varValue,
-                print >> file, (fmt_dict['lev [MWh]'] + sep) % (var_dict[strg.name + '_lev_pct_%d' % t].varValue*strg.WGV),
-                print >> file, (sfmt + sep) % NA,
-                print >> file, (sfmt + sep) % NA,
-                print >> file, (sfmt + sep) % NA,
-                print >> file, (sfmt + sep) % NA,
-
-            for prd in prd_entity_list:
-                for item in prd_hdr_list:
-                    print >> file, (sfmt + sep) % NA,
-        else:
-            print >> file, (fmt_dict['dt [h]'] + sep) % ntwrk.DISPATCH_PERIOD[t],
-        
-            print >> file, (fmt_dict['inj cost [EUR]'] + sep) % (ntwrk.DISCOUNT_FACTOR[t]*sum( [var_dict[strg.name + '_inj_pct_%d' % t].varValue*strg.INJ_COST[t]*strg.WGV  for strg in ntwrk.get_entity_list( Storage )] )),
-            print >> file, (fmt_dict['rel cost [EUR]'] + sep) % (ntwrk.DISCOUNT_FACTOR[t]*sum( [var_dict[strg.name + '_rel_pct_%d' % t].varValue*strg.REL_COST[t]*strg.WGV  for strg in ntwrk.get_entity_list( Storage )] )),
-
-            trn_list = [trn for trn in trn_entity_list \
-                        if trn.SB == __eSell__ \
-                        and t in xrange( trn.DELIVERY_PERIOD[0], trn.DELIVERY_PERIOD[1] + 1 )]
-            sales_revenue = 0.0
-            for trn in trn_list:
-                prd_list = [prd for prd in prd_entity_list \
-                            if prd.SB == trn.SB \
-                            and prd.DELIVERY_PERIOD[0] == trn.DELIVERY_PERIOD[0] \
-                            and prd.DELIVERY_PERIOD[1] == trn.DELIVERY_PERIOD[1]]
-                if len( prd_list ) != 1:
-                    raise ValueError, "more than one product found for given tranche"
-                prd = prd_list[0]
-                sales_revenue += var_dict[trn.name + '_pos'].varValue*trn.DISPATCH_PERIOD[t]*(prd.MID_PRICE - trn.SB*trn.BID_ASK_ADJ)
-            print >> file, (fmt_dict['sales revenue [EUR]'] + sep) % sales_revenue,
+    for sb in sb_list:
+        prd_list = [prd for prd in prd_entity_list if prd.SB == sb]
+        for prd in prd_list:
+            start, final = prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1]
+            pos = prd.get_lp_var_solution( "pos" )
+            nDlvr = final + 1 - start
+            set_column( c, fmt_dict['pos [MW]'], [pos]*nDlvr, start )
+            set_column( c + 1, fmt_dict['cur pos [MW]'], [prd.CURRENT_POSITION]*nDlvr, start )
+            set_column( c + 2, fmt_dict['net pos [MW]'], [pos + prd.CURRENT_POSITION]*nDlvr, start )
+            set_column( c + 3, fmt_dict['vol [MWh]'], prd.get_vol_values()[:nStps] )
+            c += len( prd_hdr_list )
+    
+    file.write( format_print_lines( fmt_table, value_table, sep ) )
 
-            trn_list = [trn for trn in trn_entity_list \
-                        if trn.SB == __eBuy___ \
-                        and t in xrange( trn.DELIVERY_PERIOD[0], trn.DELIVERY_PERIOD[1] + 1 )]
-            purchase_cost = 0.0
-            for trn in trn_list:
-                prd_list = [prd for prd in prd_entity_list \
-                            if prd.SB == trn.SB \
-                            and prd.DELIVERY_PERIOD[0] == trn.DELIVERY_PERIOD[0] \
-                            and prd.DELIVERY_PERIOD[1] == trn.DELIVERY_PERIOD[1]]
-                if len( prd_list ) != 1:
-                    raise ValueError, "more than one product found for given tranche"
-                prd = prd_list[0]
-                purchase_cost += var_dict[trn.name + '_pos'].varValue*trn.DISPATCH_PERIOD[t]*(prd.MID_PRICE - trn.SB*trn.BID_ASK_ADJ)
-            print >> file, (fmt_dict['purchase cost [EUR]'] + sep) % purchase_cost,
-    
-            print >> file, (fmt_dict['df'] + sep) % ntwrk.DISCOUNT_FACTOR[t],
-            
-            for strg in strg_entity_list:
-                print >> file, (fmt_dict['inj cost [EUR/MWh]'] + sep) % strg.INJ_COST[t],
-                print >> file, (fmt_dict['rel cost [EUR/MWh]'] + sep) % strg.REL_COST[t],
-                print >> file, (fmt_dict['lev [WGV%]'] + sep) % var_dict[strg.name + '_lev_pct_%d' % t].varValue,
-                print >> file, (fmt_dict['lev [MWh]'] + sep) % (var_dict[strg.name + '_lev_pct_%d' % t].varValue*strg.WGV),
-                print >> file, (fmt_dict['inj [WGV%]'] + sep) % var_dict[strg.name + '_inj_pct_%d' % t].varValue,
-                print >> file, (fmt_dict['inj [MWh]'] + sep) % (var_dict[strg.name + '_inj_pct_%d' % t].varValue*strg.WGV),
-                print >> file, (fmt_dict['rel [WGV%]'] + sep) % var_dict[strg.name + '_rel_pct_%d' % t].varValue,
-                print >> file, (fmt_dict['rel [MWh]'] + sep) % (var_dict[strg.name + '_rel_pct_%d' % t].varValue*strg.WGV),
 
-            for sb in sb_list:
-                prd_list = [prd for prd in prd_entity_list if prd.SB == sb]
-                for prd in prd_list:
-                    if t in xrange( prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1] + 1 ):
-                        print >> file, (fmt_dict['pos [MW]'] + sep) % var_dict[prd.name + "_pos"].varValue,
-                        print >> file, (fmt_dict['cur pos [MW]'] + sep) % prd.CURRENT_POSITION,
-                        print >> file, (fmt_dict['net pos [MW]'] + sep) % (var_dict[prd.name + "_pos"].varValue + prd.CURRENT_POSITION),
-                    else:
-                        print >> file, (sfmt + sep) % NA,
-                        print >> file, (sfmt + sep) % NA,
-                        print >> file, (sfmt + sep) % NA,
-                    print >> file, (fmt_dict['vol [MWh]'] + sep) % var_dict[prd.name + "_vol_%d" % t].varValue,
-    
-        print >> file
+def write_columnar_results(ntwrk, lp, fname, mtm_value=None):
+    """
+    Writes the results of a run, i.e., problem status,
+    objective value, mark to market value, and for each
+    entity of ntwrk (including ntwrk) the labels and values
+    of its L{gnw.entity.Entity.fmt_dict} entries, to
+    the single binary file fname. The file is written in
+    the bundle format of L{gnw.bundle}, such that
+    L{gnw.bundle.read_bundle} returns the dictionary
+        - 'STATUS' : problem status as given by L{pulp.LpStatus}
+        - 'OBJVAL' : objective value
+        - 'MTMVAL' : mark to market value
+        - 'ENTITY_DICT' : dictionary with entity names as keys
+          and dictionaries as values having entries
+              - 'TYPE' : class name of the entity
+              - 'LABEL_DICT' : labels of the fmt_dict entries
+              - 'COLUMN_DICT' : values of the fmt_dict entries
+          as returned by L{gnw.entity.Entity.get_results_columns}
+    in which all numeric arrays are read-only views into
+    the memory-mapped file, i.e., individual columns are only
+    read from disk when being accessed.
+    
+    @param ntwrk: gas network class instance
+    @type ntwrk: L{gnw.network.Network}
+    
+    @param lp: a fully setup and solved linear/mip program corresponding
+        to ntwrk.
+    @type lp: L{pulp.LpProblem}
+    
+    @param fname: name of file to be written
+    @type fname: L{str}
+    
+    @param mtm_value: mark to market value, None for
+        evaluating it from ntwrk
+    @type mtm_value: L{float} or None
+    
+    @raise ValueError: entity names are not unique
+    @raise TypeError: 
+    """
+    if not isinstance( ntwrk, Network ):
+        raise TypeError, "write_columnar_results: Parameter 'ntwrk' needs to be an instance of class 'gnw.Network'"
+    if not isinstance( lp, pulp.LpProblem ):
+        raise TypeError, "write_columnar_results: Parameter 'lp' needs to be an instance of class 'pulp.LpProblem'"
+    
+    if mtm_value is None:
+        mtm_value = ntwrk.get_mark_to_market_solution()
+    
+    entity_dict = {}
+    entity_list = [ntwrk]
+    while entity_list:
+        entity = entity_list.pop( 0 )
+        if entity.name in entity_dict:
+            raise ValueError, "write_columnar_results: entity name '%s' is not unique" % entity.name
+        label_dict, column_dict = entity.get_results_columns()
+        entity_dict[entity.name] = {'TYPE' : entity.__class__.__name__,
+                                    'LABEL_DICT' : label_dict,
+                                    'COLUMN_DICT' : column_dict}
+        if isinstance( entity, ContainerEntity ):
+            entity_list += entity.get_entity_list()
+    
+    write_bundle( fname, {'STATUS' : pulp.LpStatus[lp.status],
+                          'OBJVAL' : pulp.value( lp.objective ),
+                          'MTMVAL' : mtm_value,
+                          'ENTITY_DICT' : entity_dict} )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: access to the reference test cases in ../data/test shared
+by the regression tests. Run the tests from the src directory via
+
+    python -m unittest discover -s tests
+"""
+import os
+
+from gnw.network_factory import NetworkFactory
+from gnw.reader import read_coeffs
+
+
+test_dir = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), "..", "..", "data", "test" )
+
+
+def get_data_dir(test_case):
+    """
+    @return: reference data directory of test_case
+    @rtype: L{str}
+    """
+    return os.path.join( test_dir, test_case, "pulp", "reference-data" )
+
+
+def get_reference_objective(test_case):
+    """
+    @return: objective value of the reference results of test_case
+    @rtype: L{float}
+
+    @raise ValueError: the reference results hold no objective value
+    """
+    file = open( os.path.join( test_dir, test_case, "pulp", "reference-results", "gnw-ntwrk-rslts.txt" ) )
+    try:
+        for line in file:
+            words = line.strip().split( ";" )
+            if words[0] == "objval[1]":
+                return float( words[1] )
+    finally:
+        file.close()
+    raise ValueError, "get_reference_objective: no objective value for '%s'" % test_case
+
+
+def create_network(test_case, create_lp_vars=True):
+    """
+    @param create_lp_vars: whether the lp variables of
+        the network are created
+    @type create_lp_vars: L{bool}
+
+    @return: network of test_case
+    @rtype: L{gnw.network.Network}
+    """
+    ntwrk = NetworkFactory.CreateFromDataDict( {'NAME' : "ntwrk"}, read_coeffs( get_data_dir( test_case ) ) )
+    if create_lp_vars:
+        ntwrk.create_lp_vars()
+    return ntwrk
+
+
+
+if __name__ == "__main__":
+    print "reference.py"
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
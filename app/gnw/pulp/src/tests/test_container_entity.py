@@ -0,0 +1,168 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking the typed entity lists and the
+name index cached by L{gnw.container_entity.ContainerEntity}
+against scans of its entity_list_dict, before and after
+L{gnw.container_entity.ContainerEntity.add_entity}, and that
+collecting the constraints of a container leaves the constraint
+lists of its entities unchanged.
+"""
+import unittest
+
+from gnw.container_entity import ContainerEntity
+from gnw.dispatch_product import DispatchProduct
+from gnw.entity import Entity
+from gnw.market import Market
+from gnw.product import Product
+from gnw.supplier import Supplier
+
+from reference import create_network
+
+
+def scan_entity_list(container, classinfo=Entity):
+    """
+    @return: entities of container being instances of classinfo,
+        collected from entity_list_dict without the cache
+    @rtype: L{list} of L{gnw.entity.Entity}
+    """
+    entity_list = []
+    for k,v in container.entity_list_dict.iteritems():
+        if issubclass( k, classinfo ):
+            entity_list += v
+    return entity_list
+
+
+def walk_entities(container):
+    """
+    @return: container and, recursively, all entities it
+        contains in depth-first pre-order
+    @rtype: L{list} of L{gnw.entity.Entity}
+    """
+    entity_list = [container]
+    for item in container.get_entity_list():
+        if isinstance( item, ContainerEntity ):
+            entity_list += walk_entities( item )
+        else:
+            entity_list.append( item )
+    return entity_list
+
+
+def scan_entity(container, name, classinfo=Entity):
+    """
+    @return: first entity of container being an instance of
+        classinfo named name, found by scanning entity_list_dict,
+        None if not found
+    @rtype: L{gnw.entity.Entity} or None
+    """
+    for item in scan_entity_list( container, classinfo ):
+        if item.name == name:
+            return item
+    return None
+
+
+class ContainerEntityTest( unittest.TestCase ):
+    """
+    Looks up the entities of the network and the market of a
+    test case with standard and dispatch products.
+    """
+    test_case = "supplier-dummy-dsp"
+    classinfo_list = [Entity, Market, Supplier, Product, DispatchProduct]
+
+    def setUp(self):
+        self.ntwrk = create_network( self.test_case, create_lp_vars = False )
+        self.mrkt = self.ntwrk.get_entity_list( Market )[0]
+
+
+    def check_container(self, container):
+        for classinfo in self.classinfo_list:
+            entity_list = container.get_entity_list( classinfo )
+            self.assertEqual( entity_list, scan_entity_list( container, classinfo ), classinfo )
+            self.assertTrue( container.get_entity_list( classinfo ) is entity_list, classinfo )
+
+            for item in scan_entity_list( container ) + [Entity( "unknown" )]:
+                self.assertTrue( container.get_entity( item.name, classinfo ) is scan_entity( container, item.name, classinfo ),
+                                 (item.name, classinfo) )
+
+
+    def test_get_entity(self):
+        self.assertTrue( len( self.mrkt.get_entity_list( DispatchProduct ) ) > 0 )
+        for container in [self.ntwrk, self.mrkt]:
+            self.check_container( container )
+        self.assertRaises( TypeError, self.mrkt.get_entity_list, int )
+        self.assertRaises( TypeError, self.mrkt.get_entity, "unknown", int )
+
+
+    def test_add_entity(self):
+        self.check_container( self.mrkt )
+
+        prd_list = self.mrkt.get_entity_list( Product )
+        prd = Product( "added", deliveryPeriod = (0, 0), dispatchPeriod = self.mrkt.DISPATCH_PERIOD )
+        self.mrkt.add_entity( prd )
+        self.assertEqual( self.mrkt.get_entity_list( Product ), prd_list + [prd] )
+        self.assertTrue( self.mrkt.get_entity( "added" ) is prd )
+        self.assertTrue( self.mrkt.get_entity( "added", Product ) is prd )
+        self.assertTrue( self.mrkt.get_entity( "added", DispatchProduct ) is None )
+        self.check_container( self.mrkt )
+
+        self.assertRaises( TypeError, self.mrkt.add_entity, Entity( "not admissible" ) )
+
+
+
+class ContainerEntityConstraintsTest( unittest.TestCase ):
+    """
+    Collects the constraints of the network, the market and
+    a product of a test case with trade tranches repeatedly.
+    """
+    test_case = "supplier-dummy-prd-trn-mup"
+
+    def test_get_constraints(self):
+        ntwrk = create_network( self.test_case )
+        ntwrk.create_model()
+        mrkt = ntwrk.get_entity_list( Market )[0]
+        prd = mrkt.get_entity_list( Product )[0]
+
+        entity_list = walk_entities( ntwrk )
+        self.assertEqual( list( ntwrk.iter_entities() ), entity_list )
+        constraint_list_dict = dict( [(id( entity ), list( entity.constraint_list )) for entity in entity_list] )
+
+        for container in [ntwrk, mrkt, prd]:
+            expected = []
+            for entity in walk_entities( container ):
+                expected += entity.constraint_list
+            self.assertTrue( len( expected ) > len( container.constraint_list ), container.name )
+            for i in xrange( 2 ):
+                constraint_list = container.get_constraints()
+                self.assertEqual( [id( constraint ) for constraint in constraint_list],
+                                  [id( constraint ) for constraint in expected], container.name )
+                self.assertFalse( constraint_list is container.constraint_list )
+                self.assertEqual( [id( constraint ) for constraint in container.iter_constraints()],
+                                  [id( constraint ) for constraint in expected], container.name )
+
+        for entity in entity_list:
+            self.assertEqual( [id( constraint ) for constraint in entity.constraint_list],
+                              [id( constraint ) for constraint in constraint_list_dict[id( entity )]], entity.name )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -0,0 +1,73 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking that the mark to market value of
+the solution values (see L{gnw.entity.Entity.get_mark_to_market_solution})
+equals the value of the mark to market expression (see
+L{gnw.entity.Entity.get_mark_to_market_value}) to the last digit.
+"""
+import unittest
+
+import pulp
+
+from gnw.sparse_solver import SparseSolver
+
+from reference import create_network
+from test_sparse_model import solve_pulp, solve_sparse
+
+
+class MarkToMarketTest( unittest.TestCase ):
+    """
+    Solves test cases with suppliers, make-up, dispatch products,
+    standard products and a storage along the pulp and the sparse
+    path, the latter reading the solution values from the lp
+    variable registry before creating the lp variables.
+    """
+    test_case_list = ["supplier-dummy-dsp",
+                      "supplier-dummy-dsp-bo-negative_curbuypos-mup",
+                      "supplier-dummy-prd-trn-cfw-mup",
+                      "virtstor-3sp-365-24-0cs-11-30ts"]
+
+    def setUp(self):
+        if not SparseSolver().available():
+            self.skipTest( "CBC is not available" )
+
+
+    def check_mark_to_market(self, solve):
+        for test_case in self.test_case_list:
+            ntwrk = create_network( test_case )
+            self.assertEqual( solve( ntwrk )[0], pulp.LpStatusOptimal, test_case )
+            mtm = ntwrk.get_mark_to_market_solution()
+            self.assertEqual( repr( mtm ), repr( pulp.value( ntwrk.get_mark_to_market_value() ) ), test_case )
+
+
+    def test_pulp(self):
+        self.check_mark_to_market( solve_pulp )
+
+
+    def test_sparse(self):
+        self.check_mark_to_market( solve_sparse )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
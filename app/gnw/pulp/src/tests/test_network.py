@@ -0,0 +1,108 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking that L{gnw.network.Network.populate},
+which inserts constraints into the internal state of a
+L{pulp.LpProblem} (constraints, lastUnused, modifiedConstraints
+and the registered variables), leaves a problem in the same state
+as adding the constraints one by one through C{problem += constraint}.
+The internal state written is the one of the pulp version pinned in
+setup.py.
+"""
+import unittest
+
+import pulp
+
+from reference import create_network
+
+
+def get_problem_state(problem):
+    """
+    @return: names and ids of the constraints, lastUnused, ids
+        of the modified constraints, ids of the registered
+        variables and terms and constant of the objective of
+        problem
+    @rtype: L{tuple}
+    """
+    return (problem.constraints.keys(),
+            [id( constraint ) for constraint in problem.constraints.values()],
+            problem.lastUnused,
+            [id( constraint ) for constraint in problem.modifiedConstraints],
+            sorted( problem._variable_ids.keys() ),
+            sorted( [(id( lp_var ), value) for lp_var, value in problem.objective.items()] ),
+            problem.objective.constant)
+
+
+class NetworkPopulateTest( unittest.TestCase ):
+    """
+    Compares the problem populated by
+    L{gnw.network.Network.populate} with the problem built
+    constraint by constraint, on a supplier and a storage test
+    case, with and without a named constraint whose name is
+    taken from pulp's naming scheme of unnamed constraints.
+    """
+    test_case_list = ["supplier-dummy-prd-trn-mup",
+                      "virtstor-3sp-365-24-0cs-11-30ts"]
+
+    def check_populate(self, test_case, named=False):
+        ntwrk = create_network( test_case )
+        ntwrk.create_model()
+        if named:
+            # named after the first unnamed constraint, taking the name
+            # pulp would give to the second but one
+            ntwrk.constraint_list.insert( 1, pulp.LpConstraint( ntwrk.constraint_list[0], name = "_C3" ) )
+
+        problem = pulp.LpProblem( "gnw", pulp.LpMaximize )
+        row_count_list = ntwrk.populate( problem )
+
+        expected = pulp.LpProblem( "gnw", pulp.LpMaximize )
+        expected += ntwrk.get_objective()
+        for constraint in ntwrk.iter_constraints():
+            expected += constraint
+
+        self.assertEqual( get_problem_state( problem ), get_problem_state( expected ), test_case )
+        self.assertEqual( [entity for entity, nRows in row_count_list], list( ntwrk.iter_entities() ) )
+        self.assertEqual( sum( [nRows for entity, nRows in row_count_list] ), len( expected.constraints ) )
+        if named:
+            self.assertTrue( problem.constraints["_C3"] is ntwrk.constraint_list[1] )
+
+
+    def test_populate(self):
+        for test_case in self.test_case_list:
+            self.check_populate( test_case )
+
+
+    def test_populate_named(self):
+        for test_case in self.test_case_list:
+            self.check_populate( test_case, named = True )
+
+
+    def test_populate_type_error(self):
+        ntwrk = create_network( self.test_case_list[0] )
+        ntwrk.create_model()
+        ntwrk.constraint_list.append( pulp.LpAffineExpression() )
+        self.assertRaises( TypeError, ntwrk.populate, pulp.LpProblem( "gnw", pulp.LpMaximize ) )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
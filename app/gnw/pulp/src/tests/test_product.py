@@ -0,0 +1,140 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking that standard products keep the
+trade tranches matching their sell/buy indicator and delivery
+period only, whether handed all tranches of a market or the
+tranches looked up by L{gnw.product_factory.ProductFactory.GetTrancheList},
+and that product volumes are held over the delivery period only.
+"""
+import unittest
+
+import numpy
+import pulp
+
+from gnw.dispatch_product import DispatchProduct
+from gnw.market import Market
+from gnw.product import Product
+from gnw.product_factory import ProductFactory
+from gnw.sparse_solver import SparseSolver
+from gnw.tranche import Tranche
+
+from reference import create_network, get_reference_objective
+from test_sparse_model import solve_pulp
+
+
+class ProductTest( unittest.TestCase ):
+    """
+    Rebuilds the products of a test case with trade tranches
+    from all products of its markets.
+    """
+    test_case = "supplier-dummy-prd-trn-cfw-mup"
+
+    def test_tranche_filter(self):
+        ntwrk = create_network( self.test_case, create_lp_vars = False )
+        for mrkt in ntwrk.get_entity_list( Market ):
+            prd_list = mrkt.get_entity_list( Product )
+            trn_list = []
+            for prd in prd_list:
+                trn_list += prd.get_entity_list( Tranche )
+            self.assertTrue( len( trn_list ) > 1 )
+            trn_index = ProductFactory.CreateTrancheIndex( trn_list )
+
+            for prd in prd_list:
+                expected = prd.get_entity_list( Tranche )
+                self.assertTrue( len( expected ) > 0, prd.name )
+                for trn in expected:
+                    self.assertEqual( (trn.SB, trn.DELIVERY_PERIOD[0], trn.DELIVERY_PERIOD[1]),
+                                      (prd.SB, prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1]), prd.name )
+
+                # products, being no tranches, are filtered out as well
+                filtered = Product( prd.name, prd_list + trn_list, prd.SB,
+                                    deliveryPeriod = tuple( prd.DELIVERY_PERIOD ),
+                                    dispatchPeriod = prd.DISPATCH_PERIOD )
+                self.assertEqual( [id( trn ) for trn in filtered.get_entity_list( Tranche )],
+                                  [id( trn ) for trn in expected], prd.name )
+
+                prd_dict = {'SB' : prd.SB,
+                            'START_IDX' : prd.DELIVERY_PERIOD[0],
+                            'END_IDX' : prd.DELIVERY_PERIOD[1]}
+                self.assertEqual( [id( trn ) for trn in ProductFactory.GetTrancheList( prd_dict, trn_index )],
+                                  [id( trn ) for trn in expected], prd.name )
+
+
+
+class ProductVolumeTest( unittest.TestCase ):
+    """
+    Checks the volume lp variables of the products of a test
+    case, the market's interval index over the delivery periods
+    and the volumes solved.
+    """
+    test_case = "supplier-dummy-prd-trn"
+    rel_tol = 1.0e-6
+
+    def setUp(self):
+        if not SparseSolver().available():
+            self.skipTest( "CBC is not available" )
+
+
+    def test_delivery_period_vol(self):
+        ntwrk = create_network( self.test_case )
+        ntwrk.create_model()
+        nSteps = len( ntwrk.DISPATCH_PERIOD )
+        for mrkt in ntwrk.get_entity_list( Market ):
+            prd_list = mrkt.get_entity_list( Product )
+            self.assertTrue( len( prd_list ) > 0 )
+            for prd in prd_list:
+                start, final = prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1]
+                self.assertTrue( final - start + 1 < nSteps, prd.name )
+                self.assertEqual( len( prd.vol ), final - start + 1, prd.name )
+                # no vol[t] == 0.0 rows
+                vol_name_set = set( [lp_var.name for lp_var in prd.vol] )
+                for constraint in prd.constraint_list:
+                    self.assertFalse( len( constraint ) == 1 and constraint.keys()[0].name in vol_name_set
+                                      and constraint.sense == pulp.LpConstraintEQ and constraint.constant == 0.0,
+                                      prd.name )
+
+            vol_index = mrkt.get_vol_index()
+            self.assertEqual( len( vol_index ), nSteps )
+            for t in xrange( nSteps ):
+                expected = [(prd.name, t - prd.DELIVERY_PERIOD[0]) for prd in prd_list \
+                            if prd.DELIVERY_PERIOD[0] <= t and t <= prd.DELIVERY_PERIOD[1]]
+                expected += [(dsp.name, t) for dsp in mrkt.get_entity_list( DispatchProduct )]
+                self.assertEqual( sorted( [(item.name, i) for item, i in vol_index[t]] ), sorted( expected ), t )
+
+        ntwrk = create_network( self.test_case )
+        status, objective = solve_pulp( ntwrk )
+        self.assertEqual( status, pulp.LpStatusOptimal )
+        expected = get_reference_objective( self.test_case )
+        self.assertAlmostEqual( objective, expected, delta = self.rel_tol * max( abs( expected ), 1.0 ) )
+        for mrkt in ntwrk.get_entity_list( Market ):
+            for prd in mrkt.get_entity_list( Product ):
+                start, final = prd.DELIVERY_PERIOD[0], prd.DELIVERY_PERIOD[1]
+                vol = prd.get_vol_values()
+                self.assertEqual( len( vol ), nSteps )
+                self.assertTrue( numpy.all( vol[:start] == 0.0 ) and numpy.all( vol[final + 1:] == 0.0 ), prd.name )
+                self.assertEqual( list( vol[start:final + 1] ), [lp_var.varValue for lp_var in prd.vol], prd.name )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -0,0 +1,121 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking that data dictionaries
+returned by L{gnw.reader.read_coeffs_cached} or read
+from bundle files (see L{gnw.reader.write_coeffs_bundle})
+equal the ones of L{gnw.reader.read_coeffs}, and that entities
+accept the structured arrays read as well as lists.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from gnw.reader import read_coeffs, read_coeffs_cached, write_coeffs_bundle, get_cache_fname
+from gnw.storage import Storage
+
+from reference import create_network, get_data_dir
+
+
+def fail_reader(fname, aDict):
+    """
+    Reader failing on any file, i.e., for data dictionaries
+    which are expected to be loaded from a cache file.
+    """
+    raise AssertionError, "fail_reader: unexpected read of '%s'" % fname
+
+
+class ReaderTest( unittest.TestCase ):
+    """
+    Compares data dictionaries read from a supplier and a storage
+    test case. Arrays are compared by type and element-wise, with
+    NaN values considered equal.
+    """
+    test_case_list = ["supplier-dummy-dsp-mup",
+                      "virtstor-3sp-365-24-0cs-11-30ts"]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree( self.tmp_dir )
+
+
+    def assertCoeffsEqual(self, first, second, path="data_dict"):
+        if isinstance( first, numpy.ndarray ):
+            self.assertTrue( isinstance( second, numpy.ndarray ), path )
+            self.assertEqual( first.dtype, second.dtype, path )
+            numpy.testing.assert_array_equal( first, second, path )
+        elif isinstance( first, dict ):
+            self.assertTrue( isinstance( second, dict ), path )
+            self.assertEqual( sorted( first.keys() ), sorted( second.keys() ), path )
+            for key, value in first.iteritems():
+                self.assertCoeffsEqual( value, second[key], "%s[%r]" % (path, key) )
+        elif isinstance( first, (list, tuple) ):
+            self.assertEqual( type( first ), type( second ), path )
+            self.assertEqual( len( first ), len( second ), path )
+            for i in xrange( len( first ) ):
+                self.assertCoeffsEqual( first[i], second[i], "%s[%d]" % (path, i) )
+        else:
+            self.assertEqual( type( first ), type( second ), path )
+            self.assertEqual( first, second, path )
+
+
+    def test_read_coeffs_cached(self):
+        cache_dir = os.path.join( self.tmp_dir, "cache" )
+        for test_case in self.test_case_list:
+            data_dir = get_data_dir( test_case )
+            expected = read_coeffs( data_dir )
+            # writes the cache file first, then reads from it
+            self.assertCoeffsEqual( expected, read_coeffs_cached( data_dir, cache_dir ) )
+            self.assertTrue( os.path.isfile( get_cache_fname( data_dir, cache_dir ) ) )
+            self.assertCoeffsEqual( expected, read_coeffs_cached( data_dir, cache_dir, fail_reader ) )
+
+
+    def test_bundle(self):
+        cache_dir = os.path.join( self.tmp_dir, "cache" )
+        for test_case in self.test_case_list:
+            data_dir = get_data_dir( test_case )
+            bundle_fname = os.path.join( self.tmp_dir, "%s.bnd" % test_case )
+            expected = read_coeffs( data_dir )
+            write_coeffs_bundle( data_dir, bundle_fname )
+            self.assertCoeffsEqual( expected, read_coeffs( bundle_fname ) )
+            # bundle files are read directly, i.e., not cached
+            self.assertCoeffsEqual( expected, read_coeffs_cached( bundle_fname, cache_dir, fail_reader ) )
+            self.assertFalse( os.path.exists( cache_dir ) )
+
+
+    def test_constraint_coeff_list(self):
+        strg = create_network( self.test_case_list[1], create_lp_vars = False ).get_entity_list( Storage )[0]
+        expected = [(coeff.START, coeff.FINAL, coeff.BOUND, coeff.BTYPE, coeff.CTYPE) for coeff in strg.CONSTRAINT_COEFF]
+        self.assertTrue( len( expected ) > 0 )
+        strg.set_CONSTRAINT_COEFF( [list( row ) for row in expected] )
+        self.assertEqual( [(coeff.START, coeff.FINAL, coeff.BOUND, coeff.BTYPE, coeff.CTYPE) for coeff in strg.CONSTRAINT_COEFF], expected )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -0,0 +1,254 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests comparing the objective values of the
+L{pulp} path (L{gnw.network.Network.populate}) and the sparse
+path (L{gnw.network.Network.get_sparse_model}), with and
+without presolve, on reference test cases. Both paths are
+solved by the local CBC solver with the same options, see
+L{gnw.sparse_solver.SparseSolver.create_pulp_solver}. The
+sparse path is solved in-process by L{gnw.highs_solver.HighsSolver}
+as well, if the HiGHS library is available. The rows added
+natively by suppliers, products and tranches are compared with
+the rows converted from their pulp model.
+"""
+import unittest
+
+import numpy
+import pulp
+
+from gnw.entity import Entity
+from gnw.highs_solver import HighsSolver
+from gnw.market import Market
+from gnw.sparse_model import SparseModel
+from gnw.sparse_solver import SparseSolver
+from gnw.supplier import Supplier
+
+from reference import create_network, get_reference_objective
+
+
+def solve_pulp(ntwrk, presolve=False):
+    """
+    Solves ntwrk along the pulp path, i.e., populating
+    a L{pulp.LpProblem} solved by CBC.
+
+    @param presolve: see L{gnw.network.Network.populate}
+    @type presolve: L{bool}
+
+    @return: status and objective value
+    @rtype: L{tuple} of (L{int}, L{float})
+    """
+    ntwrk.create_model()
+    prblm = pulp.LpProblem( "gnw", pulp.LpMaximize )
+    ntwrk.populate( prblm, presolve )
+    prblm.solve( SparseSolver().create_pulp_solver() )
+    ntwrk.restore_lp_var_bounds()
+    return prblm.status, pulp.value( prblm.objective )
+
+
+def solve_sparse(ntwrk, presolve=False, solver=None):
+    """
+    Solves ntwrk along the sparse path.
+
+    @param presolve: see L{gnw.network.Network.get_sparse_model}
+    @type presolve: L{bool}
+
+    @param solver: sparse model solver, None for
+        L{gnw.sparse_solver.SparseSolver}
+    @type solver: L{gnw.sparse_solver.SparseSolver} or
+        L{gnw.highs_solver.HighsSolver} or None
+
+    @return: status and objective value
+    @rtype: L{tuple} of (L{int}, L{float})
+    """
+    model = ntwrk.get_sparse_model( presolve = presolve )
+    status = (solver or SparseSolver()).solve( model, pulp.LpMaximize )
+    return status, model.get_objective_value()
+
+
+def get_entity_model(ntwrk, item, native=True):
+    """
+    @param item: entity of ntwrk
+    @type item: L{gnw.entity.Entity}
+
+    @param native: whether the rows of item are added by its
+        own create_sparse_model or converted from its pulp
+        model (see L{gnw.entity.Entity.create_sparse_model})
+    @type native: L{bool}
+
+    @return: compiled sparse model holding the rows and
+        objective terms of item only
+    @rtype: L{gnw.sparse_model.SparseModel}
+    """
+    model = SparseModel( ntwrk.get_LP_VAR_REGISTRY() )
+    if native:
+        item.create_sparse_model( model )
+    else:
+        Entity.create_sparse_model( item, model )
+    model.compile()
+    return model
+
+
+def get_row_list(model, ndigits=9):
+    """
+    @return: sense, right hand side and nonzeros of the rows of
+        model, in sorted order and rounded to ndigits decimals
+    @rtype: L{list} of L{tuple}
+    """
+    indptr, col, val = model.get_csr()
+    row_list = []
+    for i in xrange( model.nRows ):
+        row_col = col[indptr[i]:indptr[i + 1]]
+        row_val = val[indptr[i]:indptr[i + 1]]
+        nonzero = row_val != 0.0
+        row_list.append( (int( model.sense[i] ), round( model.rhs[i], ndigits ),
+                          zip( row_col[nonzero].tolist(), [round( value, ndigits ) for value in row_val[nonzero].tolist()] )) )
+    row_list.sort()
+    return row_list
+
+
+class NativeSparseModelTest( unittest.TestCase ):
+    """
+    Compares the rows and objective terms added natively by
+    suppliers, products and tranches with the ones converted
+    from their pulp model, on test cases covering make-up and
+    carry forward (with and without expiry), product capacity
+    limits and current positions.
+    """
+    test_case_list = ["supplier-dummy-dsp-mup",
+                      "supplier-dummy-prd-trn-cfw-mup",
+                      "supplier-dummy-prd-zero_bo-negative_curbuypos-mup",
+                      "supplier-gas-terra-avg-ctrct-price-cfw-exp-mup-exp",
+                      "supplier-gas-terra-curpos"]
+
+    def check_native(self, test_case):
+        ntwrk = create_network( test_case )
+        item_list = ntwrk.get_entity_list( Supplier )
+        for mrkt in ntwrk.get_entity_list( Market ):
+            item_list += mrkt.get_entity_list()
+        for item in item_list:
+            msg = "%s: %s" % (test_case, item.name)
+            native = get_entity_model( ntwrk, item )
+            expected = get_entity_model( ntwrk, item, native = False )
+            # compared row by row, as diffs of long lists are slow
+            row_list = get_row_list( native )
+            expected_row_list = get_row_list( expected )
+            self.assertEqual( len( row_list ), len( expected_row_list ), msg )
+            for row, expected_row in zip( row_list, expected_row_list ):
+                self.assertEqual( row, expected_row, msg )
+            self.assertTrue( numpy.allclose( native.obj, expected.obj, rtol = 1.0e-12, atol = 0.0 ), msg )
+            self.assertAlmostEqual( native.obj_constant, expected.obj_constant, 6, msg )
+            self.assertTrue( (native.is_used == expected.is_used).all(), msg )
+
+
+    def test_native_supplier(self):
+        for test_case in self.test_case_list:
+            self.check_native( test_case )
+
+
+
+class SparseModelTest( unittest.TestCase ):
+    """
+    Compares objective values of the pulp and the sparse path,
+    with and without presolve, on supplier and storage test
+    cases, and with the objective value of the reference
+    results. The make-up model of
+    supplier-dummy-dsp-bo-negative_curbuypos-mup is solved
+    to a wrong optimum by CBC with default cuts. Values are
+    compared relative to their magnitude, as models may be
+    solved to different optimal vertices within the solvers'
+    tolerances.
+    """
+    supplier_test_case_list = ["supplier-dummy-dsp-mup",
+                               "supplier-dummy-dsp-bo-negative_curbuypos-mup"]
+    storage_test_case_list = ["virtstor-3sp-365-24-0cs-11-30ts"]
+    rel_tol = 1.0e-6
+
+    def setUp(self):
+        if not SparseSolver().available():
+            self.skipTest( "CBC is not available" )
+
+
+    def assertObjectiveEqual(self, first, second, msg=None):
+        self.assertEqual( first[0], pulp.LpStatusOptimal, msg )
+        self.assertEqual( second[0], pulp.LpStatusOptimal, msg )
+        self.assertAlmostEqual( first[1], second[1],
+                                delta = self.rel_tol * max( abs( first[1] ), 1.0 ),
+                                msg = msg )
+
+
+    def check_sparse(self, test_case):
+        ntwrk = create_network( test_case )
+        expected = solve_pulp( ntwrk )
+        self.assertObjectiveEqual( (pulp.LpStatusOptimal, get_reference_objective( test_case )), expected, test_case )
+        self.assertObjectiveEqual( expected, solve_sparse( ntwrk ), test_case )
+
+
+    def check_presolve(self, test_case):
+        ntwrk = create_network( test_case )
+        expected = solve_pulp( ntwrk )
+        self.assertObjectiveEqual( expected, solve_pulp( ntwrk, presolve = True ), test_case )
+        self.assertObjectiveEqual( expected, solve_sparse( ntwrk, presolve = True ), test_case )
+
+
+    def check_highs(self, test_case):
+        if not HighsSolver().available():
+            self.skipTest( "HiGHS is not available" )
+        ntwrk = create_network( test_case )
+        expected = solve_sparse( ntwrk )
+        self.assertObjectiveEqual( (pulp.LpStatusOptimal, get_reference_objective( test_case )), expected, test_case )
+        for presolve in (False, True):
+            self.assertObjectiveEqual( expected, solve_sparse( ntwrk, presolve, HighsSolver() ), test_case )
+
+
+    def test_sparse_supplier(self):
+        for test_case in self.supplier_test_case_list:
+            self.check_sparse( test_case )
+
+
+    def test_sparse_storage(self):
+        for test_case in self.storage_test_case_list:
+            self.check_sparse( test_case )
+
+
+    def test_presolve_supplier(self):
+        for test_case in self.supplier_test_case_list:
+            self.check_presolve( test_case )
+
+
+    def test_presolve_storage(self):
+        for test_case in self.storage_test_case_list:
+            self.check_presolve( test_case )
+
+
+    def test_highs_supplier(self):
+        for test_case in self.supplier_test_case_list:
+            self.check_highs( test_case )
+
+
+    def test_highs_storage(self):
+        for test_case in self.storage_test_case_list:
+            self.check_highs( test_case )
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -0,0 +1,73 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking the problem status read from
+CBC solution files by L{gnw.sparse_solver.SparseSolver.read_solution}.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import pulp
+
+from gnw.sparse_solver import SparseSolver
+
+from reference import create_network
+
+
+class SparseSolverTest( unittest.TestCase ):
+    """
+    Reads solution files with the status lines written by CBC
+    (for LPs solved by 'initialSolve' and MIPs solved by 'branch').
+    """
+    status_line_list = [("Optimal - objective value -225114067.80000000", pulp.LpStatusOptimal),
+                        ("Infeasible - objective value 2.00000000", pulp.LpStatusInfeasible),
+                        ("Integer infeasible - objective value 0.20000000", pulp.LpStatusInfeasible),
+                        ("Unbounded - objective value 0.00000000", pulp.LpStatusUnbounded),
+                        ("Stopped on time - objective value -225114067.80000000", pulp.LpStatusNotSolved),
+                        ("Stopped on iterations - objective value 0.00000000", pulp.LpStatusNotSolved),
+                        ("Status unknown", pulp.LpStatusUndefined)]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree( self.tmp_dir )
+
+
+    def test_read_solution_status(self):
+        model = create_network( "supplier-dummy-dsp" ).get_sparse_model()
+        fname = os.path.join( self.tmp_dir, "gnw-sparse.sol" )
+        for line, status in self.status_line_list:
+            file = open( fname, "w" )
+            file.write( "%s\n      0 C0000000               1.5                  0\n" % line )
+            file.close()
+            read_status, values = SparseSolver().read_solution( model, fname )
+            self.assertEqual( read_status, status, line )
+            self.assertEqual( values[0], 1.5, line )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
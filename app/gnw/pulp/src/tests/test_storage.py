@@ -0,0 +1,152 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests comparing the compiled CONSTRAINT_COEFF rows
+of storages (see L{gnw.storage.Storage.compile_constraint_coeff}),
+grouped by (constraint type, START, FINAL) and with window sums
+built from cumulative sums, with the ungrouped formulation of one
+constraint per CONSTRAINT_COEFF row.
+"""
+import types
+import unittest
+
+import pulp
+
+from gnw.constraint import ConstraintCoeff
+from gnw.sparse_solver import SparseSolver
+from gnw.storage import Storage
+
+from reference import create_network
+from test_sparse_model import solve_pulp, solve_sparse
+
+
+def create_ungrouped_constraints(self):
+    """
+    Replaces L{gnw.storage.Storage.create_constraint_coeff_constraints}
+    by one constraint per row of CONSTRAINT_COEFF and constraint
+    type, summing the lp variables of the window directly and
+    without tightening bounds.
+    """
+    CType = ConstraintCoeff.ConstraintType
+    for coeff in self.CONSTRAINT_COEFF:
+        window = xrange( coeff.START, coeff.FINAL + 1 )
+        for ctype in self.ccoeff_ctype_list:
+            if not coeff.CTYPE & ctype:
+                continue
+            sense = self.ccoeff_sense_dict[coeff.BTYPE]
+            if ctype == CType.INJ_CAP_PCT or ctype == CType.REL_CAP_PCT:
+                dsp_sum = pulp.lpSum( [self.dsp_pct[t] for t in window] )
+            if ctype == CType.INJ_CAP_PCT:
+                rate_sum = pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.inj_rate[t] for t in window] )
+                self.constraint_list.append( pulp.LpConstraint( self.WGV*dsp_sum - coeff.BOUND*self.INJ_CAP*rate_sum, sense, rhs = 0.0 ) )
+            elif ctype == CType.REL_CAP_PCT:
+                rate_sum = pulp.lpSum( [self.DISPATCH_PERIOD[t]*self.rel_rate[t] for t in window] )
+                self.constraint_list.append( pulp.LpConstraint( self.WGV*dsp_sum + coeff.BOUND*self.REL_CAP*rate_sum, -sense, rhs = 0.0 ) )
+            else:
+                lp_vars = getattr( self, self.ccoeff_attr_dict[ctype] )
+                self.constraint_list.append( pulp.LpConstraint( pulp.lpSum( [lp_vars[t] for t in window] ), sense, rhs = coeff.BOUND ) )
+
+
+class StorageConstraintCoeffTest( unittest.TestCase ):
+    """
+    Adds multi dispatch period rows of all constraint types
+    to the storage of a test case, two rows per window such that
+    groups hold more than one row, and compares the objective
+    values of the ungrouped formulation, of the grouped one and of
+    the grouped one with cumulative sums forced for all constraint
+    types (CCOEFF_CUMSUM_RATIO of 0), along the pulp and the
+    sparse path.
+    """
+    test_case = "virtstor-3sp-365-24-0cs-11-30ts"
+    window_length = 28
+    rel_tol = 1.0e-6
+
+    # (constraint type, boundary type, bound) per window, LEV_PCT
+    # rows bound the sum of the levels over the window
+    window_row_list = [(ConstraintCoeff.ConstraintType.LEV_PCT,     ConstraintCoeff.BoundaryType.UB, 20.0),
+                       (ConstraintCoeff.ConstraintType.LEV_PCT,     ConstraintCoeff.BoundaryType.LB, 0.0),
+                       (ConstraintCoeff.ConstraintType.INJ_CAP_PCT, ConstraintCoeff.BoundaryType.UB, 0.9),
+                       (ConstraintCoeff.ConstraintType.INJ_CAP_PCT, ConstraintCoeff.BoundaryType.LB, -1.0),
+                       (ConstraintCoeff.ConstraintType.REL_CAP_PCT, ConstraintCoeff.BoundaryType.UB, 0.9),
+                       (ConstraintCoeff.ConstraintType.REL_CAP_PCT, ConstraintCoeff.BoundaryType.LB, -1.0),
+                       (ConstraintCoeff.ConstraintType.INJ_VOL_PCT, ConstraintCoeff.BoundaryType.UB, 0.2),
+                       (ConstraintCoeff.ConstraintType.INJ_VOL_PCT, ConstraintCoeff.BoundaryType.LB, 0.0),
+                       (ConstraintCoeff.ConstraintType.REL_VOL_PCT, ConstraintCoeff.BoundaryType.UB, 0.25),
+                       (ConstraintCoeff.ConstraintType.REL_VOL_PCT, ConstraintCoeff.BoundaryType.LB, 0.0)]
+
+    def setUp(self):
+        if not SparseSolver().available():
+            self.skipTest( "CBC is not available" )
+
+
+    def create_network(self, ungrouped=False, cumsum=False):
+        """
+        @return: network of L{test_case}, lp variables created, and
+            its storage, with the window rows of L{window_row_list}
+            added
+        @rtype: L{tuple} of (L{gnw.network.Network}, L{gnw.storage.Storage})
+        """
+        ntwrk = create_network( self.test_case, create_lp_vars = False )
+        strg = ntwrk.get_entity_list( Storage )[0]
+        nSteps = len( strg.DISPATCH_PERIOD )
+        coeff_list = [[coeff.START, coeff.FINAL, coeff.BOUND, coeff.BTYPE, coeff.CTYPE] for coeff in strg.CONSTRAINT_COEFF]
+        for start in xrange( 0, nSteps - self.window_length + 1, self.window_length ):
+            final = start + self.window_length - 1
+            for ctype, btype, bound in self.window_row_list:
+                coeff_list.append( [start, final, bound, btype, ctype] )
+        strg.set_CONSTRAINT_COEFF( coeff_list )
+        if ungrouped:
+            strg.create_constraint_coeff_constraints = types.MethodType( create_ungrouped_constraints, strg )
+        if cumsum:
+            strg.CCOEFF_CUMSUM_RATIO = 0
+        ntwrk.create_lp_vars()
+        return ntwrk, strg
+
+
+    def assertObjectiveEqual(self, first, second, msg=None):
+        self.assertEqual( first[0], pulp.LpStatusOptimal, msg )
+        self.assertEqual( second[0], pulp.LpStatusOptimal, msg )
+        self.assertAlmostEqual( first[1], second[1],
+                                delta = self.rel_tol * max( abs( first[1] ), 1.0 ),
+                                msg = msg )
+
+
+    def test_grouped_and_cumsum(self):
+        ntwrk, strg = self.create_network( ungrouped = True )
+        expected = solve_pulp( ntwrk )
+        self.assertEqual( expected[0], pulp.LpStatusOptimal )
+
+        ntwrk, strg = self.create_network()
+        self.assertEqual( strg.ccoeff_cumsum_list, [] )
+        self.assertTrue( max( [len( row_list ) for row_list in strg.ccoeff_group_dict.values()] ) > 1 )
+        self.assertObjectiveEqual( expected, solve_pulp( ntwrk ), "grouped" )
+        self.assertObjectiveEqual( expected, solve_sparse( ntwrk ), "grouped, sparse" )
+
+        ntwrk, strg = self.create_network( cumsum = True )
+        self.assertEqual( strg.ccoeff_cumsum_list, strg.ccoeff_ctype_list )
+        self.assertObjectiveEqual( expected, solve_pulp( ntwrk ), "cumsum" )
+        self.assertObjectiveEqual( expected, solve_sparse( ntwrk ), "cumsum, sparse" )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
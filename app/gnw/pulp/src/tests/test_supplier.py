@@ -0,0 +1,135 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking the remaining volume recursion of
+the make-up trigger constraints (see
+L{gnw.supplier.Supplier.create_mup_constraints}), i.e.,
+mup_rem_vol[FINAL] == 0 and mup_rem_vol[t] == mup_rem_vol[t + 1] + vol[t + 1]
+per accounting period, against the former formulation summing the
+volumes of the remaining dispatch periods in each trigger constraint.
+"""
+import unittest
+
+import numpy
+import pulp
+
+from gnw.sparse_solver import SparseSolver
+from gnw.supplier import Supplier
+
+from reference import create_network
+from test_sparse_model import solve_pulp
+
+
+def substitute_rem_vol(splr):
+    """
+    Turns the make-up constraints of splr into the former
+    formulation by substituting
+    lpSum( [vol[d] for d in xrange( t + 1, FINAL + 1 )] )
+    for mup_rem_vol[t], dropping the recursion constraints,
+    which then hold trivially.
+    """
+    rem_vol_dict = {}
+    for period_tuple in splr.acc_period_tuple_list:
+        START, FINAL = period_tuple[0], period_tuple[1]
+        for t in xrange( START, FINAL + 1 ):
+            rem_vol_dict[splr.mup_rem_vol[t].name] = pulp.lpSum( [splr.vol[d] for d in xrange( t + 1, FINAL + 1 )] )
+
+    constraint_list = []
+    for constraint in splr.constraint_list:
+        if not [lp_var for lp_var in constraint if lp_var.name in rem_vol_dict]:
+            constraint_list.append( constraint )
+            continue
+        expr = pulp.LpAffineExpression( constant = constraint.constant )
+        for lp_var, coeff in constraint.items():
+            expr += coeff*rem_vol_dict.get( lp_var.name, lp_var )
+        expr = pulp.LpAffineExpression( [(lp_var, coeff) for lp_var, coeff in expr.items() if coeff != 0], constant = expr.constant )
+        if len( expr ):
+            constraint_list.append( pulp.LpConstraint( expr, constraint.sense, name = constraint.name ) )
+    splr.constraint_list[:] = constraint_list
+
+
+def solve_pulp_former(ntwrk):
+    """
+    Solves ntwrk like L{test_sparse_model.solve_pulp}, with the
+    make-up constraints of its suppliers in the former formulation
+    (see L{substitute_rem_vol}).
+
+    @return: status and objective value
+    @rtype: L{tuple} of (L{int}, L{float})
+    """
+    ntwrk.create_model()
+    for splr in ntwrk.get_entity_list( Supplier ):
+        if splr.HAS_MUP:
+            substitute_rem_vol( splr )
+    prblm = pulp.LpProblem( "gnw", pulp.LpMaximize )
+    ntwrk.populate( prblm )
+    prblm.solve( SparseSolver().create_pulp_solver() )
+    ntwrk.restore_lp_var_bounds()
+    return prblm.status, pulp.value( prblm.objective )
+
+
+class SupplierMakeUpTest( unittest.TestCase ):
+    """
+    Solves a supplier test case with make-up in both formulations,
+    checking the recursion constraints and the remaining volumes
+    of the solution.
+    """
+    test_case = "supplier-dummy-dsp-mup"
+    rel_tol = 1.0e-6
+
+    def setUp(self):
+        if not SparseSolver().available():
+            self.skipTest( "CBC is not available" )
+
+
+    def test_rem_vol(self):
+        ntwrk = create_network( self.test_case )
+        status, objective = solve_pulp( ntwrk )
+        self.assertEqual( status, pulp.LpStatusOptimal )
+
+        splr_list = [splr for splr in ntwrk.get_entity_list( Supplier ) if splr.HAS_MUP]
+        self.assertTrue( len( splr_list ) > 0 )
+        for splr in splr_list:
+            vol = splr.get_lp_var_solution( "vol" )
+            rem_vol = splr.get_lp_var_solution( "mup_rem_vol" )
+            # names of the lp variables pinned to zero by a constraint of their own
+            pinned_list = [constraint.keys()[0].name for constraint in splr.constraint_list \
+                           if constraint.values() == [1] \
+                           and constraint.sense == pulp.LpConstraintEQ \
+                           and constraint.constant == 0.0]
+            for period_tuple in splr.acc_period_tuple_list:
+                START, FINAL = period_tuple[0], period_tuple[1]
+                self.assertTrue( splr.mup_rem_vol[FINAL].name in pinned_list, (START, FINAL) )
+                self.assertEqual( rem_vol[FINAL], 0.0 )
+                for t in xrange( START, FINAL ):
+                    self.assertAlmostEqual( rem_vol[t], numpy.sum( vol[t + 1:FINAL + 1] ),
+                                            delta = self.rel_tol * max( abs( rem_vol[t] ), 1.0 ),
+                                            msg = t )
+
+        expected = solve_pulp_former( create_network( self.test_case ) )
+        self.assertEqual( expected[0], pulp.LpStatusOptimal )
+        self.assertAlmostEqual( objective, expected[1], delta = self.rel_tol * max( abs( expected[1] ), 1.0 ) )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
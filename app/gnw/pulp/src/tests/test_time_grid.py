@@ -0,0 +1,107 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking that the entities of a network
+share the dispatch periods and discount factors of the network's
+L{gnw.time_grid.TimeGrid} by reference, and the delivery window
+sums of time grids.
+"""
+import unittest
+
+import numpy
+
+from gnw.entity import Entity
+from gnw.product import Product
+from gnw.time_grid import TimeGrid
+
+from reference import create_network
+
+
+class TimeGridTest( unittest.TestCase ):
+    """
+    Checks the arrays held by the entities of test cases and
+    by products created from the arrays of a time grid.
+    """
+    test_case_list = ["supplier-dummy-prd-trn-cfw-mup",
+                      "virtstor-3sp-365-dc-0cs-11-30ts"]
+
+    def create_time_grid(self):
+        nSteps = 10
+        return TimeGrid( numpy.arange( 1.0, nSteps + 1.0 ), numpy.linspace( 1.0, 0.9, nSteps ) )
+
+
+    def test_network_shares_time_grid(self):
+        for test_case in self.test_case_list:
+            ntwrk = create_network( test_case, create_lp_vars = False )
+            time_grid = ntwrk.TIME_GRID
+            for entity in ntwrk.iter_entities():
+                self.assertTrue( entity.TIME_GRID is time_grid, entity.name )
+                self.assertTrue( entity.DISPATCH_PERIOD is time_grid.DISPATCH_PERIOD, entity.name )
+                if hasattr( entity, "DISCOUNT_FACTOR" ):
+                    self.assertTrue( entity.DISCOUNT_FACTOR is time_grid.DISCOUNT_FACTOR, entity.name )
+
+
+    def test_share_array(self):
+        time_grid = self.create_time_grid()
+        self.assertTrue( TimeGrid.share_array( time_grid.DISPATCH_PERIOD ) is time_grid.DISPATCH_PERIOD )
+        self.assertTrue( Entity.create_coefficient_array( time_grid.DISCOUNT_FACTOR, len( time_grid ), "" ) is time_grid.DISCOUNT_FACTOR )
+
+        # writable input arrays are copied
+        dispatch_period = numpy.array( time_grid.DISPATCH_PERIOD )
+        self.assertFalse( TimeGrid( dispatch_period ).DISPATCH_PERIOD is dispatch_period )
+        self.assertFalse( Entity.create_coefficient_array( dispatch_period, len( time_grid ), "" ) is dispatch_period )
+
+
+    def test_product_shares_time_grid(self):
+        time_grid = self.create_time_grid()
+        prd = Product( "prd", deliveryPeriod = (2, 5),
+                       discountFactor = time_grid.DISCOUNT_FACTOR,
+                       dispatchPeriod = time_grid.DISPATCH_PERIOD )
+        self.assertTrue( prd.DISPATCH_PERIOD is time_grid.DISPATCH_PERIOD )
+        self.assertTrue( prd.DISCOUNT_FACTOR is time_grid.DISCOUNT_FACTOR )
+        prd.set_TIME_GRID( time_grid )
+        self.assertTrue( prd.get_TIME_GRID() is time_grid )
+
+        # own discount factors, shared dispatch periods
+        prd = Product( "prd", deliveryPeriod = (2, 5),
+                       discountFactor = 0.5,
+                       dispatchPeriod = list( time_grid.DISPATCH_PERIOD ) )
+        prd.set_TIME_GRID( time_grid )
+        self.assertTrue( prd.TIME_GRID is None )
+        self.assertTrue( prd.DISPATCH_PERIOD is time_grid.DISPATCH_PERIOD )
+        self.assertTrue( prd.get_TIME_GRID().DISPATCH_PERIOD is time_grid.DISPATCH_PERIOD )
+        self.assertEqual( list( prd.get_TIME_GRID().DISCOUNT_FACTOR ), [0.5]*len( time_grid ) )
+
+
+    def test_window_sums(self):
+        time_grid = self.create_time_grid()
+        dt = time_grid.DISPATCH_PERIOD
+        df = time_grid.DISCOUNT_FACTOR
+        for start, final in [(0, 9), (2, 5), (4, 4), (-1, 3), (7, 12), (5, 4)]:
+            window = xrange( max( start, 0 ), min( final, len( dt ) - 1 ) + 1 )
+            self.assertAlmostEqual( time_grid.get_dt_sum( start, final ), sum( [dt[t] for t in window], 0.0 ) )
+            self.assertAlmostEqual( time_grid.get_dtdf_sum( start, final ), sum( [dt[t]*df[t] for t in window], 0.0 ) )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================
@@ -0,0 +1,102 @@
+# ==============================================================================
+#
+#   package         :   GasNetWorks (gnw) Python/pulp fuelled LP/MIP modeller
+#   version         :   $Id$
+#   heading         :   $HeadURL$
+#
+#   Description     :   Regression tests
+#
+#   Copyright       :   RWE Supply and Trading GmbH
+#
+# ==============================================================================
+"""
+gnw: regression tests checking that gzip compressed result
+files (see L{gnw.util.open_results_file}) decompress to the
+bytes of the corresponding text result files written by
+L{driver.write_results}.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import pulp
+
+from driver import solve_sparse, write_results
+from gnw.profiler import Profiler
+from gnw.sparse_solver import SparseSolver
+
+from reference import create_network
+
+
+def read_file(fname):
+    """
+    @return: content of file fname, decompressed if fname
+        has extension ".gz"
+    @rtype: L{str}
+    """
+    if fname.endswith( ".gz" ):
+        file = gzip.open( fname, "rb" )
+    else:
+        file = open( fname, "rb" )
+    try:
+        return file.read()
+    finally:
+        file.close()
+
+
+class WriterTest( unittest.TestCase ):
+    """
+    Writes the results of a supplier and a storage test case
+    uncompressed and compressed and compares the files' content.
+    """
+    test_case_list = ["supplier-dummy-dsp",
+                      "virtstor-3sp-365-24-0cs-11-30ts"]
+    compresslevel = 6
+
+    def setUp(self):
+        if not SparseSolver().available():
+            self.skipTest( "CBC is not available" )
+        self.tmp_dir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree( self.tmp_dir )
+
+
+    def test_gzip_results(self):
+        for test_case in self.test_case_list:
+            ntwrk = create_network( test_case )
+            prblm = solve_sparse( ntwrk, False, Profiler( False ) )
+            self.assertEqual( prblm.status, pulp.LpStatusOptimal )
+
+            text_dir = os.path.join( self.tmp_dir, test_case, "txt" )
+            gzip_dir = os.path.join( self.tmp_dir, test_case, "gz" )
+            os.makedirs( text_dir )
+            os.makedirs( gzip_dir )
+            write_results( ntwrk, prblm, text_dir, False, Profiler( False ) )
+            write_results( ntwrk, prblm, gzip_dir, False, Profiler( False ), compresslevel = self.compresslevel )
+
+            fname_list = sorted( os.listdir( text_dir ) )
+            self.assertTrue( len( fname_list ) > 2 )
+            self.assertEqual( [fname + ".gz" for fname in fname_list], sorted( os.listdir( gzip_dir ) ) )
+            for fname in fname_list:
+                self.assertEqual( read_file( os.path.join( text_dir, fname ) ),
+                                  read_file( os.path.join( gzip_dir, fname + ".gz" ) ),
+                                  "%s: %s" % (test_case, fname) )
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# ==============================================================================
+#
+#   Revision Control:
+#
+#   $Revision::                         $   Revision of last commit
+#   $Author::                           $   Author of last commit
+#   $Date::                             $   Date of last commit
+#
+# ==============================================================================